@@ -7,18 +7,20 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
 from config.config import config
+from app.utils.routing_session import RoutingSession
 
-# 初始化扩展
-db = SQLAlchemy()
+# 初始化扩展（会话按请求在主库和只读从库之间路由）
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 csrf = CSRFProtect()
 
-def create_app(config_name='default'):
+def create_app(config_name='default', config_overrides=None):
     """
     应用工厂函数
     
     Args:
         config_name (str): 配置名称
+        config_overrides (dict): 覆盖的配置项（基准测试用于指定数据库等）
         
     Returns:
         Flask: Flask应用实例
@@ -27,12 +29,50 @@ def create_app(config_name='default'):
     
     # 加载配置
     app.config.from_object(config[config_name])
+    if config_overrides:
+        app.config.update(config_overrides)
     
-    # 初始化扩展
+    # 初始化扩展（使用可记录指标的连接池）
+    from app.services.pool_metrics import configure_engine_options, attach_pool_metrics
+    configure_engine_options(app)
     db.init_app(app)
+    with app.app_context():
+        attach_pool_metrics(db.engine)
+    
+    # 初始化请求级SQL统计
+    from app.services.query_metrics import init_query_metrics
+    init_query_metrics(app)
+    
+    # 初始化应用指标（/metrics）
+    from app.services.metrics import init_metrics
+    init_metrics(app)
+    
+    # 初始化只读从库路由
+    from app.services.replicas import init_replicas
+    init_replicas(app)
     login_manager.init_app(app)
     csrf.init_app(app)
     
+    # 初始化浏览计数缓冲
+    from app.services.view_counter import view_counter
+    view_counter.init_app(app)
+    
+    # 初始化匿名页面缓存
+    from app.services.page_cache import page_cache
+    page_cache.init_app(app)
+    
+    # 初始化登录身份缓存
+    from app.services.identity import init_identity_cache, load_identity
+    init_identity_cache(app)
+    
+    # 初始化分类注册表
+    from app.services.categories import init_category_registry
+    init_category_registry(app)
+    
+    # 注册后台任务处理函数
+    from app.services.jobs import init_jobs
+    init_jobs(app)
+    
     # 配置登录管理器
     login_manager.login_view = 'auth.login'
     login_manager.login_message = '请先登录以访问此页面。'
@@ -40,9 +80,8 @@ def create_app(config_name='default'):
     
     @login_manager.user_loader
     def load_user(user_id):
-        """加载用户回调函数"""
-        from app.models.user import User
-        return User.query.get(int(user_id))
+        """加载用户回调函数（一次查询加载用户及管理员记录，并短暂缓存快照）"""
+        return load_identity(int(user_id))
     
     # 注册蓝图
     from app.routes.auth import auth_bp
@@ -57,6 +96,10 @@ def create_app(config_name='default'):
     app.register_blueprint(article_bp)
     app.register_blueprint(comment_bp)
     
+    # 注册命令行工具
+    from app.commands import register_commands
+    register_commands(app)
+    
     # 注册错误处理器
     @app.errorhandler(403)
     def forbidden(error):
@@ -78,8 +121,16 @@ def create_app(config_name='default'):
             return ''
         return text.replace('\n', '<br>\n')
     
-    # 创建数据库表
-    with app.app_context():
-        db.create_all()
+    # 启用模板字节码缓存并预加载模板
+    from app.services.templates import init_template_cache
+    init_template_cache(app)
+    
+    # 初始化请求追踪（包装已注册的视图函数和模板过滤器）
+    from app.services.tracing import init_tracing
+    init_tracing(app)
+    
+    # 检查数据库迁移版本（启动时不执行DDL，表结构由 flask db upgrade 维护）
+    from app.services.migrations import init_schema_check
+    init_schema_check(app)
     
     return app
\ No newline at end of file
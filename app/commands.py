@@ -0,0 +1,271 @@
+"""
+命令行工具
+Command Line Commands
+"""
+import click
+from flask.cli import AppGroup
+
+# 数据库迁移命令组
+db_cli = AppGroup('db', help='数据库迁移')
+
+
+@db_cli.command('upgrade')
+@click.option('--to', 'target', default=None, help='升级到的版本号，默认为最新版本')
+def db_upgrade_command(target):
+    """
+    执行尚未执行的数据库迁移
+    """
+    from app.services.migrations import upgrade, MigrationError
+
+    try:
+        executed = upgrade(target, echo=lambda migration: click.echo(
+            f'执行迁移 {migration.revision}: {migration.description}'))
+    except MigrationError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'已执行 {len(executed)} 个迁移' if executed else '数据库已是最新版本')
+
+
+@db_cli.command('current')
+def db_current_command():
+    """
+    显示数据库当前版本和代码中的最新版本
+    """
+    from app.services.migrations import current_revision, head_revision
+
+    click.echo(f'数据库版本: {current_revision() or "无"}')
+    click.echo(f'最新版本: {head_revision()}')
+
+
+@db_cli.command('history')
+def db_history_command():
+    """
+    列出全部迁移及执行状态
+    """
+    from app.services.migrations import load_migrations, applied_revisions
+
+    done = applied_revisions()
+    for migration in load_migrations():
+        mark = 'x' if migration.revision in done else ' '
+        click.echo(f'[{mark}] {migration.revision} {migration.description}')
+
+
+@db_cli.command('check')
+def db_check_command():
+    """
+    检查数据库是否为最新版本，不是时以非零状态退出
+    """
+    from app.services.migrations import current_revision, head_revision
+
+    current, head = current_revision(), head_revision()
+    if current != head:
+        raise click.ClickException(f'数据库版本 {current or "无"} 不是最新版本 {head}')
+    click.echo(f'数据库已是最新版本 {head}')
+
+
+@db_cli.command('stamp')
+@click.argument('revision', required=False)
+def db_stamp_command(revision):
+    """
+    将迁移标记为已执行而不实际执行
+    """
+    from app.services.migrations import stamp
+
+    stamped = stamp(revision)
+    click.echo(f'已标记 {len(stamped)} 个迁移')
+
+
+# 冗余计数维护命令组
+counters_cli = AppGroup('counters', help='冗余计数维护')
+
+
+@counters_cli.command('reconcile')
+def reconcile_counters_command():
+    """
+    重新计算文章、分类和用户的冗余计数
+    """
+    from app.models.counters import reconcile_counters
+
+    result = reconcile_counters()
+    for table, rows in result.items():
+        click.echo(f'{table}: {rows} 行已重新计算')
+
+
+# 全文搜索索引命令组
+search_cli = AppGroup('search', help='全文搜索索引维护')
+
+
+@search_cli.command('rebuild')
+@click.option('--batch-size', default=200, show_default=True, help='每批索引的文章数量')
+def rebuild_search_index_command(batch_size):
+    """
+    重建全部文章的全文搜索索引
+    """
+    from app.services.search import rebuild_index
+
+    total = rebuild_index(batch_size=batch_size)
+    click.echo(f'已索引 {total} 篇文章')
+
+
+# 文章维护命令组
+articles_cli = AppGroup('articles', help='文章维护')
+
+
+@articles_cli.command('backfill-excerpts')
+@click.option('--batch-size', default=200, show_default=True, help='每批回填的文章数量')
+@click.option('--rebuild', is_flag=True, help='重新计算全部文章')
+def backfill_excerpts_command(batch_size, rebuild):
+    """
+    回填文章的摘录、字数和阅读时长
+    """
+    from app.services.excerpts import backfill_content_fields
+
+    total = backfill_content_fields(batch_size=batch_size, rebuild=rebuild)
+    click.echo(f'已回填 {total} 篇文章')
+
+
+# 评论维护命令组
+comments_cli = AppGroup('comments', help='评论维护')
+
+
+@comments_cli.command('backfill-paths')
+@click.option('--batch-size', default=1000, show_default=True, help='每批回填的评论数量')
+@click.option('--rebuild', is_flag=True, help='清空后重新计算全部评论的路径')
+def backfill_comment_paths_command(batch_size, rebuild):
+    """
+    回填评论的物化路径和深度
+    """
+    from app.services.comment_tree import backfill_comment_paths
+
+    total, remaining = backfill_comment_paths(batch_size=batch_size, rebuild=rebuild)
+    click.echo(f'已回填 {total} 条评论')
+    if remaining:
+        click.echo(f'{remaining} 条评论的父评论不存在，未能回填')
+
+
+# 查询计划命令组
+schema_cli = AppGroup('schema', help='查询计划检查')
+
+
+@schema_cli.command('explain')
+def explain_command():
+    """
+    输出热点查询的查询计划，未使用索引时以非零状态退出
+    """
+    from app.services.schema import explain_hot_queries
+
+    failed = False
+    for name, plan in explain_hot_queries().items():
+        status = 'OK' if plan.ok else 'SLOW'
+        failed = failed or not plan.ok
+        click.echo(f'[{status}] {name}: {", ".join(plan.indexes) or "无索引"}')
+        for detail in plan.details:
+            click.echo(f'    {detail}')
+    if failed:
+        raise SystemExit(1)
+
+
+# 用户管理命令组
+users_cli = AppGroup('users', help='用户管理')
+
+
+@users_cli.command('delete')
+@click.argument('user_id', type=int)
+@click.option('--chunk-size', default=500, show_default=True, help='每个事务删除的最大行数')
+def delete_user_command(user_id, chunk_size):
+    """
+    分批删除用户及其全部文章和评论
+    """
+    from app.services.bulk_delete import BulkDeleter
+
+    def progress(phase, done, total):
+        click.echo(f'{phase}: {done}/{total}')
+
+    removed = BulkDeleter(chunk_size, progress).delete_user(user_id)
+    for table, rows in removed.items():
+        click.echo(f'{table}: 删除 {rows} 行')
+
+
+# 后台任务命令组
+jobs_cli = AppGroup('jobs', help='后台任务队列')
+
+
+@jobs_cli.command('worker')
+@click.option('--concurrency', type=int, default=None, help='同时执行的任务数量，默认读取 JOB_WORKER_CONCURRENCY')
+@click.option('--once', is_flag=True, help='只执行一批到期任务后退出')
+def jobs_worker_command(concurrency, once):
+    """
+    启动后台任务 worker
+    """
+    from flask import current_app
+    from app.services.jobs import JobWorker
+
+    worker = JobWorker(current_app._get_current_object(), concurrency=concurrency)
+    if once:
+        click.echo(f'已执行 {worker.run_once()} 个任务')
+        return
+
+    click.echo(f'worker {worker.worker_id} 已启动（并发 {worker.concurrency}）')
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
+        click.echo('worker 已停止')
+
+
+@jobs_cli.command('status')
+def jobs_status_command():
+    """
+    按任务名称和状态统计任务数量
+    """
+    from sqlalchemy import func
+    from app import db
+    from app.models.job import Job
+
+    rows = db.session.query(Job.name, Job.status, func.count())\
+        .group_by(Job.name, Job.status).order_by(Job.name, Job.status).all()
+    if not rows:
+        click.echo('队列中没有任务')
+    for name, status, count in rows:
+        click.echo(f'{name} {status}: {count}')
+
+
+# 模板命令组
+templates_cli = AppGroup('templates', help='模板预编译')
+
+
+@templates_cli.command('compile')
+@click.option('--force', is_flag=True, help='重新编译全部模板')
+@click.option('--clear', is_flag=True, help='编译前清空缓存目录')
+def compile_templates_command(force, clear):
+    """
+    预编译全部模板写入字节码缓存，存在语法错误时以非零状态退出
+    """
+    from flask import current_app
+    from app.services.templates import clear_template_cache, precompile_templates, template_cache_dir
+
+    if clear:
+        clear_template_cache(current_app)
+    compiled, current, errors = precompile_templates(current_app, force=force)
+    for name, message in errors.items():
+        click.echo(f'[ERROR] {name}: {message}')
+    click.echo(f'已编译 {len(compiled)} 个模板，{len(current)} 个已是最新（{template_cache_dir(current_app)}）')
+    if errors:
+        raise SystemExit(1)
+
+
+def register_commands(app):
+    """
+    注册命令行工具
+
+    Args:
+        app: Flask应用实例
+    """
+    app.cli.add_command(db_cli)
+    app.cli.add_command(counters_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(articles_cli)
+    app.cli.add_command(comments_cli)
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(users_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(templates_cli)
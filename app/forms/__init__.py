@@ -2,6 +2,6 @@
 表单模块
 Forms Module
 """
-from .auth import LoginForm, RegisterForm
+from .auth import LoginForm, RegistrationForm
 from .article import ArticleForm, ArticleSearchForm, ArticleDeleteForm
 from .comment import CommentForm, CommentReplyForm, CommentDeleteForm, CommentModerationForm
\ No newline at end of file
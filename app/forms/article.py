@@ -2,12 +2,12 @@
 文章表单
 Article Forms
 """
-from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, SelectField, SubmitField, HiddenField
 from wtforms.validators import DataRequired, Length, Optional, ValidationError
-from app.models.category import Category
+from app.services.categories import get_categories, get_category
+from app.forms.base import AppForm
 
-class ArticleForm(FlaskForm):
+class ArticleForm(AppForm):
     """
     文章创建/编辑表单
     
@@ -40,21 +40,26 @@ class ArticleForm(FlaskForm):
     
     submit = SubmitField('保存文章')
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, categories=None, **kwargs):
+        """
+        Args:
+            categories (list): 分类列表，为None时从分类注册表读取
+        """
         super(ArticleForm, self).__init__(*args, **kwargs)
         # 动态加载分类选项
+        if categories is None:
+            categories = get_categories()
         self.category_id.choices = [(0, '请选择分类')] + [
-            (category.id, category.name) for category in Category.query.all()
+            (category.id, category.name) for category in categories
         ]
     
     def validate_category_id(self, field):
         """验证分类ID"""
         if field.data and field.data > 0:
-            category = Category.query.get(field.data)
-            if not category:
+            if get_category(field.data) is None:
                 raise ValidationError('选择的分类不存在')
 
-class ArticleSearchForm(FlaskForm):
+class ArticleSearchForm(AppForm):
     """
     文章搜索表单
     
@@ -71,14 +76,20 @@ class ArticleSearchForm(FlaskForm):
     
     submit = SubmitField('搜索')
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, categories=None, **kwargs):
+        """
+        Args:
+            categories (list): 分类列表，为None时从分类注册表读取
+        """
         super(ArticleSearchForm, self).__init__(*args, **kwargs)
         # 动态加载分类选项
+        if categories is None:
+            categories = get_categories()
         self.category_id.choices = [(0, '所有分类')] + [
-            (category.id, category.name) for category in Category.query.all()
+            (category.id, category.name) for category in categories
         ]
 
-class ArticleDeleteForm(FlaskForm):
+class ArticleDeleteForm(AppForm):
     """
     文章删除确认表单
     
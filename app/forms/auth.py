@@ -2,13 +2,13 @@
 用户认证表单
 Authentication Forms
 """
-from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, BooleanField
 from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError
 from app.models.user import User
+from app.forms.base import AppForm
 
 
-class RegistrationForm(FlaskForm):
+class RegistrationForm(AppForm):
     """
     用户注册表单
     
@@ -73,7 +73,7 @@ class RegistrationForm(FlaskForm):
             raise ValidationError('邮箱已存在，请使用其他邮箱')
 
 
-class LoginForm(FlaskForm):
+class LoginForm(AppForm):
     """
     用户登录表单
     
@@ -94,7 +94,7 @@ class LoginForm(FlaskForm):
     submit = SubmitField('登录')
 
 
-class EditProfileForm(FlaskForm):
+class EditProfileForm(AppForm):
     """
     编辑个人资料表单
     
@@ -112,7 +112,7 @@ class EditProfileForm(FlaskForm):
     submit = SubmitField('保存修改')
 
 
-class ChangePasswordForm(FlaskForm):
+class ChangePasswordForm(AppForm):
     """
     修改密码表单
     
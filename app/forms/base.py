@@ -0,0 +1,38 @@
+"""
+表单基类
+Base Form
+"""
+from flask_wtf import FlaskForm
+from wtforms.form import FormMeta
+from app.services.tracing import Span, current_trace
+
+
+class TracedFormMeta(FormMeta):
+    """
+    表单元类
+
+    请求被采样时记录表单构造耗时（包括子类 __init__ 中加载分类等操作），
+    只作用于继承 AppForm 的表单，不修改 WTForms 本身。
+    """
+
+    def __call__(cls, *args, **kwargs):
+        trace = current_trace()
+        if trace is None:
+            return super().__call__(*args, **kwargs)
+        with Span(trace, f'form.init {cls.__name__}', 'form', None):
+            return super().__call__(*args, **kwargs)
+
+
+class AppForm(FlaskForm, metaclass=TracedFormMeta):
+    """
+    本应用全部表单的基类
+
+    请求被采样时记录表单验证耗时。
+    """
+
+    def validate(self, extra_validators=None):
+        trace = current_trace()
+        if trace is None:
+            return super().validate(extra_validators)
+        with Span(trace, f'form.validate {type(self).__name__}', 'form', None):
+            return super().validate(extra_validators)
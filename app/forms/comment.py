@@ -2,11 +2,11 @@
 评论表单
 Comment Forms
 """
-from flask_wtf import FlaskForm
 from wtforms import TextAreaField, HiddenField, SubmitField
 from wtforms.validators import DataRequired, Length
+from app.forms.base import AppForm
 
-class CommentForm(FlaskForm):
+class CommentForm(AppForm):
     """
     评论表单
     
@@ -30,7 +30,7 @@ class CommentForm(FlaskForm):
     
     submit = SubmitField('发表评论', render_kw={'class': 'btn btn-primary'})
 
-class CommentReplyForm(FlaskForm):
+class CommentReplyForm(AppForm):
     """
     回复评论表单
     """
@@ -50,7 +50,7 @@ class CommentReplyForm(FlaskForm):
     
     submit = SubmitField('发表回复', render_kw={'class': 'btn btn-sm btn-primary'})
 
-class CommentDeleteForm(FlaskForm):
+class CommentDeleteForm(AppForm):
     """
     删除评论表单
     
@@ -59,7 +59,7 @@ class CommentDeleteForm(FlaskForm):
     """
     submit = SubmitField('确认删除', render_kw={'class': 'btn btn-sm btn-danger'})
 
-class CommentModerationForm(FlaskForm):
+class CommentModerationForm(AppForm):
     """
     评论审核表单（管理员使用）
     """
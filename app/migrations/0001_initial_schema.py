@@ -0,0 +1,125 @@
+"""
+初始表结构
+Initial Schema
+
+表结构在此冻结，不引用应用模型；之后新增的字段和索引由后续迁移补充。
+"""
+import sqlalchemy as sa
+from app import db
+
+revision = '0001'
+description = '创建初始数据表'
+
+metadata = sa.MetaData()
+
+sa.Table(
+    'users', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('username', sa.String(50), nullable=False, unique=True, index=True),
+    sa.Column('email', sa.String(100), nullable=False, unique=True, index=True),
+    sa.Column('password_hash', sa.String(255), nullable=False),
+    sa.Column('nickname', sa.String(50)),
+    sa.Column('avatar', sa.String(255)),
+    sa.Column('bio', sa.Text),
+    sa.Column('is_active', sa.Boolean, nullable=False),
+    sa.Column('created_at', sa.DateTime, nullable=False),
+    sa.Column('updated_at', sa.DateTime, nullable=False)
+)
+
+sa.Table(
+    'categories', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('name', sa.String(50), nullable=False, unique=True, index=True),
+    sa.Column('description', sa.Text),
+    sa.Column('slug', sa.String(50), nullable=False, unique=True, index=True),
+    sa.Column('created_at', sa.DateTime, nullable=False)
+)
+
+sa.Table(
+    'admins', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('user_id', sa.Integer, sa.ForeignKey('users.id'), nullable=False, unique=True),
+    sa.Column('role', sa.String(20), nullable=False),
+    sa.Column('permissions', sa.Text),
+    sa.Column('created_at', sa.DateTime, nullable=False)
+)
+
+sa.Table(
+    'articles', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('title', sa.String(200), nullable=False, index=True),
+    sa.Column('content', sa.Text, nullable=False),
+    sa.Column('summary', sa.String(500)),
+    sa.Column('author_id', sa.Integer, sa.ForeignKey('users.id'), nullable=False, index=True),
+    sa.Column('category_id', sa.Integer, sa.ForeignKey('categories.id'), index=True),
+    sa.Column('status', sa.Enum('draft', 'published', 'archived', name='article_status'),
+              nullable=False, index=True),
+    sa.Column('view_count', sa.Integer, nullable=False),
+    sa.Column('created_at', sa.DateTime, nullable=False, index=True),
+    sa.Column('updated_at', sa.DateTime, nullable=False),
+    sa.Column('published_at', sa.DateTime, index=True)
+)
+
+sa.Table(
+    'comments', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('content', sa.Text, nullable=False),
+    sa.Column('author_id', sa.Integer, sa.ForeignKey('users.id'), nullable=False, index=True),
+    sa.Column('article_id', sa.Integer, sa.ForeignKey('articles.id'), nullable=False, index=True),
+    sa.Column('parent_id', sa.Integer, sa.ForeignKey('comments.id'), index=True),
+    sa.Column('status', sa.Enum('approved', 'pending', 'rejected', name='comment_status'),
+              nullable=False, index=True),
+    sa.Column('created_at', sa.DateTime, nullable=False, index=True),
+    sa.Column('updated_at', sa.DateTime, nullable=False)
+)
+
+sa.Table(
+    'search_documents', metadata,
+    sa.Column('article_id', sa.Integer, sa.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True),
+    sa.Column('length', sa.Integer, nullable=False)
+)
+
+sa.Table(
+    'search_postings', metadata,
+    sa.Column('term', sa.String(64), primary_key=True),
+    sa.Column('article_id', sa.Integer, sa.ForeignKey('articles.id', ondelete='CASCADE'),
+              primary_key=True, index=True),
+    sa.Column('tf', sa.Integer, nullable=False)
+)
+
+sa.Table(
+    'cache_versions', metadata,
+    sa.Column('name', sa.String(50), primary_key=True),
+    sa.Column('version', sa.Integer, nullable=False)
+)
+
+sa.Table(
+    'jobs', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('name', sa.String(100), nullable=False, index=True),
+    sa.Column('payload', sa.Text),
+    sa.Column('idempotency_key', sa.String(191), unique=True),
+    sa.Column('status', sa.Enum('queued', 'running', 'succeeded', 'failed', name='job_status'),
+              nullable=False, index=True),
+    sa.Column('attempts', sa.Integer, nullable=False),
+    sa.Column('max_attempts', sa.Integer, nullable=False),
+    sa.Column('run_at', sa.DateTime, nullable=False, index=True),
+    sa.Column('locked_by', sa.String(64)),
+    sa.Column('locked_at', sa.DateTime),
+    sa.Column('progress', sa.Text),
+    sa.Column('result', sa.Text),
+    sa.Column('last_error', sa.Text),
+    sa.Column('created_at', sa.DateTime, nullable=False),
+    sa.Column('finished_at', sa.DateTime)
+)
+
+sa.Table(
+    'replica_heartbeat', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('beat_at', sa.Float, nullable=False)
+)
+
+
+def upgrade():
+    # 只创建不存在的表（由旧版本 create_all 建出的数据库已有部分表）
+    metadata.create_all(db.engine, checkfirst=True)
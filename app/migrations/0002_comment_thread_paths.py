@@ -0,0 +1,52 @@
+"""
+评论物化路径
+Comment Materialized Paths
+"""
+import sqlalchemy as sa
+from app import db
+from app.services.migrations import add_columns, create_index
+
+revision = '0002'
+description = '评论表新增 path、depth 字段并回填'
+
+BATCH_SIZE = 1000
+
+comments = sa.table(
+    'comments',
+    sa.column('id'),
+    sa.column('parent_id'),
+    sa.column('path'),
+    sa.column('depth')
+)
+
+
+def upgrade():
+    add_columns('comments', {
+        'path': 'VARCHAR(500)',
+        'depth': 'INTEGER NOT NULL DEFAULT 0'
+    })
+    create_index('ix_comments_path', 'comments', ['path'])
+
+    # 按层回填：每轮处理路径为空、且为顶级评论或父评论已有路径的评论
+    parent = comments.alias('parent')
+    statement = comments.update()\
+        .where(comments.c.id == sa.bindparam('b_id'))\
+        .values(path=sa.bindparam('b_path'), depth=sa.bindparam('b_depth'))
+    while True:
+        rows = db.session.execute(
+            sa.select(comments.c.id, comments.c.parent_id, parent.c.path, parent.c.depth)
+            .outerjoin(parent, parent.c.id == comments.c.parent_id)
+            .where(comments.c.path.is_(None),
+                   sa.or_(comments.c.parent_id.is_(None), parent.c.path.isnot(None)))
+            .order_by(comments.c.id.asc())
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        db.session.execute(statement, [
+            {'b_id': comment_id,
+             'b_path': (parent_path or '') + f'{comment_id:010d}/',
+             'b_depth': 0 if parent_id is None else parent_depth + 1}
+            for comment_id, parent_id, parent_path, parent_depth in rows
+        ])
+        db.session.commit()
@@ -0,0 +1,29 @@
+"""
+热点查询组合索引
+Composite Indexes for Hot Queries
+"""
+from sqlalchemy import text
+from app import db
+from app.services.migrations import create_index
+
+revision = '0004'
+description = '为文章、评论和任务表创建热点查询的组合索引'
+
+# 索引名 -> (表名, 字段)
+INDEXES = {
+    'ix_articles_status_published_at': ('articles', ['status', 'published_at']),
+    'ix_articles_category_status_published_at': ('articles', ['category_id', 'status', 'published_at']),
+    'ix_articles_author_created_at': ('articles', ['author_id', 'created_at']),
+    'ix_comments_article_status_created_at': ('comments', ['article_id', 'status', 'created_at']),
+    'ix_comments_author_created_at': ('comments', ['author_id', 'created_at']),
+    'ix_comments_parent_status': ('comments', ['parent_id', 'status']),
+    'ix_jobs_status_run_at': ('jobs', ['status', 'run_at'])
+}
+
+
+def upgrade():
+    created = [name for name, (table, columns) in INDEXES.items() if create_index(name, table, columns)]
+    if created and db.engine.dialect.name == 'sqlite':
+        # 更新统计信息，让查询规划器选择新索引
+        with db.engine.begin() as connection:
+            connection.execute(text('ANALYZE'))
@@ -0,0 +1,84 @@
+"""
+冗余计数字段
+Denormalized Counter Columns
+"""
+from datetime import datetime
+import sqlalchemy as sa
+from app import db
+from app.services.migrations import add_columns
+
+revision = '0005'
+description = '文章、用户、分类表新增冗余计数字段并回填，重建全文索引'
+
+articles = sa.table(
+    'articles',
+    sa.column('id'),
+    sa.column('author_id'),
+    sa.column('category_id'),
+    sa.column('status'),
+    sa.column('comment_count')
+)
+comments = sa.table(
+    'comments',
+    sa.column('id'),
+    sa.column('article_id'),
+    sa.column('author_id')
+)
+users = sa.table(
+    'users',
+    sa.column('id'),
+    sa.column('published_article_count'),
+    sa.column('comment_count')
+)
+categories = sa.table(
+    'categories',
+    sa.column('id'),
+    sa.column('published_article_count')
+)
+jobs = sa.table(
+    'jobs',
+    sa.column('name'),
+    sa.column('payload'),
+    sa.column('idempotency_key'),
+    sa.column('status'),
+    sa.column('attempts'),
+    sa.column('max_attempts'),
+    sa.column('run_at'),
+    sa.column('created_at')
+)
+
+
+def _count(table, *conditions):
+    return sa.select(sa.func.count(table.c.id)).where(*conditions).scalar_subquery()
+
+
+def upgrade():
+    add_columns('articles', {'comment_count': 'INTEGER NOT NULL DEFAULT 0'})
+    add_columns('users', {
+        'published_article_count': 'INTEGER NOT NULL DEFAULT 0',
+        'comment_count': 'INTEGER NOT NULL DEFAULT 0'
+    })
+    add_columns('categories', {'published_article_count': 'INTEGER NOT NULL DEFAULT 0'})
+
+    # 每张表一条带关联子查询的 UPDATE（不修改 updated_at）
+    db.session.execute(articles.update().values(
+        comment_count=_count(comments, comments.c.article_id == articles.c.id)
+    ))
+    db.session.execute(users.update().values(
+        comment_count=_count(comments, comments.c.author_id == users.c.id),
+        published_article_count=_count(articles, articles.c.author_id == users.c.id,
+                                       articles.c.status == 'published')
+    ))
+    db.session.execute(categories.update().values(
+        published_article_count=_count(articles, articles.c.category_id == categories.c.id,
+                                       articles.c.status == 'published')
+    ))
+
+    # 旧数据库中已有的文章在 0001 创建索引表之前写入，由后台任务重建全文索引
+    key = 'migration:0005:search.rebuild'
+    if db.session.execute(sa.select(jobs.c.name).where(jobs.c.idempotency_key == key)).first() is None:
+        now = datetime.utcnow()
+        db.session.execute(jobs.insert().values(
+            name='search.rebuild', payload='{}', idempotency_key=key,
+            status='queued', attempts=0, max_attempts=3, run_at=now, created_at=now
+        ))
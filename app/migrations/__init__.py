@@ -0,0 +1,17 @@
+"""
+数据库迁移脚本
+Database Migration Scripts
+
+每个迁移是本包中的一个模块，文件名以四位版本号开头（例如
+``0002_comment_thread_paths.py``），模块定义:
+
+- revision: 版本号（与文件名前缀一致）
+- description: 迁移说明
+- upgrade(): 在应用上下文中执行的迁移函数
+
+迁移中的表结构、DDL和回填逻辑按编写时的版本冻结，不引用应用模型或服务
+中会随代码变化的函数（字段和索引使用 app.services.migrations 中的
+add_columns() / create_index()）。由旧版本 create_all 建出的数据库可能已有
+部分字段和索引，因此迁移必须是幂等的：只创建不存在的表、字段和索引。
+只能依赖当前代码计算的数据（例如全文索引）由迁移写入后台任务重建。
+"""
@@ -7,5 +7,12 @@ from .admin import Admin
 from .category import Category
 from .article import Article
 from .comment import Comment
+from .search import SearchDocument, SearchPosting
+from .replica import ReplicaHeartbeat
+from .job import Job
+from .cache_version import CacheVersion
+from .schema_migration import SchemaMigration
+from . import counters  # 注册冗余计数维护事件
 
-__all__ = ['User', 'Admin', 'Category', 'Article', 'Comment']
\ No newline at end of file
+__all__ = ['User', 'Admin', 'Category', 'Article', 'Comment', 'SearchDocument', 'SearchPosting',
+           'ReplicaHeartbeat', 'Job', 'CacheVersion', 'SchemaMigration']
\ No newline at end of file
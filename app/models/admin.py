@@ -3,9 +3,47 @@
 Admin Data Model
 """
 from datetime import datetime
+from functools import lru_cache
 from app import db
 import json
 
+
+def _permission_tokens(permissions):
+    """
+    将权限字典转换为 "模块:操作" 集合
+    
+    Args:
+        permissions (dict): 权限字典
+        
+    Returns:
+        frozenset: 已授予的权限集合
+    """
+    return frozenset(
+        f'{module}:{action}'
+        for module, actions in permissions.items()
+        if isinstance(actions, dict)
+        for action, granted in actions.items() if granted
+    )
+
+
+@lru_cache(maxsize=256)
+def _compile_permissions(source):
+    """
+    编译权限JSON文本（按文本缓存，相同角色配置的管理员共享同一结果）
+    
+    Args:
+        source (str): 权限JSON文本，None表示默认权限
+        
+    Returns:
+        frozenset: 已授予的权限集合
+    """
+    if source:
+        try:
+            return _permission_tokens(json.loads(source))
+        except json.JSONDecodeError:
+            pass
+    return _permission_tokens(Admin.get_default_permissions())
+
 class Admin(db.Model):
     """
     管理员模型
@@ -47,7 +85,8 @@ class Admin(db.Model):
             permissions = self.get_default_permissions()
         self.set_permissions(permissions)
     
-    def get_default_permissions(self):
+    @staticmethod
+    def get_default_permissions():
         """
         获取默认权限
         
@@ -96,6 +135,7 @@ class Admin(db.Model):
             permissions (dict): 权限字典
         """
         self.permissions = json.dumps(permissions, ensure_ascii=False)
+        self._compiled = None
     
     def get_permissions(self):
         """
@@ -111,6 +151,22 @@ class Admin(db.Model):
                 return self.get_default_permissions()
         return self.get_default_permissions()
     
+    def get_permission_set(self):
+        """
+        获取已授予权限的集合
+        
+        编译结果缓存在实例上并以权限文本为准，set_permissions 或直接修改
+        permissions 字段后自动重新编译；不同实例的相同文本共享编译结果。
+        
+        Returns:
+            frozenset: 由 "模块:操作" 组成的集合
+        """
+        compiled = getattr(self, '_compiled', None)
+        if compiled is None or compiled[0] != self.permissions:
+            compiled = (self.permissions, _compile_permissions(self.permissions))
+            self._compiled = compiled
+        return compiled[1]
+    
     def has_permission(self, module, action):
         """
         检查是否有特定权限
@@ -122,8 +178,7 @@ class Admin(db.Model):
         Returns:
             bool: 是否有权限
         """
-        permissions = self.get_permissions()
-        return permissions.get(module, {}).get(action, False)
+        return f'{module}:{action}' in self.get_permission_set()
     
     def can_manage_users(self):
         """
@@ -196,6 +251,8 @@ class Admin(db.Model):
             module (str): 模块名称
             action (str): 操作名称
         """
+        if self.has_permission(module, action):
+            return
         permissions = self.get_permissions()
         if module not in permissions:
             permissions[module] = {}
@@ -210,6 +267,8 @@ class Admin(db.Model):
             module (str): 模块名称
             action (str): 操作名称
         """
+        if not self.has_permission(module, action):
+            return
         permissions = self.get_permissions()
         if module in permissions and action in permissions[module]:
             permissions[module][action] = False
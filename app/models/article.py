@@ -3,8 +3,9 @@
 Article Data Model
 """
 from datetime import datetime
+from sqlalchemy import event, inspect
 from app import db
-from sqlalchemy import or_
+from app.utils.text import derive_content, html_to_text, make_excerpt
 
 class Article(db.Model):
     """
@@ -18,14 +19,27 @@ class Article(db.Model):
     - 3.5: 用户删除自己的文章时移除文章及其相关评论
     """
     __tablename__ = 'articles'
+    __table_args__ = (
+        # 已发布列表: status=? ORDER BY published_at DESC
+        db.Index('ix_articles_status_published_at', 'status', 'published_at'),
+        # 分类列表: category_id=? AND status=? ORDER BY published_at DESC
+        db.Index('ix_articles_category_status_published_at', 'category_id', 'status', 'published_at'),
+        # 我的文章: author_id=? ORDER BY created_at DESC
+        db.Index('ix_articles_author_created_at', 'author_id', 'created_at'),
+    )
     
     # 主键
     id = db.Column(db.Integer, primary_key=True)
     
     # 基本信息
     title = db.Column(db.String(200), nullable=False, index=True)
-    content = db.Column(db.Text, nullable=False)
-    summary = db.Column(db.String(500))
+    content = db.deferred(db.Column(db.Text, nullable=False), group='body')  # 只在详情和编辑页加载
+    summary = db.Column(db.String(500))  # 作者填写的摘要
+    
+    # 保存时由正文派生的字段（列表页读取这些字段，不加载正文）
+    excerpt = db.Column(db.String(500))
+    word_count = db.Column(db.Integer, default=0, nullable=False)
+    reading_time = db.Column(db.Integer, default=1, nullable=False)  # 分钟
     
     # 关联字段
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
@@ -37,6 +51,7 @@ class Article(db.Model):
     
     # 统计信息
     view_count = db.Column(db.Integer, default=0, nullable=False)
+    comment_count = db.Column(db.Integer, default=0, nullable=False)  # 冗余计数，由计数事件维护
     
     # 时间戳
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -68,23 +83,34 @@ class Article(db.Model):
         for key, value in kwargs.items():
             if hasattr(self, key):
                 setattr(self, key, value)
-        
-        # 生成摘要
-        if not self.summary:
-            self.generate_summary()
+    
+    def derive_content_fields(self):
+        """
+        由正文计算摘录、字数和阅读时长（保存时自动调用）
+        """
+        for key, value in derive_content(self.content).items():
+            setattr(self, key, value)
     
     def generate_summary(self, length=200):
         """
-        生成文章摘要
+        用正文的纯文本摘录填充摘要
+        
+        列表页在没有摘要时显示保存时派生的摘录，一般无需调用此方法。
         
         Args:
             length (int): 摘要长度
         """
         if self.content:
-            # 移除HTML标签（简单处理）
-            import re
-            clean_content = re.sub(r'<[^>]+>', '', self.content)
-            self.summary = clean_content[:length] + ('...' if len(clean_content) > length else '')
+            self.summary = make_excerpt(html_to_text(self.content), length)
+    
+    def get_excerpt(self):
+        """
+        获取列表页显示的摘要（作者填写的摘要优先）
+        
+        Returns:
+            str: 摘要
+        """
+        return self.summary or self.excerpt or ''
     
     def publish(self):
         """
@@ -165,12 +191,12 @@ class Article(db.Model):
     
     def get_comment_count(self):
         """
-        获取文章评论数量
+        获取文章评论数量（读取冗余计数字段）
         
         Returns:
             int: 评论数量
         """
-        return self.comments.count()
+        return self.comment_count or 0
     
     def get_approved_comments(self):
         """
@@ -179,9 +205,8 @@ class Article(db.Model):
         Returns:
             Query: 评论查询对象
         """
-        return self.comments.filter_by(status='approved').order_by(
-            self.comments.property.mapper.class_.created_at.asc()
-        )
+        from app.models.comment import Comment
+        return self.comments.filter_by(status='approved').order_by(Comment.created_at.asc())
     
     @staticmethod
     def validate_title(title):
@@ -223,6 +248,8 @@ class Article(db.Model):
         """
         搜索文章
         
+        有关键词时使用全文索引匹配并按相关度（BM25）排序，否则按创建时间倒序。
+        
         Args:
             keyword (str): 搜索关键词
             category_id (int): 分类ID
@@ -231,21 +258,53 @@ class Article(db.Model):
         Returns:
             Query: 文章查询对象
         """
-        query = Article.query.filter_by(status=status)
-        
         if keyword:
-            search_filter = or_(
-                Article.title.contains(keyword),
-                Article.content.contains(keyword),
-                Article.summary.contains(keyword)
-            )
-            query = query.filter(search_filter)
+            from sqlalchemy import case
+            from app.services.search import rank_articles
+            
+            ranked_ids = rank_articles(keyword, category_id=category_id, status=status)
+            if not ranked_ids:
+                return Article.query.filter(db.false())
+            ordering = case({article_id: rank for rank, article_id in enumerate(ranked_ids)},
+                            value=Article.id)
+            return Article.query.filter(Article.id.in_(ranked_ids)).order_by(ordering)
+        
+        query = Article.query.filter_by(status=status)
         
         if category_id:
             query = query.filter_by(category_id=category_id)
         
         return query.order_by(Article.created_at.desc())
     
+    @staticmethod
+    def list_loader_options():
+        """
+        获取文章列表的关联加载选项
+        
+        列表行会显示作者和分类，随文章一起连接加载，避免逐行懒加载；
+        列表只显示保存时派生的摘录，正文保持延迟加载。
+        
+        Returns:
+            tuple: 加载选项
+        """
+        from sqlalchemy.orm import joinedload
+        return (joinedload(Article.author), joinedload(Article.category))
+    
+    @staticmethod
+    def detail_loader_options():
+        """
+        获取文章详情和编辑页的加载选项
+        
+        随文章一起加载正文、分类以及作者（含个人简介）。
+        
+        Returns:
+            tuple: 加载选项
+        """
+        from sqlalchemy.orm import joinedload, undefer_group
+        return (undefer_group('body'),
+                joinedload(Article.author).undefer_group('profile'),
+                joinedload(Article.category))
+    
     @staticmethod
     def get_published_articles():
         """
@@ -267,7 +326,8 @@ class Article(db.Model):
         Returns:
             list: 文章列表
         """
-        return Article.get_published_articles().limit(limit).all()
+        return Article.get_published_articles().options(*Article.list_loader_options())\
+                                               .limit(limit).all()
     
     def to_dict(self, include_content=False):
         """
@@ -283,6 +343,9 @@ class Article(db.Model):
             'id': self.id,
             'title': self.title,
             'summary': self.summary,
+            'excerpt': self.excerpt,
+            'word_count': self.word_count,
+            'reading_time': self.reading_time,
             'author_id': self.author_id,
             'author_name': self.author.get_display_name() if self.author else None,
             'category_id': self.category_id,
@@ -301,4 +364,17 @@ class Article(db.Model):
         return data
     
     def __repr__(self):
-        return f'<Article {self.title}>'
\ No newline at end of file
+        return f'<Article {self.title}>'
+
+
+@event.listens_for(Article, 'before_insert')
+def _derive_on_insert(mapper, connection, target):
+    """新文章保存时计算派生字段"""
+    target.derive_content_fields()
+
+
+@event.listens_for(Article, 'before_update')
+def _derive_on_update(mapper, connection, target):
+    """正文修改时重新计算派生字段"""
+    if inspect(target).attrs.content.history.has_changes():
+        target.derive_content_fields()
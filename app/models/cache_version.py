@@ -0,0 +1,21 @@
+"""
+缓存版本号数据模型
+Cache Version Stamp Model
+"""
+from app import db
+
+
+class CacheVersion(db.Model):
+    """
+    缓存版本号
+
+    每行对应一份进程内缓存的数据（例如分类注册表）。数据变更时在同一事务
+    内递增版本号，各 worker 读到新版本号后重新加载自己的缓存。
+    """
+    __tablename__ = 'cache_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<CacheVersion {self.name}={self.version}>'
@@ -23,6 +23,9 @@ class Category(db.Model):
     description = db.Column(db.Text)
     slug = db.Column(db.String(50), unique=True, nullable=False, index=True)
     
+    # 统计信息（冗余计数，由计数事件维护）
+    published_article_count = db.Column(db.Integer, default=0, nullable=False)
+    
     # 时间戳
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
@@ -60,12 +63,12 @@ class Category(db.Model):
     
     def get_article_count(self):
         """
-        获取分类下的文章数量
+        获取分类下已发布的文章数量（读取冗余计数字段）
         
         Returns:
             int: 文章数量
         """
-        return self.articles.filter_by(status='published').count()
+        return self.published_article_count or 0
     
     def get_published_articles(self):
         """
@@ -3,8 +3,34 @@
 Comment Data Model
 """
 from datetime import datetime
+from sqlalchemy import event, func, literal, select
+from sqlalchemy.orm import attributes
 from app import db
 
+# 物化路径每段的宽度：评论ID左侧补零到固定宽度，按字符串排序即为线程的深度优先顺序
+PATH_SEGMENT_WIDTH = 10
+PATH_SEPARATOR = '/'
+PATH_MAX_LENGTH = 500
+# 路径长度限制下允许的最大回复深度（顶级评论深度为0）
+MAX_DEPTH = PATH_MAX_LENGTH // (PATH_SEGMENT_WIDTH + len(PATH_SEPARATOR)) - 1
+
+
+class CommentDepthError(ValueError):
+    """回复层级超过物化路径允许的最大深度"""
+
+
+def path_segment(comment_id):
+    """
+    生成评论ID对应的路径段
+    
+    Args:
+        comment_id (int): 评论ID
+        
+    Returns:
+        str: 路径段，例如 "0000000012/"
+    """
+    return f'{comment_id:0{PATH_SEGMENT_WIDTH}d}{PATH_SEPARATOR}'
+
 class Comment(db.Model):
     """
     评论模型
@@ -16,18 +42,30 @@ class Comment(db.Model):
     - 4.4: 用户删除自己的评论时移除该评论
     """
     __tablename__ = 'comments'
+    __table_args__ = (
+        # 文章评论: article_id=? AND status=? ORDER BY created_at
+        db.Index('ix_comments_article_status_created_at', 'article_id', 'status', 'created_at'),
+        # 我的评论: author_id=? ORDER BY created_at DESC
+        db.Index('ix_comments_author_created_at', 'author_id', 'created_at'),
+        # 回复和回复数量: parent_id=? AND status=?
+        db.Index('ix_comments_parent_status', 'parent_id', 'status'),
+    )
     
     # 主键
     id = db.Column(db.Integer, primary_key=True)
     
-    # 基本信息
-    content = db.Column(db.Text, nullable=False)
+    # 基本信息（正文属于 body 延迟加载组，显示评论的查询通过 list_loader_options() 加载）
+    content = db.deferred(db.Column(db.Text, nullable=False), group='body')
     
     # 关联字段
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     article_id = db.Column(db.Integer, db.ForeignKey('articles.id'), nullable=False, index=True)
     parent_id = db.Column(db.Integer, db.ForeignKey('comments.id'), index=True)
     
+    # 线程结构（物化路径：从根评论到自身的ID序列，插入后由事件维护）
+    path = db.Column(db.String(PATH_MAX_LENGTH), index=True)
+    depth = db.Column(db.Integer, default=0, nullable=False)
+    
     # 状态管理
     status = db.Column(db.Enum('approved', 'pending', 'rejected', name='comment_status'), 
                       default='approved', nullable=False, index=True)
@@ -164,19 +202,33 @@ class Comment(db.Model):
     
     def get_depth(self):
         """
-        获取评论层级深度
+        获取评论层级深度（读取维护的 depth 字段）
         
         Returns:
             int: 层级深度
         """
-        depth = 0
-        current = self
-        while current.parent_id:
-            depth += 1
-            current = current.parent
-            if depth > 10:  # 防止无限循环
-                break
-        return depth
+        if self.path is None:
+            # 尚未回填路径的旧数据，沿父评论向上查找
+            depth = 0
+            current = self
+            while current.parent_id:
+                depth += 1
+                current = current.parent
+                if depth > 10:  # 防止无限循环
+                    break
+            return depth
+        return self.depth
+    
+    def get_thread_root_id(self):
+        """
+        获取评论线程根评论的ID（由路径第一段得出，不产生查询）
+        
+        Returns:
+            int: 根评论ID
+        """
+        if self.path is None:
+            return self.get_thread_root().id
+        return int(self.path[:PATH_SEGMENT_WIDTH])
     
     def get_thread_root(self):
         """
@@ -185,10 +237,35 @@ class Comment(db.Model):
         Returns:
             Comment: 根评论对象
         """
-        current = self
-        while current.parent_id:
-            current = current.parent
-        return current
+        if self.path is None:
+            current = self
+            while current.parent_id:
+                current = current.parent
+            return current
+        root_id = self.get_thread_root_id()
+        if root_id == self.id:
+            return self
+        return db.session.get(Comment, root_id)
+    
+    def get_subtree(self, status='approved', include_self=False):
+        """
+        获取评论的全部后代回复（按线程顺序）
+        
+        使用路径前缀匹配，一次索引范围查询取出整棵子树。
+        
+        Args:
+            status (str): 评论状态，None表示不限
+            include_self (bool): 是否包含评论本身
+            
+        Returns:
+            Query: 评论查询对象
+        """
+        query = Comment.query.filter(Comment.path.startswith(self.path, autoescape=True))
+        if not include_self:
+            query = query.filter(Comment.id != self.id)
+        if status:
+            query = query.filter_by(status=status)
+        return query.order_by(Comment.path.asc())
     
     @staticmethod
     def validate_content(content):
@@ -209,6 +286,41 @@ class Comment(db.Model):
         
         return True, ""
     
+    @staticmethod
+    def validate_parent(parent):
+        """
+        验证回复的父评论（提交前检查，避免写入时才发现层级过深）
+        
+        Args:
+            parent (Comment): 父评论，None表示顶级评论
+            
+        Returns:
+            tuple: (是否有效, 错误信息)
+        """
+        if parent is not None and (parent.depth or 0) >= MAX_DEPTH:
+            return False, f"回复层级不能超过{MAX_DEPTH}层，请回复上层评论"
+        
+        return True, ""
+    
+    @staticmethod
+    def list_loader_options(with_author=True):
+        """
+        获取显示评论列表的加载选项
+        
+        评论正文默认延迟加载；显示评论的列表随评论一起加载正文和作者。
+        
+        Args:
+            with_author (bool): 是否连接加载作者
+            
+        Returns:
+            tuple: 加载选项
+        """
+        from sqlalchemy.orm import joinedload, undefer_group
+        options = (undefer_group('body'),)
+        if with_author:
+            options += (joinedload(Comment.author),)
+        return options
+    
     @staticmethod
     def get_article_comments(article_id, status='approved', include_replies=True):
         """
@@ -222,13 +334,30 @@ class Comment(db.Model):
         Returns:
             Query: 评论查询对象
         """
-        query = Comment.query.filter_by(article_id=article_id, status=status)
+        query = Comment.query.options(*Comment.list_loader_options()).filter_by(article_id=article_id, status=status)
         
         if not include_replies:
             query = query.filter_by(parent_id=None)
         
         return query.order_by(Comment.created_at.asc())
     
+    @staticmethod
+    def get_thread_listing(article_id, status='approved'):
+        """
+        按线程顺序获取文章的评论（每条评论紧跟在其父评论之后）
+        
+        Args:
+            article_id (int): 文章ID
+            status (str): 评论状态，None表示不限
+            
+        Returns:
+            Query: 评论查询对象
+        """
+        query = Comment.query.options(*Comment.list_loader_options()).filter_by(article_id=article_id)
+        if status:
+            query = query.filter_by(status=status)
+        return query.order_by(Comment.path.asc())
+    
     @staticmethod
     def get_user_comments(user_id, status=None):
         """
@@ -241,7 +370,7 @@ class Comment(db.Model):
         Returns:
             Query: 评论查询对象
         """
-        query = Comment.query.filter_by(author_id=user_id)
+        query = Comment.query.options(*Comment.list_loader_options()).filter_by(author_id=user_id)
         
         if status:
             query = query.filter_by(status=status)
@@ -256,7 +385,7 @@ class Comment(db.Model):
         Returns:
             Query: 评论查询对象
         """
-        return Comment.query.filter_by(status='pending').order_by(Comment.created_at.asc())
+        return Comment.query.options(*Comment.list_loader_options()).filter_by(status='pending').order_by(Comment.created_at.asc())
     
     @staticmethod
     def get_recent_comments(limit=10, status='approved'):
@@ -270,7 +399,7 @@ class Comment(db.Model):
         Returns:
             list: 评论列表
         """
-        return Comment.query.filter_by(status=status).order_by(
+        return Comment.query.options(*Comment.list_loader_options()).filter_by(status=status).order_by(
             Comment.created_at.desc()
         ).limit(limit).all()
     
@@ -305,4 +434,65 @@ class Comment(db.Model):
         return data
     
     def __repr__(self):
-        return f'<Comment {self.id} by {self.author.username if self.author else self.author_id}>'
\ No newline at end of file
+        return f'<Comment {self.id} by {self.author.username if self.author else self.author_id}>'
+
+
+def _parent_position(connection, parent_id):
+    """查询父评论的路径和深度"""
+    comments = Comment.__table__
+    row = connection.execute(
+        select(comments.c.path, comments.c.depth).where(comments.c.id == parent_id)
+    ).first()
+    if row is None or row.path is None:
+        return None
+    return row.path, row.depth
+
+
+def _build_position(connection, comment_id, parent_id):
+    """计算评论的路径和深度"""
+    if parent_id is None:
+        return path_segment(comment_id), 0
+    parent = _parent_position(connection, parent_id)
+    if parent is None:
+        # 父评论尚未回填路径时暂不设置，回填命令会补全
+        return None, 0
+    path = parent[0] + path_segment(comment_id)
+    if len(path) > PATH_MAX_LENGTH:
+        raise CommentDepthError('评论回复层级过深')
+    return path, parent[1] + 1
+
+
+@event.listens_for(Comment, 'after_insert')
+def _comment_inserted(mapper, connection, target):
+    """插入后根据父评论写入路径和深度（父评论总是先于回复插入）"""
+    path, depth = _build_position(connection, target.id, target.parent_id)
+    comments = Comment.__table__
+    connection.execute(
+        comments.update().where(comments.c.id == target.id).values(path=path, depth=depth)
+    )
+    attributes.set_committed_value(target, 'path', path)
+    attributes.set_committed_value(target, 'depth', depth)
+
+
+@event.listens_for(Comment, 'after_update')
+def _comment_moved(mapper, connection, target):
+    """父评论变更时整体移动子树的路径"""
+    history = attributes.get_history(target, 'parent_id')
+    if not history.has_changes() or target.path is None:
+        return
+
+    old_path, old_depth = target.path, target.depth
+    new_path, new_depth = _build_position(connection, target.id, target.parent_id)
+    if new_path is None or new_path == old_path:
+        return
+
+    comments = Comment.__table__
+    connection.execute(
+        comments.update()
+        .where(comments.c.path.startswith(old_path, autoescape=True))
+        .values(path=literal(new_path) + func.substr(comments.c.path, len(old_path) + 1),
+                depth=comments.c.depth + (new_depth - old_depth))
+    )
+    attributes.set_committed_value(target, 'path', new_path)
+    attributes.set_committed_value(target, 'depth', new_depth)
+
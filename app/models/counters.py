@@ -0,0 +1,220 @@
+"""
+冗余计数维护
+Denormalized Counter Maintenance
+
+维护以下冗余计数字段，避免列表页逐行执行 COUNT(*):
+- articles.comment_count: 文章的评论数量
+- categories.published_article_count: 分类下已发布文章数量
+- users.published_article_count: 用户已发布文章数量
+- users.comment_count: 用户评论数量
+
+计数在 ORM flush 时通过映射器事件与数据行在同一事务内增减，覆盖创建、
+删除、状态变更以及 ORM 级联删除。绕过 ORM 的批量语句需要通过
+adjust_counters() 自行调整计数，或在之后执行 reconcile_counters()。
+
+计数字段由迁移 0005 添加并回填。
+"""
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import attributes
+from app import db
+from .user import User
+from .category import Category
+from .article import Article
+from .comment import Comment
+
+
+def _persisted_value(target, key):
+    """
+    获取属性在数据库中的值（flush 前的旧值）
+
+    Args:
+        target: 模型对象
+        key (str): 属性名
+
+    Returns:
+        属性的旧值
+    """
+    history = attributes.get_history(target, key)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, key)
+
+
+def _counter_values(table, values):
+    """
+    计数更新语句的 SET 子句：保留 updated_at，计数变化不算作行本身的修改
+
+    Args:
+        table: 数据表
+        values (dict): 要更新的计数字段
+
+    Returns:
+        dict: SET 子句
+    """
+    if 'updated_at' in table.c:
+        values = dict(values, updated_at=table.c.updated_at)
+    return values
+
+
+def _adjust(connection, model, row_id, column, delta):
+    """
+    原子地增减一行的计数字段
+
+    Args:
+        connection: 当前 flush 使用的数据库连接
+        model: 模型类
+        row_id (int): 行ID
+        column (str): 计数字段名
+        delta (int): 增量
+    """
+    if row_id is None or delta == 0:
+        return
+    table = model.__table__
+    connection.execute(
+        table.update()
+        .where(table.c.id == row_id)
+        .values(_counter_values(table, {column: table.c[column] + delta}))
+    )
+
+
+def adjust_counters(connection, model, column, deltas):
+    """
+    批量增减多行的计数字段（供绕过 ORM 的批量语句使用）
+    
+    增量相同的行合并为一条 UPDATE ... WHERE id IN (...) 语句。
+    
+    Args:
+        connection: 数据库连接
+        model: 模型类
+        column (str): 计数字段名
+        deltas (dict): 行ID -> 增量
+    """
+    by_delta = {}
+    for row_id, delta in deltas.items():
+        if row_id is not None and delta:
+            by_delta.setdefault(delta, []).append(row_id)
+
+    table = model.__table__
+    for delta, row_ids in by_delta.items():
+        connection.execute(
+            table.update()
+            .where(table.c.id.in_(row_ids))
+            .values(_counter_values(table, {column: table.c[column] + delta}))
+        )
+
+
+def _adjust_published(connection, author_id, category_id, delta):
+    """调整作者和分类的已发布文章计数"""
+    _adjust(connection, User, author_id, 'published_article_count', delta)
+    _adjust(connection, Category, category_id, 'published_article_count', delta)
+
+
+def _track_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+# 让计数相关属性在赋值时加载旧值，即使对象已过期也能取得 flush 前的值
+for _attribute in (Article.status, Article.author_id, Article.category_id,
+                   Comment.article_id, Comment.author_id):
+    event.listen(_attribute, 'set', _track_old_value, retval=True, active_history=True)
+
+
+@event.listens_for(Comment, 'after_insert')
+def _comment_inserted(mapper, connection, target):
+    _adjust(connection, Article, target.article_id, 'comment_count', 1)
+    _adjust(connection, User, target.author_id, 'comment_count', 1)
+
+
+@event.listens_for(Comment, 'after_delete')
+def _comment_deleted(mapper, connection, target):
+    _adjust(connection, Article, _persisted_value(target, 'article_id'), 'comment_count', -1)
+    _adjust(connection, User, _persisted_value(target, 'author_id'), 'comment_count', -1)
+
+
+@event.listens_for(Comment, 'after_update')
+def _comment_updated(mapper, connection, target):
+    old_article_id = _persisted_value(target, 'article_id')
+    if old_article_id != target.article_id:
+        _adjust(connection, Article, old_article_id, 'comment_count', -1)
+        _adjust(connection, Article, target.article_id, 'comment_count', 1)
+
+    old_author_id = _persisted_value(target, 'author_id')
+    if old_author_id != target.author_id:
+        _adjust(connection, User, old_author_id, 'comment_count', -1)
+        _adjust(connection, User, target.author_id, 'comment_count', 1)
+
+
+@event.listens_for(Article, 'after_insert')
+def _article_inserted(mapper, connection, target):
+    if target.status == 'published':
+        _adjust_published(connection, target.author_id, target.category_id, 1)
+
+
+@event.listens_for(Article, 'after_delete')
+def _article_deleted(mapper, connection, target):
+    if _persisted_value(target, 'status') == 'published':
+        _adjust_published(connection,
+                          _persisted_value(target, 'author_id'),
+                          _persisted_value(target, 'category_id'),
+                          -1)
+
+
+@event.listens_for(Article, 'after_update')
+def _article_updated(mapper, connection, target):
+    old = (
+        _persisted_value(target, 'status') == 'published',
+        _persisted_value(target, 'author_id'),
+        _persisted_value(target, 'category_id')
+    )
+    new = (target.status == 'published', target.author_id, target.category_id)
+    if old == new:
+        return
+
+    if old[0]:
+        _adjust_published(connection, old[1], old[2], -1)
+    if new[0]:
+        _adjust_published(connection, new[1], new[2], 1)
+
+
+def reconcile_counters():
+    """
+    批量重新计算所有冗余计数字段
+
+    每张表只执行一条带关联子查询的 UPDATE 语句。
+
+    Returns:
+        dict: 每张表更新的行数
+    """
+    articles = Article.__table__
+    comments = Comment.__table__
+    users = User.__table__
+    categories = Category.__table__
+
+    article_comments = select(func.count(comments.c.id))\
+        .where(comments.c.article_id == articles.c.id)\
+        .scalar_subquery()
+    user_comments = select(func.count(comments.c.id))\
+        .where(comments.c.author_id == users.c.id)\
+        .scalar_subquery()
+    user_published = select(func.count(articles.c.id))\
+        .where(articles.c.author_id == users.c.id, articles.c.status == 'published')\
+        .scalar_subquery()
+    category_published = select(func.count(articles.c.id))\
+        .where(articles.c.category_id == categories.c.id, articles.c.status == 'published')\
+        .scalar_subquery()
+
+    result = {
+        'articles': db.session.execute(
+            articles.update().values(_counter_values(articles, {'comment_count': article_comments}))
+        ).rowcount,
+        'users': db.session.execute(
+            users.update().values(_counter_values(users, {'comment_count': user_comments,
+                                                          'published_article_count': user_published}))
+        ).rowcount,
+        'categories': db.session.execute(
+            categories.update().values(_counter_values(categories,
+                                                       {'published_article_count': category_published}))
+        ).rowcount
+    }
+    db.session.commit()
+    return result
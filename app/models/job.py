@@ -0,0 +1,81 @@
+"""
+后台任务数据模型
+Background Job Model
+"""
+import json
+from datetime import datetime
+from app import db
+
+
+class Job(db.Model):
+    """
+    后台任务
+
+    由请求入队，``flask jobs worker`` 进程认领并执行。失败后按指数退避
+    重新排队，超过最大尝试次数后标记为失败。相同幂等键只会入队一次。
+    """
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        # 认领任务: status='queued' AND run_at<=? ORDER BY run_at
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
+
+    # 主键
+    id = db.Column(db.Integer, primary_key=True)
+
+    # 任务内容
+    name = db.Column(db.String(100), nullable=False, index=True)
+    payload = db.Column(db.Text)  # JSON格式的参数
+    idempotency_key = db.Column(db.String(191), unique=True)
+
+    # 调度状态
+    status = db.Column(db.Enum('queued', 'running', 'succeeded', 'failed', name='job_status'),
+                       default='queued', nullable=False, index=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    locked_by = db.Column(db.String(64))
+    locked_at = db.Column(db.DateTime)
+
+    # 执行结果
+    progress = db.Column(db.Text)  # JSON格式的进度信息
+    result = db.Column(db.Text)  # JSON格式的返回值
+    last_error = db.Column(db.Text)
+
+    # 时间戳
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime)
+
+    def get_payload(self):
+        """
+        获取任务参数
+
+        Returns:
+            dict: 参数字典
+        """
+        return json.loads(self.payload) if self.payload else {}
+
+    def to_dict(self):
+        """
+        转换为字典
+
+        Returns:
+            dict: 任务信息字典
+        """
+        return {
+            'id': self.id,
+            'name': self.name,
+            'payload': self.get_payload(),
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat() if self.run_at else None,
+            'progress': json.loads(self.progress) if self.progress else None,
+            'result': json.loads(self.result) if self.result else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.name} {self.status}>'
@@ -0,0 +1,21 @@
+"""
+从库心跳数据模型
+Replica Heartbeat Model
+"""
+from app import db
+
+
+class ReplicaHeartbeat(db.Model):
+    """
+    从库心跳
+
+    主库定期更新唯一一行的时间戳，复制到从库后，从库上读到的时间戳与
+    当前时间之差即为复制延迟。
+    """
+    __tablename__ = 'replica_heartbeat'
+
+    id = db.Column(db.Integer, primary_key=True)
+    beat_at = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f'<ReplicaHeartbeat {self.beat_at}>'
@@ -0,0 +1,23 @@
+"""
+数据库迁移记录模型
+Schema Migration Record Model
+"""
+from datetime import datetime
+from app import db
+
+
+class SchemaMigration(db.Model):
+    """
+    已执行的数据库迁移
+
+    每执行一个迁移记录一行，``flask db upgrade`` 据此跳过已执行的迁移，
+    应用启动时只比较最新记录与代码中的最新迁移版本。
+    """
+    __tablename__ = 'schema_migrations'
+
+    revision = db.Column(db.String(32), primary_key=True)
+    description = db.Column(db.String(200))
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<SchemaMigration {self.revision}>'
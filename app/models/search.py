@@ -0,0 +1,63 @@
+"""
+全文搜索索引数据模型
+Full-Text Search Index Models
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import attributes
+from app import db
+from .article import Article
+
+
+class SearchDocument(db.Model):
+    """
+    搜索文档
+
+    记录每篇已索引文章的加权词项总数（文档长度），用于 BM25 长度归一化。
+    """
+    __tablename__ = 'search_documents'
+
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True)
+    length = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<SearchDocument {self.article_id}>'
+
+
+class SearchPosting(db.Model):
+    """
+    倒排索引项
+
+    每行表示一个词项在一篇文章中的加权词频（标题、摘要、正文按不同权重累计）。
+    """
+    __tablename__ = 'search_postings'
+
+    term = db.Column(db.String(64), primary_key=True)
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'),
+                           primary_key=True, index=True)
+    tf = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<SearchPosting {self.term}:{self.article_id}>'
+
+
+# 影响索引内容的文章字段
+INDEXED_FIELDS = ('title', 'summary', 'content')
+
+
+@event.listens_for(Article, 'after_insert')
+def _article_inserted(mapper, connection, target):
+    from app.services.search import index_article
+    index_article(connection, target)
+
+
+@event.listens_for(Article, 'after_update')
+def _article_updated(mapper, connection, target):
+    if any(attributes.get_history(target, field).has_changes() for field in INDEXED_FIELDS):
+        from app.services.search import index_article
+        index_article(connection, target)
+
+
+@event.listens_for(Article, 'before_delete')
+def _article_deleting(mapper, connection, target):
+    from app.services.search import remove_article
+    remove_article(connection, target.id)
@@ -30,11 +30,15 @@ class User(UserMixin, db.Model):
     # 个人信息 - 可选字段
     nickname = db.Column(db.String(50))
     avatar = db.Column(db.String(255))
-    bio = db.Column(db.Text)
+    bio = db.deferred(db.Column(db.Text), group='profile')  # 只在资料页加载
     
     # 状态字段
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     
+    # 统计信息（冗余计数，由计数事件维护）
+    published_article_count = db.Column(db.Integer, default=0, nullable=False)
+    comment_count = db.Column(db.Integer, default=0, nullable=False)
+    
     # 时间戳
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -94,6 +98,19 @@ class User(UserMixin, db.Model):
         """
         return self.admin is not None
     
+    def has_permission(self, module, action):
+        """
+        检查用户是否拥有特定管理权限
+        
+        Args:
+            module (str): 模块名称
+            action (str): 操作名称
+            
+        Returns:
+            bool: 是否有权限
+        """
+        return self.admin is not None and self.admin.has_permission(module, action)
+    
     def get_display_name(self):
         """
         获取显示名称
@@ -105,21 +122,21 @@ class User(UserMixin, db.Model):
     
     def get_article_count(self):
         """
-        获取用户文章数量
+        获取用户已发布的文章数量（读取冗余计数字段）
         
         Returns:
             int: 文章数量
         """
-        return self.articles.filter_by(status='published').count()
+        return self.published_article_count or 0
     
     def get_comment_count(self):
         """
-        获取用户评论数量
+        获取用户评论数量（读取冗余计数字段）
         
         Returns:
             int: 评论数量
         """
-        return self.comments.count()
+        return self.comment_count or 0
     
     @staticmethod
     def validate_username(username):
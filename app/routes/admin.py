@@ -2,11 +2,12 @@
 管理员路由
 Admin Routes
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import login_required
 from sqlalchemy.exc import SQLAlchemyError
 from app import db
 from app.utils.decorators import admin_required
+from app.utils.pagination import paginate_request
 
 # 创建管理员蓝图
 admin_bp = Blueprint('admin', __name__)
@@ -34,14 +35,14 @@ def users():
     实现需求:
     - 5.1: 管理员访问用户管理页面时显示所有用户列表和管理操作
     """
+    from sqlalchemy.orm import joinedload
     from app.models.user import User
     
-    page = request.args.get('page', 1, type=int)
     search = request.args.get('search', '')
     per_page = 20
     
-    # 构建查询
-    query = User.query
+    # 构建查询（随用户一起加载管理员记录，模板逐行判断是否为管理员）
+    query = User.query.options(joinedload(User.admin))
     
     if search:
         query = query.filter(
@@ -52,9 +53,8 @@ def users():
             )
         )
     
-    # 按创建时间倒序排列并分页
-    users_pagination = query.order_by(User.created_at.desc())\
-                           .paginate(page=page, per_page=per_page, error_out=False)
+    # 按创建时间倒序排列并分页（带 cursor 参数时使用键集分页）
+    users_pagination = paginate_request(query, (User.created_at, User.id), per_page)
     
     return render_template('admin/users.html', 
                          users=users_pagination,
@@ -76,8 +76,8 @@ def user_detail(user_id):
     
     # 获取用户统计信息
     article_count = user.articles.count()
-    published_article_count = user.articles.filter_by(status='published').count()
-    comment_count = user.comments.count()
+    published_article_count = user.get_article_count()
+    comment_count = user.get_comment_count()
     
     return render_template('admin/user_detail.html',
                          user=user,
@@ -129,6 +129,8 @@ def delete_user(user_id):
     """
     from app.models.user import User
     from flask_login import current_user
+    from app.services.bulk_delete import BulkDeleter, estimate_user_rows
+    from app.services.jobs import enqueue
     
     user = User.query.get_or_404(user_id)
     
@@ -139,16 +141,37 @@ def delete_user(user_id):
     
     try:
         username = user.username
-        # 删除用户（级联删除相关内容）
-        db.session.delete(user)
-        db.session.commit()
-        flash(f'用户 {username} 及其所有相关内容已删除。', 'success')
+        if estimate_user_rows(user.id) > current_app.config['BULK_DELETE_BACKGROUND_THRESHOLD']:
+            # 内容较多的账号先禁用，再交给后台任务分批删除
+            user.is_active = False
+            db.session.commit()
+            task = enqueue('users.delete', {'user_id': user_id}, idempotency_key=f'delete-user:{user_id}')
+            flash(f'用户 {username} 已禁用，正在后台删除其内容（任务 {task.id}）。', 'info')
+        else:
+            # 按依赖顺序分批删除用户及其所有相关内容
+            removed = BulkDeleter(current_app.config['BULK_DELETE_CHUNK_SIZE']).delete_user(user_id)
+            flash(f'用户 {username} 及其所有相关内容已删除'
+                  f'（文章 {removed.get("articles", 0)} 篇，评论 {removed.get("comments", 0)} 条）。', 'success')
     except SQLAlchemyError as e:
         db.session.rollback()
         flash(f'删除用户失败: {str(e)}', 'error')
     
     return redirect(url_for('admin.users'))
 
+@admin_bp.route('/tasks/<int:task_id>')
+@login_required
+@admin_required
+def job_status(task_id):
+    """
+    查询后台任务的进度
+    """
+    from app.models.job import Job
+    
+    task = db.session.get(Job, task_id)
+    if task is None:
+        return jsonify({'success': False, 'message': '任务不存在'}), 404
+    return jsonify({'success': True, 'task': task.to_dict()})
+
 @admin_bp.route('/users/<int:user_id>/toggle-status', methods=['POST'])
 @login_required
 @admin_required
@@ -192,13 +215,12 @@ def articles():
     """
     from app.models.article import Article
     
-    page = request.args.get('page', 1, type=int)
     status = request.args.get('status', 'all')
     search = request.args.get('search', '')
     per_page = 20
     
-    # 构建查询
-    query = Article.query
+    # 构建查询（列表不加载正文）
+    query = Article.query.options(*Article.list_loader_options())
     
     if status != 'all':
         query = query.filter_by(status=status)
@@ -211,9 +233,8 @@ def articles():
             )
         )
     
-    # 按创建时间倒序排列并分页
-    articles_pagination = query.order_by(Article.created_at.desc())\
-                              .paginate(page=page, per_page=per_page, error_out=False)
+    # 按创建时间倒序排列并分页（带 cursor 参数时使用键集分页）
+    articles_pagination = paginate_request(query, (Article.created_at, Article.id), per_page)
     
     return render_template('admin/articles.html',
                          articles=articles_pagination,
@@ -232,13 +253,14 @@ def delete_article(article_id):
     """
     from app.models.article import Article
     
+    from app.services.bulk_delete import BulkDeleter
+    
     article = Article.query.get_or_404(article_id)
     
     try:
         title = article.title
-        # 删除文章（级联删除相关评论）
-        db.session.delete(article)
-        db.session.commit()
+        # 删除文章及其相关评论
+        BulkDeleter(current_app.config['BULK_DELETE_CHUNK_SIZE']).delete_article(article.id)
         flash(f'文章《{title}》及其所有评论已删除。', 'success')
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -292,15 +314,15 @@ def manage_comments():
     实现需求:
     - 5.4: 管理员管理评论时允许查看、编辑或删除任何评论
     """
+    from sqlalchemy.orm import joinedload
     from app.models.comment import Comment
     
-    page = request.args.get('page', 1, type=int)
     status = request.args.get('status', 'all')
     search = request.args.get('search', '')
     per_page = 20
     
-    # 构建查询
-    query = Comment.query
+    # 构建查询（作者和文章随评论一起加载）
+    query = Comment.query.options(*Comment.list_loader_options(), joinedload(Comment.article))
     
     if status != 'all':
         query = query.filter_by(status=status)
@@ -308,9 +330,8 @@ def manage_comments():
     if search:
         query = query.filter(Comment.content.contains(search))
     
-    # 按创建时间倒序排列并分页
-    comments = query.order_by(Comment.created_at.desc())\
-                   .paginate(page=page, per_page=per_page, error_out=False)
+    # 按创建时间倒序排列并分页（带 cursor 参数时使用键集分页）
+    comments = paginate_request(query, (Comment.created_at, Comment.id), per_page)
     
     return render_template('admin/comments.html', 
                          comments=comments, 
@@ -422,4 +443,48 @@ def edit_comment(comment_id):
             db.session.rollback()
             flash(f'更新评论失败: {str(e)}', 'error')
     
-    return render_template('admin/edit_comment.html', comment=comment)
\ No newline at end of file
+    return render_template('admin/edit_comment.html', comment=comment)
+
+@admin_bp.route('/system/pool')
+@login_required
+@admin_required
+def pool_stats():
+    """
+    当前 worker 进程的数据库连接池指标
+    
+    返回借出/空闲连接数、溢出连接数、累计借出次数以及等待空闲连接的
+    耗时，用于根据 worker 数量调整连接池大小。
+    """
+    from app.services.pool_metrics import get_pool_stats
+    return jsonify(get_pool_stats(db.engine))
+
+@admin_bp.route('/perf')
+@login_required
+@admin_required
+def perf():
+    """
+    当前 worker 进程按端点统计的SQL指标
+    
+    显示每个端点的平均/最大语句数量、数据库耗时占比、最慢的语句以及
+    重复执行的语句形状（N+1），带 format=json 参数时返回JSON。
+    """
+    from app.services.query_metrics import get_query_metrics
+    registry = get_query_metrics()
+    endpoints = registry.snapshot() if registry is not None else []
+    if request.args.get('format') == 'json':
+        return jsonify(endpoints)
+    return render_template('admin/perf.html', endpoints=endpoints,
+                           repeat_threshold=current_app.config.get('SQL_REPEAT_THRESHOLD', 5),
+                           enabled=registry is not None)
+
+@admin_bp.route('/perf/reset', methods=['POST'])
+@login_required
+@admin_required
+def reset_perf():
+    """清空当前 worker 进程的SQL统计"""
+    from app.services.query_metrics import get_query_metrics
+    registry = get_query_metrics()
+    if registry is not None:
+        registry.reset()
+    flash('SQL统计已清空', 'success')
+    return redirect(url_for('admin.perf'))
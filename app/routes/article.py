@@ -2,19 +2,26 @@
 文章管理路由
 Article Management Routes
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, jsonify, current_app
 from flask_login import login_required, current_user
 from sqlalchemy.exc import SQLAlchemyError
 from app import db
 from app.models.article import Article
-from app.models.category import Category
+from app.services.categories import get_categories, get_category
 from app.forms.article import ArticleForm, ArticleSearchForm, ArticleDeleteForm
-from app.utils.decorators import active_user_required
+from app.services.view_counter import view_counter
+from app.services.comment_tree import build_comment_tree
+from app.services.search import search_articles
+from app.services.page_cache import page_cache
+from app.services.bulk_delete import BulkDeleter
+from app.utils.decorators import active_user_required, use_primary
+from app.utils.pagination import paginate_request
 
 # 创建文章蓝图
 article_bp = Blueprint('article', __name__)
 
 @article_bp.route('/articles')
+@page_cache.cached('lists')
 def list_articles():
     """
     文章列表页面
@@ -31,36 +38,30 @@ def list_articles():
     keyword = request.args.get('keyword', '').strip()
     category_id = request.args.get('category_id', 0, type=int)
     
-    # 构建查询
-    query = Article.query.filter_by(status='published')
+    # 分类从注册表读取，供侧边栏、搜索表单和当前分类共用
+    categories = get_categories()
+    current_category = get_category(category_id) if category_id > 0 else None
     
-    # 应用搜索条件
     if keyword:
-        from sqlalchemy import or_
-        search_filter = or_(
-            Article.title.contains(keyword),
-            Article.content.contains(keyword),
-            Article.summary.contains(keyword)
-        )
-        query = query.filter(search_filter)
-    
-    if category_id > 0:
-        query = query.filter_by(category_id=category_id)
-    
-    # 按发布时间排序并分页
-    articles = query.order_by(Article.published_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+        # 使用全文索引搜索，按相关度排序并分页
+        articles = search_articles(keyword,
+                                   category_id=category_id if category_id > 0 else None,
+                                   page=page, per_page=per_page)
+    else:
+        # 构建查询（作者和分类随文章一起加载）
+        query = Article.query.options(*Article.list_loader_options()).filter_by(status='published')
+        
+        if category_id > 0:
+            query = query.filter_by(category_id=category_id)
+        
+        # 按发布时间排序并分页（带 cursor 参数时使用键集分页）
+        articles = paginate_request(query, (Article.published_at, Article.id), per_page)
     
     # 获取搜索表单
-    search_form = ArticleSearchForm()
+    search_form = ArticleSearchForm(categories=categories)
     search_form.keyword.data = keyword
     search_form.category_id.data = category_id
     
-    # 获取分类信息
-    categories = Category.query.all()
-    current_category = Category.query.get(category_id) if category_id > 0 else None
-    
     return render_template('article/list.html', 
                          articles=articles, 
                          search_form=search_form,
@@ -68,7 +69,12 @@ def list_articles():
                          current_category=current_category,
                          keyword=keyword)
 
+def _record_cached_view(id):
+    """命中页面缓存时仍然记录浏览次数"""
+    view_counter.record(id)
+
 @article_bp.route('/articles/<int:id>')
+@page_cache.cached(lambda id: f'article:{id}', on_hit=_record_cached_view)
 def article_detail(id):
     """
     文章详情页面
@@ -76,23 +82,21 @@ def article_detail(id):
     实现需求:
     - 6.5: 用户点击文章标题时显示完整的文章内容和评论
     """
-    article = Article.query.get_or_404(id)
+    article = Article.query.options(*Article.detail_loader_options()).filter_by(id=id).first_or_404()
     
     # 只显示已发布的文章，除非是作者或管理员
     if article.status != 'published':
         if not current_user.is_authenticated or not article.can_edit(current_user):
             abort(404)
     
-    # 增加浏览次数
+    # 增加浏览次数（缓冲后批量写回）
+    view_count = article.view_count
     if article.status == 'published':
-        try:
-            article.increment_view_count()
-            db.session.commit()
-        except SQLAlchemyError:
-            db.session.rollback()
+        view_counter.record(article.id)
+        view_count += view_counter.get_pending(article.id)
     
-    # 获取评论
-    comments = article.get_approved_comments().all()
+    # 获取评论树（一次查询加载全部已审核评论及作者）
+    comment_tree = build_comment_tree(article.id, current_user)
     
     # 创建评论表单
     from app.forms.comment import CommentForm
@@ -100,10 +104,12 @@ def article_detail(id):
     
     return render_template('article/detail.html', 
                          article=article, 
-                         comments=comments,
-                         comment_form=comment_form)
+                         comment_tree=comment_tree,
+                         comment_form=comment_form,
+                         view_count=view_count)
 
 @article_bp.route('/articles/create', methods=['GET', 'POST'])
+@use_primary
 @active_user_required
 def create_article():
     """
@@ -146,6 +152,7 @@ def create_article():
     return render_template('article/create.html', form=form)
 
 @article_bp.route('/articles/<int:id>/edit', methods=['GET', 'POST'])
+@use_primary
 @active_user_required
 def edit_article(id):
     """
@@ -154,7 +161,7 @@ def edit_article(id):
     实现需求:
     - 3.4: 用户编辑自己的文章时更新文章内容并保留修改时间
     """
-    article = Article.query.get_or_404(id)
+    article = Article.query.options(*Article.detail_loader_options()).filter_by(id=id).first_or_404()
     
     # 检查权限
     if not article.can_edit(current_user):
@@ -185,10 +192,6 @@ def edit_article(id):
                 else:
                     article.status = new_status
             
-            # 重新生成摘要（如果没有手动设置）
-            if not article.summary:
-                article.generate_summary()
-            
             db.session.commit()
             flash('文章更新成功！', 'success')
             return redirect(url_for('article.article_detail', id=article.id))
@@ -219,9 +222,8 @@ def delete_article(id):
     
     if form.validate_on_submit():
         try:
-            # 删除文章（级联删除评论）
-            db.session.delete(article)
-            db.session.commit()
+            # 删除文章及其评论
+            BulkDeleter(current_app.config['BULK_DELETE_CHUNK_SIZE']).delete_article(article.id)
             
             flash('文章删除成功！', 'success')
             return redirect(url_for('article.list_articles'))
@@ -243,12 +245,11 @@ def my_articles():
     实现需求:
     - 7.4: 用户查看自己的文章时显示该用户发布的所有文章列表
     """
-    page = request.args.get('page', 1, type=int)
     per_page = 10
     
-    articles = Article.query.filter_by(author_id=current_user.id)\
-                          .order_by(Article.created_at.desc())\
-                          .paginate(page=page, per_page=per_page, error_out=False)
+    articles = paginate_request(Article.query.options(*Article.list_loader_options())
+                                .filter_by(author_id=current_user.id),
+                                (Article.created_at, Article.id), per_page)
     
     return render_template('article/my_articles.html', articles=articles)
 
@@ -7,6 +7,7 @@ from flask_login import login_user, logout_user, login_required, current_user
 from app import db
 from app.models.user import User
 from app.forms.auth import RegistrationForm, LoginForm
+from app.services.metrics import count
 
 # 创建认证蓝图
 auth_bp = Blueprint('auth', __name__)
@@ -81,11 +82,13 @@ def login():
         if user and user.check_password(form.password.data):
             # 检查用户是否激活
             if not user.is_active:
+                count('auth_login_attempts_total', result='inactive')
                 flash('您的账号已被禁用，请联系管理员。', 'error')
                 return render_template('auth/login.html', form=form)
             
             # 登录用户
             login_user(user, remember=form.remember_me.data)
+            count('auth_login_attempts_total', result='success')
             flash(f'欢迎回来，{user.get_display_name()}！', 'success')
             
             # 重定向到用户想要访问的页面或首页
@@ -94,6 +97,7 @@ def login():
                 return redirect(next_page)
             return redirect(url_for('main.index'))
         else:
+            count('auth_login_attempts_total', result='failure')
             flash('用户名或密码错误。', 'error')
     
     return render_template('auth/login.html', form=form)
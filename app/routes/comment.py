@@ -2,14 +2,17 @@
 评论管理路由
 Comment Management Routes
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, jsonify, Response, stream_with_context
 from flask_login import login_required, current_user
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
 from app import db
-from app.models.comment import Comment
+from app.models.comment import Comment, CommentDepthError
 from app.models.article import Article
 from app.forms.comment import CommentForm, CommentReplyForm, CommentDeleteForm, CommentModerationForm
-from app.utils.decorators import active_user_required, admin_required
+from app.utils.decorators import active_user_required, admin_required, use_replica
+from app.utils.pagination import paginate_request
+from app.services.comment_json import comment_rows_query, stream_comment, stream_comment_page
 
 # 创建评论蓝图
 comment_bp = Blueprint('comment', __name__)
@@ -42,6 +45,13 @@ def create_comment(article_id):
                 flash(error_msg, 'error')
                 return redirect(url_for('article.article_detail', id=article_id))
             
+            # 验证回复层级
+            parent = db.session.get(Comment, form.parent_id.data) if form.parent_id.data else None
+            is_valid, error_msg = Comment.validate_parent(parent)
+            if not is_valid:
+                flash(error_msg, 'error')
+                return redirect(url_for('article.article_detail', id=article_id))
+            
             # 创建评论对象
             comment = Comment(
                 content=form.content.data.strip(),
@@ -58,6 +68,9 @@ def create_comment(article_id):
             flash('评论发表成功！', 'success')
             return redirect(url_for('article.article_detail', id=article_id) + f'#comment-{comment.id}')
             
+        except CommentDepthError as e:
+            db.session.rollback()
+            flash(str(e), 'error')
         except SQLAlchemyError as e:
             db.session.rollback()
             flash('发表评论时发生错误，请重试。', 'error')
@@ -97,6 +110,12 @@ def reply_comment(comment_id):
                 flash(error_msg, 'error')
                 return redirect(url_for('article.article_detail', id=article.id))
             
+            # 验证回复层级
+            is_valid, error_msg = Comment.validate_parent(parent_comment)
+            if not is_valid:
+                flash(error_msg, 'error')
+                return redirect(url_for('article.article_detail', id=article.id))
+            
             # 创建回复评论
             reply = Comment(
                 content=form.content.data.strip(),
@@ -113,6 +132,9 @@ def reply_comment(comment_id):
             flash('回复发表成功！', 'success')
             return redirect(url_for('article.article_detail', id=article.id) + f'#comment-{reply.id}')
             
+        except CommentDepthError as e:
+            db.session.rollback()
+            flash(str(e), 'error')
         except SQLAlchemyError as e:
             db.session.rollback()
             flash('发表回复时发生错误，请重试。', 'error')
@@ -245,31 +267,37 @@ def my_comments():
     实现需求:
     - 7.5: 用户查看自己的评论时显示该用户发表的所有评论列表
     """
-    page = request.args.get('page', 1, type=int)
     per_page = 20
     
-    comments = Comment.get_user_comments(current_user.id)\
-                     .paginate(page=page, per_page=per_page, error_out=False)
+    comments = paginate_request(Comment.query.options(*Comment.list_loader_options(with_author=False),
+                                                      joinedload(Comment.article))
+                                .filter_by(author_id=current_user.id),
+                                (Comment.created_at, Comment.id), per_page)
     
     return render_template('comment/my_comments.html', comments=comments)
 
 @comment_bp.route('/api/comments/<int:comment_id>')
+@use_replica
 def get_comment_api(comment_id):
     """
-    获取评论信息API
+    获取评论信息API（按列取数并流式输出）
     """
-    comment = Comment.query.get_or_404(comment_id)
+    row = comment_rows_query().filter(Comment.id == comment_id).first()
     
     # 只返回已审核的评论信息
-    if not comment.is_approved():
+    if row is None or row.status != 'approved':
         abort(404)
     
-    return jsonify(comment.to_dict(include_replies=True))
+    return Response(stream_with_context(stream_comment(row)), mimetype='application/json')
 
 @comment_bp.route('/api/articles/<int:article_id>/comments')
+@use_replica
 def get_article_comments_api(article_id):
     """
     获取文章评论API
+    
+    评论、作者名称和回复数量按列批量查询，回复按父评论顺序流式读取，
+    响应以生成器逐条输出，每个请求的查询数量固定。
     """
     article = Article.query.get_or_404(article_id)
     
@@ -277,17 +305,22 @@ def get_article_comments_api(article_id):
     if article.status != 'published':
         abort(404)
     
-    page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    if per_page < 1:
+        per_page = 20
     include_replies = request.args.get('include_replies', 'true').lower() == 'true'
     
-    # 获取顶级评论
-    comments_query = Comment.get_article_comments(article_id, status='approved', include_replies=False)
-    comments = comments_query.paginate(page=page, per_page=per_page, error_out=False)
+    # 获取顶级评论（带 cursor 参数时使用键集分页）
+    comments_query = comment_rows_query().filter(Comment.article_id == article_id,
+                                                 Comment.status == 'approved',
+                                                 Comment.parent_id.is_(None))
+    comments = paginate_request(comments_query, (Comment.created_at, Comment.id), per_page,
+                                descending=False)
     
-    result = {
-        'comments': [comment.to_dict(include_replies=include_replies) for comment in comments.items],
-        'pagination': {
+    if getattr(comments, 'is_keyset', False):
+        pagination = comments.to_dict()
+    else:
+        pagination = {
             'page': comments.page,
             'pages': comments.pages,
             'per_page': comments.per_page,
@@ -295,6 +328,6 @@ def get_article_comments_api(article_id):
             'has_next': comments.has_next,
             'has_prev': comments.has_prev
         }
-    }
     
-    return jsonify(result)
\ No newline at end of file
+    return Response(stream_with_context(stream_comment_page(comments.items, pagination, include_replies)),
+                    mimetype='application/json')
\ No newline at end of file
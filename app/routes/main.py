@@ -6,12 +6,15 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from sqlalchemy.exc import SQLAlchemyError
 from app import db
-from app.utils.decorators import active_user_required
+from app.utils.decorators import active_user_required, use_replica
+from app.services.page_cache import page_cache
 
 # 创建主页面蓝图
 main_bp = Blueprint('main', __name__)
 
 @main_bp.route('/')
+@use_replica
+@page_cache.cached('lists')
 def index():
     """
     首页
@@ -36,9 +39,9 @@ def profile():
     """
     # 获取用户统计信息
     article_count = current_user.articles.count()
-    published_article_count = current_user.articles.filter_by(status='published').count()
+    published_article_count = current_user.get_article_count()
     draft_article_count = current_user.articles.filter_by(status='draft').count()
-    comment_count = current_user.comments.count()
+    comment_count = current_user.get_comment_count()
     
     return render_template('main/profile.html',
                          article_count=article_count,
@@ -0,0 +1,246 @@
+"""
+批量级联删除服务
+Bulk Cascade Delete Service
+
+删除用户或文章时不再通过 ORM 级联把所有文章、评论和回复加载到内存中
+逐行删除，而是按依赖顺序执行基于集合的 DELETE 语句:
+
+1. 评论（包括被删除评论下其他用户的回复）: 按深度从深到浅删除，回复
+   总是先于其父评论删除，不修改任何评论的父引用
+2. 文章: 同时删除全文索引
+3. 管理员记录和用户
+
+每批处理 chunk_size 行并单独提交，冗余计数在同一事务内调整；中途失败
+时剩余评论的祖先都还在，重新执行会找到同样的剩余数据并继续删除。由于
+绕过了 ORM 事件，完成后会显式使页面缓存和登录身份缓存失效。
+"""
+from collections import Counter
+from flask import current_app
+from sqlalchemy import delete, func, or_, select
+from app import db
+from app.models.user import User
+from app.models.admin import Admin
+from app.models.category import Category
+from app.models.article import Article
+from app.models.comment import Comment
+from app.models.search import SearchDocument, SearchPosting
+from app.models.counters import adjust_counters
+from app.services.jobs import job, report_progress
+
+
+def _chunks(ids, size):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+class BulkDeleter:
+    """
+    分批执行级联删除
+
+    Args:
+        chunk_size (int): 每个事务删除的最大行数
+        progress (callable): 进度回调，参数为 (阶段, 已完成数, 总数)
+    """
+
+    def __init__(self, chunk_size=500, progress=None):
+        self.chunk_size = max(int(chunk_size), 1)
+        self.progress = progress
+        self.removed = Counter()
+
+    def _report(self, phase, done, total):
+        if self.progress is not None:
+            self.progress(phase, done, total)
+
+    def _scalars(self, statement):
+        return list(db.session.execute(statement).scalars())
+
+    def _comment_closure(self, condition):
+        """
+        查找满足条件的评论及其全部后代回复
+
+        Args:
+            condition: 评论筛选条件
+
+        Returns:
+            list: 评论ID，按深度从深到浅、同一深度内按ID排序
+        """
+        comments = Comment.__table__
+        depths = dict(db.session.execute(select(comments.c.id, comments.c.depth).where(condition)).all())
+        frontier = list(depths)
+        while frontier:
+            children = {}
+            for chunk in _chunks(frontier, self.chunk_size):
+                children.update(db.session.execute(
+                    select(comments.c.id, comments.c.depth).where(comments.c.parent_id.in_(chunk))
+                ).all())
+            frontier = [comment_id for comment_id in children if comment_id not in depths]
+            depths.update(children)
+        return sorted(depths, key=lambda comment_id: (-depths[comment_id], comment_id))
+
+    def _delete_comments(self, comment_ids):
+        """
+        按 _comment_closure 的顺序分批删除评论
+
+        同一批内按深度分别执行 DELETE，先删除更深的回复，逐行检查外键的
+        数据库（MySQL）也不会因父评论先被删除而失败。
+        """
+        comments = Comment.__table__
+        total = len(comment_ids)
+        done = 0
+        for chunk in _chunks(comment_ids, self.chunk_size):
+            connection = db.session.connection()
+            article_deltas = Counter()
+            author_deltas = Counter()
+            for article_id, author_id, count in connection.execute(
+                select(comments.c.article_id, comments.c.author_id, func.count())
+                .where(comments.c.id.in_(chunk))
+                .group_by(comments.c.article_id, comments.c.author_id)
+            ):
+                article_deltas[article_id] -= count
+                author_deltas[author_id] -= count
+            adjust_counters(connection, Article, 'comment_count', article_deltas)
+            adjust_counters(connection, User, 'comment_count', author_deltas)
+
+            levels = {}
+            for comment_id, depth in connection.execute(
+                select(comments.c.id, comments.c.depth).where(comments.c.id.in_(chunk))
+            ):
+                levels.setdefault(depth, []).append(comment_id)
+            for depth in sorted(levels, reverse=True):
+                self.removed['comments'] += connection.execute(
+                    delete(comments).where(comments.c.id.in_(levels[depth]))
+                ).rowcount
+            db.session.commit()
+
+            done += len(chunk)
+            self._report('comments', done, total)
+
+    def _delete_articles(self, article_ids):
+        articles = Article.__table__
+        postings = SearchPosting.__table__
+        documents = SearchDocument.__table__
+        total = len(article_ids)
+        done = 0
+        for chunk in _chunks(article_ids, self.chunk_size):
+            connection = db.session.connection()
+            category_deltas = Counter()
+            author_deltas = Counter()
+            for category_id, author_id, count in connection.execute(
+                select(articles.c.category_id, articles.c.author_id, func.count())
+                .where(articles.c.id.in_(chunk), articles.c.status == 'published')
+                .group_by(articles.c.category_id, articles.c.author_id)
+            ):
+                category_deltas[category_id] -= count
+                author_deltas[author_id] -= count
+            adjust_counters(connection, Category, 'published_article_count', category_deltas)
+            adjust_counters(connection, User, 'published_article_count', author_deltas)
+
+            self.removed['search_postings'] += connection.execute(
+                delete(postings).where(postings.c.article_id.in_(chunk))
+            ).rowcount
+            connection.execute(delete(documents).where(documents.c.article_id.in_(chunk)))
+            self.removed['articles'] += connection.execute(
+                delete(articles).where(articles.c.id.in_(chunk))
+            ).rowcount
+            db.session.commit()
+
+            done += len(chunk)
+            self._report('articles', done, total)
+
+    def _finish(self, user_ids=()):
+        from app.services.page_cache import page_cache
+        from app.services.identity import invalidate_identity
+
+        db.session.expire_all()
+        page_cache.invalidate('site')
+        if user_ids:
+            invalidate_identity(*user_ids)
+        return dict(self.removed)
+
+    def delete_article(self, article_id):
+        """
+        删除文章及其全部评论
+
+        Args:
+            article_id (int): 文章ID
+
+        Returns:
+            dict: 每张表删除的行数
+        """
+        comments = Comment.__table__
+        self._delete_comments(self._comment_closure(comments.c.article_id == article_id))
+        self._delete_articles([article_id])
+        return self._finish()
+
+    def delete_user(self, user_id):
+        """
+        删除用户及其全部文章、评论（含其他用户对这些评论的回复）
+
+        Args:
+            user_id (int): 用户ID
+
+        Returns:
+            dict: 每张表删除的行数
+        """
+        comments = Comment.__table__
+        articles = Article.__table__
+        article_ids = self._scalars(
+            select(articles.c.id).where(articles.c.author_id == user_id).order_by(articles.c.id)
+        )
+        own_articles = select(articles.c.id).where(articles.c.author_id == user_id)
+
+        self._delete_comments(self._comment_closure(
+            or_(comments.c.author_id == user_id, comments.c.article_id.in_(own_articles))
+        ))
+        self._delete_articles(article_ids)
+
+        connection = db.session.connection()
+        connection.execute(delete(Admin.__table__).where(Admin.__table__.c.user_id == user_id))
+        self.removed['users'] += connection.execute(
+            delete(User.__table__).where(User.__table__.c.id == user_id)
+        ).rowcount
+        db.session.commit()
+        self._report('user', 1, 1)
+        return self._finish(user_ids=(user_id,))
+
+
+def estimate_user_rows(user_id):
+    """
+    估算删除用户需要删除的行数（文章数 + 评论数）
+
+    Args:
+        user_id (int): 用户ID
+
+    Returns:
+        int: 估算行数
+    """
+    articles = Article.__table__
+    comments = Comment.__table__
+    own_articles = select(articles.c.id).where(articles.c.author_id == user_id)
+    article_count = db.session.execute(
+        select(func.count()).select_from(articles).where(articles.c.author_id == user_id)
+    ).scalar()
+    comment_count = db.session.execute(
+        select(func.count()).select_from(comments)
+        .where(or_(comments.c.author_id == user_id, comments.c.article_id.in_(own_articles)))
+    ).scalar()
+    return article_count + comment_count
+
+
+@job('users.delete', max_attempts=3, concurrency=1)
+def delete_user_job(user_id, chunk_size=None):
+    """
+    后台任务: 分批删除用户（中途失败重试时从剩余数据继续删除）
+
+    Args:
+        user_id (int): 用户ID
+        chunk_size (int): 每批行数，默认读取 BULK_DELETE_CHUNK_SIZE
+
+    Returns:
+        dict: 每张表删除的行数
+    """
+    def progress(phase, done, total):
+        report_progress(phase=phase, done=done, total=total)
+
+    chunk_size = chunk_size or current_app.config.get('BULK_DELETE_CHUNK_SIZE', 500)
+    return BulkDeleter(chunk_size, progress).delete_user(user_id)
@@ -0,0 +1,258 @@
+"""
+分类注册表服务
+Category Registry Service
+
+分类很少变更，但文章表单、搜索表单、分类校验和列表页侧边栏每次请求
+都要读取。注册表在进程内缓存全部分类（按ID和slug建立索引），表单、
+校验和侧边栏都从注册表读取:
+
+- 分类新增、修改、删除时在同一事务内递增 cache_versions 表中的版本号，
+  提交后本进程的注册表立即失效
+- 其他 worker 每隔 CATEGORY_REGISTRY_CHECK_INTERVAL 秒读取一次版本号，
+  发现变化时重新加载
+- 侧边栏显示的文章数量由计数事件频繁更新，不递增版本号，注册表最多
+  CATEGORY_REGISTRY_MAX_AGE 秒后重新加载
+"""
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models.category import Category
+from app.models.cache_version import CacheVersion
+
+# cache_versions 表中的版本名
+VERSION_NAME = 'categories'
+
+
+class CategoryEntry:
+    """
+    分类快照（只读，与数据库会话无关）
+    """
+    __slots__ = ('id', 'name', 'slug', 'description', 'published_article_count')
+
+    def __init__(self, id, name, slug, description=None, published_article_count=0):
+        self.id = id
+        self.name = name
+        self.slug = slug
+        self.description = description
+        self.published_article_count = published_article_count
+
+    def get_article_count(self):
+        """
+        获取分类下已发布的文章数量
+
+        Returns:
+            int: 文章数量
+        """
+        return self.published_article_count or 0
+
+    def __repr__(self):
+        return f'<CategoryEntry {self.name}>'
+
+
+class _Snapshot:
+    """一次加载得到的全部分类"""
+
+    def __init__(self, version, entries):
+        self.version = version
+        self.entries = tuple(entries)
+        self.by_id = {entry.id: entry for entry in self.entries}
+        self.by_slug = {entry.slug: entry for entry in self.entries}
+        self.loaded_at = time.time()
+        self.checked_at = self.loaded_at
+
+
+def _read_version():
+    table = CacheVersion.__table__
+    return db.session.execute(
+        select(table.c.version).where(table.c.name == VERSION_NAME)
+    ).scalar() or 0
+
+
+def _load_entries():
+    table = Category.__table__
+    rows = db.session.execute(
+        select(table.c.id, table.c.name, table.c.slug, table.c.description,
+               table.c.published_article_count)
+        .order_by(table.c.id)
+    ).all()
+    return [CategoryEntry(*row) for row in rows]
+
+
+class CategoryRegistry:
+    """
+    进程内分类注册表
+
+    Args:
+        check_interval (float): 读取版本号的最小间隔秒数
+        max_age (float): 快照的最长使用时间（秒），用于刷新文章数量
+    """
+
+    def __init__(self, check_interval=5, max_age=60):
+        self.check_interval = float(check_interval)
+        self.max_age = float(max_age)
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def invalidate(self):
+        """丢弃当前快照，下次读取时重新加载"""
+        self._snapshot = None
+
+    def _current(self):
+        snapshot = self._snapshot
+        now = time.time()
+        if snapshot is not None and now - snapshot.loaded_at < self.max_age:
+            if now - snapshot.checked_at < self.check_interval:
+                return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and now - snapshot.loaded_at < self.max_age:
+                if now - snapshot.checked_at < self.check_interval:
+                    return snapshot
+                version = _read_version()
+                if version == snapshot.version:
+                    snapshot.checked_at = now
+                    return snapshot
+            else:
+                version = _read_version()
+
+            snapshot = _Snapshot(version, _load_entries())
+            self._snapshot = snapshot
+            self.loads += 1
+            return snapshot
+
+    def all(self):
+        """
+        获取全部分类
+
+        Returns:
+            tuple: CategoryEntry 列表（按ID排序）
+        """
+        return self._current().entries
+
+    def get(self, category_id):
+        """
+        按ID获取分类
+
+        Args:
+            category_id (int): 分类ID
+
+        Returns:
+            CategoryEntry: 分类，不存在时返回None
+        """
+        return self._current().by_id.get(category_id)
+
+    def get_by_slug(self, slug):
+        """
+        按slug获取分类
+
+        Args:
+            slug (str): slug
+
+        Returns:
+            CategoryEntry: 分类，不存在时返回None
+        """
+        return self._current().by_slug.get(slug)
+
+
+def init_category_registry(app):
+    """
+    根据配置创建分类注册表
+
+    Args:
+        app: Flask应用实例
+    """
+    app.extensions['category_registry'] = CategoryRegistry(
+        check_interval=app.config.get('CATEGORY_REGISTRY_CHECK_INTERVAL', 5),
+        max_age=app.config.get('CATEGORY_REGISTRY_MAX_AGE', 60)
+    )
+
+
+def get_registry():
+    """
+    获取当前应用的分类注册表
+
+    Returns:
+        CategoryRegistry: 注册表
+    """
+    return current_app.extensions['category_registry']
+
+
+def get_categories():
+    """
+    获取全部分类
+
+    Returns:
+        tuple: CategoryEntry 列表
+    """
+    return get_registry().all()
+
+
+def get_category(category_id):
+    """
+    按ID获取分类
+
+    Args:
+        category_id (int): 分类ID
+
+    Returns:
+        CategoryEntry: 分类，不存在时返回None
+    """
+    return get_registry().get(category_id)
+
+
+def get_category_by_slug(slug):
+    """
+    按slug获取分类
+
+    Args:
+        slug (str): slug
+
+    Returns:
+        CategoryEntry: 分类，不存在时返回None
+    """
+    return get_registry().get_by_slug(slug)
+
+
+def bump_version(connection):
+    """
+    递增分类版本号
+
+    Args:
+        connection: 数据库连接（与分类变更处于同一事务）
+    """
+    table = CacheVersion.__table__
+    updated = connection.execute(
+        update(table).where(table.c.name == VERSION_NAME).values(version=table.c.version + 1)
+    ).rowcount
+    if not updated:
+        connection.execute(insert(table).values(name=VERSION_NAME, version=1))
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_on_change(session_, flush_context):
+    """分类变更时在同一事务内递增版本号"""
+    if session_.info.get('categories_changed'):
+        return
+    changed = any(isinstance(obj, Category)
+                  for obj in list(session_.new) + list(session_.dirty) + list(session_.deleted))
+    if changed:
+        bump_version(session_.connection())
+        session_.info['categories_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_registry(session_):
+    if session_.info.pop('categories_changed', None) and has_app_context():
+        registry = current_app.extensions.get('category_registry')
+        if registry is not None:
+            registry.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_change(session_):
+    session_.info.pop('categories_changed', None)
@@ -0,0 +1,159 @@
+"""
+评论JSON流式序列化服务
+Streaming Comment JSON Serializer
+
+评论接口不再对每条评论调用 ``to_dict()``（逐条懒加载作者、文章、
+回复数量并递归序列化回复），而是:
+- 用一条查询按列取出评论、作者名称、文章标题和已审核回复数量
+- 用另一条按父评论顺序排列的查询流式取出全部回复
+- 逐条编码并通过生成器输出JSON，内存占用与单条评论大小相关
+
+输出字段与 ``Comment.to_dict()`` 保持一致。
+"""
+import json
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+from app import db
+from app.models.user import User
+from app.models.article import Article
+from app.models.comment import Comment
+
+# 紧凑编码，中文不转义
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+# 回复流式读取的批量大小
+REPLY_BATCH_SIZE = 200
+
+
+def _reply_count_column():
+    child = aliased(Comment)
+    return select(func.count(child.id))\
+        .where(child.parent_id == Comment.id, child.status == 'approved')\
+        .correlate(Comment)\
+        .scalar_subquery()\
+        .label('reply_count')
+
+
+def comment_rows_query():
+    """
+    构建按列取评论数据的查询（作者、文章标题和回复数量一并取出）
+
+    Returns:
+        Query: 返回行（Row）的查询对象
+    """
+    return db.session.query(
+        Comment.id, Comment.content, Comment.author_id, Comment.article_id,
+        Comment.parent_id, Comment.status, Comment.depth,
+        Comment.created_at, Comment.updated_at,
+        User.nickname.label('author_nickname'), User.username.label('author_username'),
+        Article.title.label('article_title'),
+        _reply_count_column()
+    ).outerjoin(User, User.id == Comment.author_id)\
+     .outerjoin(Article, Article.id == Comment.article_id)
+
+
+def row_to_dict(row):
+    """
+    将评论行转换为字典（字段与 Comment.to_dict() 一致）
+
+    Args:
+        row: comment_rows_query() 返回的行
+
+    Returns:
+        dict: 评论信息字典
+    """
+    return {
+        'id': row.id,
+        'content': row.content,
+        'author_id': row.author_id,
+        'author_name': row.author_nickname or row.author_username,
+        'article_id': row.article_id,
+        'article_title': row.article_title,
+        'parent_id': row.parent_id,
+        'status': row.status,
+        'depth': row.depth,
+        'reply_count': row.reply_count,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'updated_at': row.updated_at.isoformat() if row.updated_at else None
+    }
+
+
+def _replies_query(parent_ids):
+    """按父评论顺序流式读取已审核回复"""
+    parent = aliased(Comment)
+    return comment_rows_query()\
+        .join(parent, parent.id == Comment.parent_id)\
+        .filter(Comment.parent_id.in_(parent_ids), Comment.status == 'approved')\
+        .order_by(parent.created_at.asc(), parent.id.asc(), Comment.created_at.asc(), Comment.id.asc())\
+        .execution_options(yield_per=REPLY_BATCH_SIZE)
+
+
+def _encode_comment(row, replies=None):
+    """
+    编码一条评论；replies 不为None时输出 replies 数组
+
+    Yields:
+        str: JSON片段
+    """
+    encoded = _encoder.encode(row_to_dict(row))
+    if replies is None:
+        yield encoded
+        return
+
+    yield encoded[:-1] + ',"replies":['
+    for index, reply in enumerate(replies):
+        yield ('' if index == 0 else ',') + _encoder.encode(row_to_dict(reply))
+    yield ']}'
+
+
+def _group_replies(rows, replies):
+    """按评论顺序依次取出各评论的回复（回复已按父评论顺序排列）"""
+    replies = iter(replies)
+    pending = next(replies, None)
+    for row in rows:
+        def own_replies(parent_id=row.id):
+            nonlocal pending
+            while pending is not None and pending.parent_id == parent_id:
+                yield pending
+                pending = next(replies, None)
+        yield row, own_replies()
+
+
+def stream_comment_page(rows, pagination, include_replies=True):
+    """
+    流式输出一页评论
+
+    Args:
+        rows (list): 当前页的评论行（comment_rows_query() 的结果）
+        pagination (dict): 分页信息
+        include_replies (bool): 是否包含已审核的直接回复
+
+    Yields:
+        str: JSON片段，拼接后为 {"comments": [...], "pagination": {...}}
+    """
+    yield '{"comments":['
+    if include_replies and rows:
+        grouped = _group_replies(rows, _replies_query([row.id for row in rows]))
+    else:
+        grouped = ((row, None) for row in rows)
+
+    for index, (row, replies) in enumerate(grouped):
+        if index:
+            yield ','
+        yield from _encode_comment(row, replies)
+    yield '],"pagination":' + _encoder.encode(pagination) + '}'
+
+
+def stream_comment(row, include_replies=True):
+    """
+    流式输出单条评论
+
+    Args:
+        row: 评论行
+        include_replies (bool): 是否包含已审核的直接回复
+
+    Yields:
+        str: JSON片段
+    """
+    replies = _replies_query([row.id]) if include_replies else None
+    yield from _encode_comment(row, replies)
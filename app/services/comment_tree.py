@@ -0,0 +1,170 @@
+"""
+评论树构建服务
+Comment Tree Assembly Service
+"""
+from sqlalchemy import bindparam, or_, select
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models.comment import Comment, path_segment
+
+
+class CommentNode:
+    """
+    评论树节点
+
+    包装一条评论及其已审核的直接回复，层级深度、回复数量、
+    被回复者名称和删除权限均在构建时预先计算，模板渲染时不再触发查询。
+    """
+
+    def __init__(self, comment):
+        """
+        初始化评论节点
+
+        Args:
+            comment (Comment): 评论对象（作者已预加载）
+        """
+        self.comment = comment
+        self.children = []
+        self.depth = 0
+        self.parent_author_name = None
+        self.can_delete = False
+
+    @property
+    def reply_count(self):
+        """
+        已审核的直接回复数量
+
+        Returns:
+            int: 回复数量
+        """
+        return len(self.children)
+
+    def __repr__(self):
+        return f'<CommentNode {self.comment.id} depth={self.depth}>'
+
+
+class CommentTree:
+    """
+    文章评论树
+
+    迭代时返回顶级评论节点，``len()`` 返回树中全部评论数量。
+    """
+
+    def __init__(self, roots, nodes):
+        self.roots = roots
+        self.nodes = nodes
+
+    def __iter__(self):
+        return iter(self.roots)
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+def build_comment_tree(article_id, viewer=None):
+    """
+    构建文章的已审核评论树
+
+    一次查询取出文章全部已审核评论并连接加载作者，然后在内存中以 O(n)
+    建立父子关系。父评论未审核通过的回复不会出现在树中。
+
+    Args:
+        article_id (int): 文章ID
+        viewer: 当前访问用户（用于预先计算删除权限），可为匿名用户或None
+
+    Returns:
+        CommentTree: 评论树
+    """
+    comments = Comment.query.options(*Comment.list_loader_options())\
+                            .filter_by(article_id=article_id, status='approved')\
+                            .order_by(Comment.created_at.asc(), Comment.id.asc())\
+                            .all()
+
+    # 只计算一次当前用户身份，避免每条评论都重新加载管理员关系
+    viewer_id = None
+    viewer_is_admin = False
+    if viewer is not None and getattr(viewer, 'is_authenticated', False):
+        viewer_id = viewer.id
+        viewer_is_admin = viewer.is_admin()
+
+    nodes = {}
+    for comment in comments:
+        node = CommentNode(comment)
+        node.can_delete = viewer_is_admin or (viewer_id is not None and comment.author_id == viewer_id)
+        nodes[comment.id] = node
+
+    roots = []
+    for node in nodes.values():
+        parent_id = node.comment.parent_id
+        if parent_id is None:
+            roots.append(node)
+        elif parent_id in nodes:
+            parent = nodes[parent_id]
+            parent.children.append(node)
+            node.parent_author_name = parent.comment.author.get_display_name()
+
+    # 自顶向下计算层级深度，只保留可从顶级评论到达的节点
+    reachable = []
+    stack = list(reversed(roots))
+    while stack:
+        node = stack.pop()
+        reachable.append(node)
+        for child in reversed(node.children):
+            child.depth = node.depth + 1
+            stack.append(child)
+
+    return CommentTree(roots, reachable)
+
+
+def backfill_comment_paths(batch_size=1000, rebuild=False):
+    """
+    回填评论的物化路径和深度
+
+    按层处理：每轮取出路径为空、且为顶级评论或父评论已有路径的评论，
+    批量写入路径，直到没有可处理的评论。
+
+    Args:
+        batch_size (int): 每批处理的评论数量
+        rebuild (bool): 是否清空后全部重新计算
+
+    Returns:
+        tuple: (已回填数量, 无法回填的数量)
+    """
+    comments = Comment.__table__
+    parent = comments.alias('parent')
+
+    if rebuild:
+        db.session.execute(comments.update().values(path=None, depth=0))
+        db.session.commit()
+
+    statement = comments.update()\
+        .where(comments.c.id == bindparam('b_id'))\
+        .values(path=bindparam('b_path'), depth=bindparam('b_depth'))
+
+    total = 0
+    while True:
+        rows = db.session.execute(
+            select(comments.c.id, comments.c.parent_id, parent.c.path, parent.c.depth)
+            .outerjoin(parent, parent.c.id == comments.c.parent_id)
+            .where(comments.c.path.is_(None),
+                   or_(comments.c.parent_id.is_(None), parent.c.path.isnot(None)))
+            .order_by(comments.c.id.asc())
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        db.session.execute(statement, [
+            {'b_id': comment_id,
+             'b_path': (parent_path or '') + path_segment(comment_id),
+             'b_depth': 0 if parent_id is None else parent_depth + 1}
+            for comment_id, parent_id, parent_path, parent_depth in rows
+        ])
+        db.session.commit()
+        total += len(rows)
+
+    remaining = db.session.execute(
+        select(db.func.count()).select_from(comments).where(comments.c.path.is_(None))
+    ).scalar()
+    return total, remaining
+
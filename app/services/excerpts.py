@@ -0,0 +1,59 @@
+"""
+文章派生字段维护服务
+Article Derived Content Maintenance Service
+
+按当前的派生规则重新计算文章的摘录、字数和阅读时长（字段由迁移 0003
+添加）。新保存的文章由模型事件自动计算，只在调整派生规则后需要调用本模块。
+"""
+from sqlalchemy import bindparam, select
+from app import db
+from app.models.article import Article
+from app.utils.text import derive_content
+
+def backfill_content_fields(batch_size=200, rebuild=False):
+    """
+    回填文章的摘录、字数和阅读时长
+
+    按ID顺序分批读取正文，每批执行一条 executemany UPDATE 并提交。
+
+    Args:
+        batch_size (int): 每批处理的文章数量
+        rebuild (bool): 是否重新计算全部文章（默认只处理摘录为空的文章）
+
+    Returns:
+        int: 回填的文章数量
+    """
+    articles = Article.__table__
+    statement = articles.update()\
+        .where(articles.c.id == bindparam('b_id'))\
+        .values(excerpt=bindparam('b_excerpt'), word_count=bindparam('b_word_count'),
+                reading_time=bindparam('b_reading_time'))
+
+    total = 0
+    last_id = 0
+    while True:
+        query = select(articles.c.id, articles.c.content)\
+            .where(articles.c.id > last_id)\
+            .order_by(articles.c.id)\
+            .limit(batch_size)
+        if not rebuild:
+            query = query.where(articles.c.excerpt.is_(None))
+        rows = db.session.execute(query).all()
+        if not rows:
+            break
+
+        params = []
+        for article_id, content in rows:
+            fields = derive_content(content)
+            params.append({
+                'b_id': article_id,
+                'b_excerpt': fields['excerpt'],
+                'b_word_count': fields['word_count'],
+                'b_reading_time': fields['reading_time']
+            })
+        db.session.execute(statement, params)
+        db.session.commit()
+
+        total += len(rows)
+        last_id = rows[-1][0]
+    return total
@@ -0,0 +1,150 @@
+"""
+登录身份缓存服务
+Authenticated Identity Cache Service
+
+Flask-Login 每个请求都会调用 user_loader 加载当前用户，随后模板和权限
+装饰器还会反复访问 ``current_user.admin``。这里改为:
+- 一次查询同时加载用户及其管理员记录
+- 将加载结果作为脱离会话的快照在进程内缓存一小段时间（TTL）
+- 命中时通过 ``Session.merge(load=False)`` 放回当前会话，不产生查询，
+  且得到的仍是可修改、可提交的持久化对象
+
+用户或管理员记录在事务提交后会使对应快照失效；其他 worker 进程中的
+快照最多在 TTL 内保持旧值。
+"""
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload
+from app import db
+from app.models.user import User
+from app.models.admin import Admin
+
+
+class IdentityCache:
+    """
+    用户快照缓存（进程内 LRU + TTL）
+    """
+
+    def __init__(self, ttl=30, max_entries=1024):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.ttl = float(ttl)
+        self.max_entries = max(int(max_entries), 1)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= time.time():
+                self._entries.pop(user_id, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user_id, snapshot):
+        with self._lock:
+            self._entries[user_id] = (time.time() + self.ttl, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def init_identity_cache(app):
+    """
+    根据配置创建身份缓存
+
+    Args:
+        app: Flask应用实例
+    """
+    ttl = float(app.config.get('IDENTITY_CACHE_TTL', 30))
+    app.extensions['identity_cache'] = IdentityCache(
+        ttl, app.config.get('IDENTITY_CACHE_MAX_ENTRIES', 1024)
+    ) if ttl > 0 else None
+
+
+def _get_cache():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('identity_cache')
+
+
+def load_identity(user_id):
+    """
+    加载当前登录用户（供 Flask-Login 的 user_loader 使用）
+
+    Args:
+        user_id (int): 用户ID
+
+    Returns:
+        User: 绑定到当前会话的用户对象，不存在时返回None
+    """
+    cache = _get_cache()
+    if cache is not None:
+        snapshot = cache.get(user_id)
+        if snapshot is not None:
+            return db.session.merge(snapshot, load=False)
+
+    user = User.query.options(joinedload(User.admin)).filter_by(id=user_id).first()
+    if user is None or cache is None:
+        return user
+
+    # 快照与当前请求的会话分离，本次请求使用 merge 得到的副本
+    db.session.expunge(user)
+    cache.set(user_id, user)
+    return db.session.merge(user, load=False)
+
+
+def invalidate_identity(*user_ids):
+    """
+    使用户快照失效
+
+    Args:
+        user_ids (int): 用户ID
+    """
+    cache = _get_cache()
+    if cache is not None:
+        cache.invalidate(*user_ids)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_identities(session_, flush_context):
+    """记录本次 flush 中变更的用户，等待事务提交后再使快照失效"""
+    user_ids = set()
+    for obj in list(session_.dirty) + list(session_.deleted):
+        if isinstance(obj, User):
+            user_ids.add(obj.id)
+    for obj in list(session_.new) + list(session_.dirty) + list(session_.deleted):
+        if isinstance(obj, Admin):
+            user_ids.add(obj.user_id)
+    if user_ids:
+        session_.info.setdefault('identity_user_ids', set()).update(user_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_invalidation(session_):
+    user_ids = session_.info.pop('identity_user_ids', None)
+    if user_ids:
+        invalidate_identity(*user_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_invalidation(session_):
+    session_.info.pop('identity_user_ids', None)
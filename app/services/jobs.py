@@ -0,0 +1,368 @@
+"""
+后台任务队列服务
+Background Job Queue Service
+
+以数据库 jobs 表作为队列（SQLite / MySQL 通用），请求中只需入队即可返回，
+耗时工作由 ``flask jobs worker`` 进程执行:
+
+- 认领任务使用带状态条件的 UPDATE，多个 worker 进程不会重复执行
+- 失败后按指数退避重新排队，超过最大尝试次数后标记为失败
+- 每种任务可限制同时运行的数量
+- 相同幂等键的任务只入队一次；已失败的任务再次入队时重新排队
+- worker 崩溃后，超过锁定超时的运行中任务会重新排队
+"""
+import json
+import os
+import socket
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from importlib import import_module
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.job import Job
+
+
+class JobHandler:
+    """
+    已注册的任务处理函数及其调度参数
+    """
+
+    def __init__(self, name, func, max_attempts=5, concurrency=None):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+        self.concurrency = concurrency
+
+
+_handlers = {}
+_current = threading.local()
+
+
+def job(name, max_attempts=5, concurrency=None):
+    """
+    注册任务处理函数
+
+    处理函数以关键字参数接收入队时的参数，返回值（可JSON序列化）
+    保存为任务结果。
+
+    Args:
+        name (str): 任务名称
+        max_attempts (int): 最大尝试次数
+        concurrency (int): 同时运行的最大数量，None表示不限
+
+    Returns:
+        function: 装饰器
+    """
+    def decorator(func):
+        _handlers[name] = JobHandler(name, func, max_attempts, concurrency)
+        return func
+    return decorator
+
+
+def get_handler(name):
+    """
+    获取任务处理函数
+
+    Args:
+        name (str): 任务名称
+
+    Returns:
+        JobHandler: 处理函数，未注册时返回None
+    """
+    return _handlers.get(name)
+
+
+def enqueue(name, payload=None, idempotency_key=None, delay=0, max_attempts=None):
+    """
+    任务入队（立即提交）
+
+    Args:
+        name (str): 任务名称
+        payload (dict): 任务参数
+        idempotency_key (str): 幂等键，已存在相同键的任务时返回该任务
+            （该任务已失败时重新排队）
+        delay (float): 延迟执行的秒数
+        max_attempts (int): 最大尝试次数，默认使用注册时的设置
+
+    Returns:
+        Job: 任务对象
+    """
+    handler = get_handler(name)
+    if handler is None:
+        raise ValueError(f'未注册的任务: {name}')
+
+    if idempotency_key:
+        existing = Job.query.filter_by(idempotency_key=idempotency_key).first()
+        if existing is not None:
+            if existing.status == 'failed':
+                _requeue_failed(existing, delay)
+            return existing
+
+    queued = Job(
+        name=name,
+        payload=json.dumps(payload or {}, ensure_ascii=False),
+        idempotency_key=idempotency_key,
+        max_attempts=max_attempts or handler.max_attempts,
+        run_at=datetime.utcnow() + timedelta(seconds=delay)
+    )
+    db.session.add(queued)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # 并发入队时幂等键冲突，返回先入队的任务
+        db.session.rollback()
+        return Job.query.filter_by(idempotency_key=idempotency_key).first()
+    return queued
+
+
+def _requeue_failed(failed, delay=0):
+    """
+    将已失败的任务重新排队并重置尝试次数（只有仍为失败状态时才修改，
+    并发入队时只会重置一次）
+
+    Args:
+        failed (Job): 已失败的任务
+        delay (float): 延迟执行的秒数
+    """
+    jobs = Job.__table__
+    db.session.execute(
+        update(jobs).where(jobs.c.id == failed.id, jobs.c.status == 'failed')
+        .values(status='queued', attempts=0, run_at=datetime.utcnow() + timedelta(seconds=delay),
+                locked_by=None, locked_at=None, progress=None, result=None, finished_at=None)
+    )
+    db.session.commit()
+    db.session.refresh(failed)
+
+
+def report_progress(**values):
+    """
+    在任务处理函数中报告进度（立即写入，不受处理函数事务影响）
+
+    Args:
+        **values: 进度信息
+    """
+    job_id = getattr(_current, 'job_id', None)
+    if job_id is None:
+        return
+    jobs = Job.__table__
+    with db.engine.begin() as connection:
+        connection.execute(
+            update(jobs).where(jobs.c.id == job_id)
+            .values(progress=json.dumps(values, ensure_ascii=False))
+        )
+
+
+def retry_delay(attempts, base=10.0, maximum=3600.0):
+    """
+    计算第 attempts 次失败后的重试延迟（指数退避）
+
+    Args:
+        attempts (int): 已尝试次数
+        base (float): 首次重试延迟秒数
+        maximum (float): 最大延迟秒数
+
+    Returns:
+        float: 延迟秒数
+    """
+    return min(base * (2 ** max(attempts - 1, 0)), maximum)
+
+
+class JobWorker:
+    """
+    任务执行进程
+
+    Args:
+        app: Flask应用实例
+        concurrency (int): 同时执行的任务数量（线程数）
+        worker_id (str): worker 标识，默认为 主机名:进程号
+    """
+
+    def __init__(self, app, concurrency=None, worker_id=None):
+        self.app = app
+        self.concurrency = max(int(concurrency or app.config.get('JOB_WORKER_CONCURRENCY', 2)), 1)
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        self.poll_interval = float(app.config.get('JOB_POLL_INTERVAL', 1))
+        self.lock_timeout = float(app.config.get('JOB_LOCK_TIMEOUT', 600))
+        self.retry_base = float(app.config.get('JOB_RETRY_BASE_DELAY', 10))
+        self.retry_max = float(app.config.get('JOB_RETRY_MAX_DELAY', 3600))
+        self._stopping = threading.Event()
+
+    def stop(self):
+        """停止 run() 循环"""
+        self._stopping.set()
+
+    def recover_stale(self):
+        """
+        将锁定超时的运行中任务重新排队
+
+        Returns:
+            int: 重新排队的任务数量
+        """
+        jobs = Job.__table__
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lock_timeout)
+        recovered = db.session.execute(
+            update(jobs)
+            .where(jobs.c.status == 'running', jobs.c.locked_at < cutoff)
+            .values(status='queued', locked_by=None, locked_at=None,
+                    last_error='任务执行超时，已重新排队')
+        ).rowcount
+        db.session.commit()
+        return recovered
+
+    def _running_counts(self):
+        jobs = Job.__table__
+        return dict(db.session.execute(
+            select(jobs.c.name, func.count())
+            .where(jobs.c.status == 'running')
+            .group_by(jobs.c.name)
+        ).all())
+
+    def claim(self, limit):
+        """
+        认领最多 limit 个到期任务
+
+        Args:
+            limit (int): 最大数量
+
+        Returns:
+            list: 已认领的任务ID
+        """
+        jobs = Job.__table__
+        now = datetime.utcnow()
+        candidates = db.session.execute(
+            select(jobs.c.id, jobs.c.name)
+            .where(jobs.c.status == 'queued', jobs.c.run_at <= now)
+            .order_by(jobs.c.run_at.asc(), jobs.c.id.asc())
+            .limit(limit * 4)
+        ).all()
+        if not candidates:
+            db.session.commit()
+            return []
+
+        running = self._running_counts()
+        claimed = []
+        for job_id, name in candidates:
+            if len(claimed) >= limit:
+                break
+            handler = get_handler(name)
+            if handler is not None and handler.concurrency is not None \
+                    and running.get(name, 0) >= handler.concurrency:
+                continue
+            rowcount = db.session.execute(
+                update(jobs)
+                .where(jobs.c.id == job_id, jobs.c.status == 'queued')
+                .values(status='running', locked_by=self.worker_id, locked_at=now,
+                        attempts=jobs.c.attempts + 1)
+            ).rowcount
+            db.session.commit()
+            if rowcount == 1:
+                claimed.append(job_id)
+                running[name] = running.get(name, 0) + 1
+        return claimed
+
+    def execute(self, job_id):
+        """
+        执行一个已认领的任务
+
+        Args:
+            job_id (int): 任务ID
+
+        Returns:
+            str: 执行后的状态
+        """
+        with self.app.app_context():
+            current = db.session.get(Job, job_id)
+            handler = get_handler(current.name)
+            _current.job_id = job_id
+            try:
+                if handler is None:
+                    raise LookupError(f'未注册的任务: {current.name}')
+                result = handler.func(**current.get_payload())
+            except Exception:
+                db.session.rollback()
+                return self._fail(job_id, traceback.format_exc())
+            finally:
+                _current.job_id = None
+
+            current = db.session.get(Job, job_id)
+            current.status = 'succeeded'
+            current.result = json.dumps(result, ensure_ascii=False, default=str) if result is not None else None
+            current.last_error = None
+            current.locked_by = None
+            current.locked_at = None
+            current.finished_at = datetime.utcnow()
+            db.session.commit()
+            return current.status
+
+    def _fail(self, job_id, error):
+        current = db.session.get(Job, job_id)
+        current.last_error = error[-4000:]
+        current.locked_by = None
+        current.locked_at = None
+        if current.attempts < current.max_attempts:
+            current.status = 'queued'
+            current.run_at = datetime.utcnow() + timedelta(
+                seconds=retry_delay(current.attempts, self.retry_base, self.retry_max)
+            )
+        else:
+            current.status = 'failed'
+            current.finished_at = datetime.utcnow()
+        db.session.commit()
+        self.app.logger.warning('Job %s (%s) failed on attempt %s', job_id, current.name, current.attempts)
+        return current.status
+
+    def run_once(self):
+        """
+        认领并执行一批到期任务（在当前线程中依次执行）
+
+        Returns:
+            int: 执行的任务数量
+        """
+        with self.app.app_context():
+            self.recover_stale()
+            claimed = self.claim(self.concurrency)
+        for job_id in claimed:
+            self.execute(job_id)
+        return len(claimed)
+
+    def run(self):
+        """
+        持续认领任务并在线程池中执行，直到调用 stop()
+        """
+        active = set()
+        lock = threading.Lock()
+
+        def finished(future):
+            with lock:
+                active.discard(future)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job') as executor:
+            while not self._stopping.is_set():
+                with lock:
+                    free = self.concurrency - len(active)
+                claimed = []
+                if free > 0:
+                    with self.app.app_context():
+                        self.recover_stale()
+                        claimed = self.claim(free)
+                for job_id in claimed:
+                    future = executor.submit(self.execute, job_id)
+                    with lock:
+                        active.add(future)
+                    future.add_done_callback(finished)
+                if not claimed:
+                    self._stopping.wait(self.poll_interval)
+
+
+def init_jobs(app):
+    """
+    导入注册了任务处理函数的模块
+
+    Args:
+        app: Flask应用实例
+    """
+    for module in app.config.get('JOB_HANDLER_MODULES', ()):
+        import_module(module)
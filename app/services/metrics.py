@@ -0,0 +1,550 @@
+"""
+应用指标
+Application Metrics
+
+进程内的指标注册表和 Prometheus 文本格式的 /metrics 端点，不依赖
+prometheus_client:
+
+- http_requests_total / http_request_duration_seconds: 按蓝图、端点统计的
+  请求数（含状态码）和延迟直方图
+- db_queries_total / db_query_duration_seconds_total: 按端点统计的SQL语句
+  数量和耗时（来自请求级SQL统计）
+- page_cache_requests_total、identity_cache_*、auth_login_attempts_total:
+  页面缓存命中、登录身份缓存命中和登录成功/失败次数
+- db_pool_*: 连接池借出/空闲连接数
+- active_sessions: 最近 METRICS_ACTIVE_WINDOW 秒内有请求的登录用户数
+
+多进程（gunicorn 多 worker）时配置 METRICS_DIR：每个进程至多每
+METRICS_FLUSH_INTERVAL 秒将自己的快照原子地写入该目录下的
+metrics-<pid>.json，/metrics 汇总目录中的全部快照。计数器和直方图累加
+所有进程（包括已退出的 worker），仪表只统计仍在运行的进程。已退出进程的
+快照在进程启动和每次抓取时合并进 metrics-retired.json 后删除，目录中的文件
+数量不会随 worker 重启无限增长。
+
+访问控制：配置 METRICS_TOKEN 时需要 Bearer 令牌，配置 METRICS_ALLOWED_IPS
+时只允许白名单内的客户端地址（两者都配置时满足其一即可）。生产环境
+（METRICS_REQUIRE_AUTH）两者都未配置时不开放 /metrics。
+"""
+import atexit
+import bisect
+import hmac
+import ipaddress
+import json
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from flask import Response, abort, current_app, g, request, session
+from app import db, csrf
+
+try:
+    import fcntl
+except ImportError:  # Windows 上不加文件锁
+    fcntl = None
+
+# 延迟直方图的桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 指标类型和说明
+METRICS = {
+    'http_requests_total': ('counter', 'HTTP requests by blueprint, endpoint, method and status'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency in seconds'),
+    'db_queries_total': ('counter', 'SQL statements executed by endpoint'),
+    'db_query_duration_seconds_total': ('counter', 'Time spent executing SQL statements by endpoint'),
+    'page_cache_requests_total': ('counter', 'Anonymous page cache lookups by result'),
+    'identity_cache_hits_total': ('counter', 'Login identity cache hits'),
+    'identity_cache_misses_total': ('counter', 'Login identity cache misses'),
+    'auth_login_attempts_total': ('counter', 'Login attempts by result'),
+    'db_pool_checked_out': ('gauge', 'Database connections checked out from the pool'),
+    'db_pool_checked_in': ('gauge', 'Idle database connections in the pool'),
+    'db_pool_overflow': ('gauge', 'Overflow database connections in use'),
+    'db_pool_timeouts_total': ('counter', 'Timeouts waiting for a pooled connection'),
+    'active_sessions': ('gauge', 'Logged-in users seen within the active window'),
+    'process_count': ('gauge', 'Worker processes reporting metrics'),
+}
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class MetricsRegistry:
+    """
+    进程内指标注册表
+
+    计数器、直方图的更新只在锁内修改字典，每次请求的开销为几次字典操作。
+    fork 出的子进程会清空从父进程继承的数据，避免重复计数。
+
+    Args:
+        buckets (tuple): 直方图的桶上限（秒）
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.pid = os.getpid()
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self.active_users = {}
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref().reset())
+
+    def reset(self):
+        """清空全部数据（fork 后在子进程中自动调用）"""
+        self._lock = threading.Lock()
+        self.pid = os.getpid()
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self.active_users = {}
+
+    def inc(self, name, value=1, **labels):
+        """计数器加 value"""
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_counter(self, name, value, **labels):
+        """设置由其他组件累计的计数器的当前值"""
+        with self._lock:
+            self.counters[(name, _labels_key(labels))] = value
+
+    def observe(self, name, value, **labels):
+        """直方图记录一个观测值"""
+        key = (name, _labels_key(labels))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def set_gauge(self, name, value, **labels):
+        """设置仪表的当前值"""
+        with self._lock:
+            self.gauges[(name, _labels_key(labels))] = value
+
+    def touch_user(self, user_id, now=None):
+        """记录登录用户的最近请求时间"""
+        with self._lock:
+            self.active_users[str(user_id)] = now or time.time()
+
+    def snapshot(self, active_window=300):
+        """
+        获取可序列化的快照（同时清理超出活跃窗口的用户）
+
+        Args:
+            active_window (float): 活跃会话窗口（秒）
+
+        Returns:
+            dict: 快照
+        """
+        cutoff = time.time() - active_window
+        with self._lock:
+            for user_id in [user_id for user_id, seen in self.active_users.items() if seen < cutoff]:
+                del self.active_users[user_id]
+            return {
+                'pid': self.pid,
+                'buckets': list(self.buckets),
+                'counters': [[name, list(map(list, labels)), value]
+                             for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(map(list, labels)), list(counts), total, count]
+                               for (name, labels), (counts, total, count) in self.histograms.items()],
+                'gauges': [[name, list(map(list, labels)), value]
+                           for (name, labels), value in self.gauges.items()],
+                'active_users': dict(self.active_users),
+            }
+
+
+class MetricsStore:
+    """
+    多进程快照目录：每个进程一个 JSON 文件
+
+    Args:
+        directory (str): 目录路径
+    """
+
+    # 已退出进程的快照合并后的文件名
+    RETIRED = 'metrics-retired.json'
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, snapshot, name=None):
+        """原子地写入当前进程的快照"""
+        path = os.path.join(self.directory, name or f'metrics-{snapshot["pid"]}.json')
+        temp = f'{path}.{threading.get_ident()}.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        os.replace(temp, path)
+
+    def _read(self):
+        """读取目录中的全部快照，返回 (文件名, 快照) 列表"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not (name.startswith('metrics-') and name.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                    entries.append((name, json.load(f)))
+            except (OSError, ValueError):
+                continue
+        return entries
+
+    def read_all(self):
+        """
+        读取目录中的全部快照
+
+        Returns:
+            list: 快照字典
+        """
+        return [snapshot for _, snapshot in self._read()]
+
+    @contextmanager
+    def _locked(self):
+        """在目录的锁文件上持有排他锁，避免多个进程同时合并"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, '.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def compact(self):
+        """
+        将已退出进程的快照合并进 metrics-retired.json 并删除原文件
+
+        合并后的快照只保留计数器和直方图（仪表只统计存活的进程）。
+
+        Returns:
+            int: 合并的快照数量
+        """
+        with self._locked():
+            entries = self._read()
+            dead = [(name, snapshot) for name, snapshot in entries
+                    if name != self.RETIRED and not _process_alive(snapshot['pid'])]
+            if not dead:
+                return 0
+            retired = [snapshot for name, snapshot in entries if name == self.RETIRED]
+            counters, histograms, _, buckets = aggregate(retired + [snapshot for _, snapshot in dead])
+            self.write({
+                'pid': None,
+                'buckets': list(buckets),
+                'counters': [[name, list(map(list, labels)), value]
+                             for (name, labels), value in counters.items()],
+                'histograms': [[name, list(map(list, labels)), counts, total, count]
+                               for (name, labels), (counts, total, count) in histograms.items()],
+                'gauges': [],
+                'active_users': {},
+            }, self.RETIRED)
+            for name, _ in dead:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+            return len(dead)
+
+
+def _process_alive(pid):
+    if pid is None:
+        # 已退出进程的合并快照
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def aggregate(snapshots, active_window=300):
+    """
+    汇总多个进程的快照
+
+    Args:
+        snapshots (list): 快照字典
+        active_window (float): 活跃会话窗口（秒）
+
+    Returns:
+        tuple: (counters, histograms, gauges, buckets)，键为 (指标名, 标签元组)
+    """
+    counters, histograms, gauges = {}, {}, {}
+    buckets = tuple(snapshots[0]['buckets']) if snapshots else DEFAULT_BUCKETS
+    active_users = {}
+    live = 0
+    cutoff = time.time() - active_window
+    for snapshot in snapshots:
+        alive = _process_alive(snapshot['pid'])
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        if tuple(snapshot['buckets']) == buckets:
+            for name, labels, counts, total, observations in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.setdefault(key, [[0] * len(counts), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+                merged[2] += observations
+        if not alive:
+            continue
+        live += 1
+        for name, labels, value in snapshot['gauges']:
+            key = (name, tuple(map(tuple, labels)))
+            gauges[key] = gauges.get(key, 0) + value
+        for user_id, seen in snapshot['active_users'].items():
+            if seen >= cutoff:
+                active_users[user_id] = max(seen, active_users.get(user_id, 0))
+    gauges[('active_sessions', ())] = len(active_users)
+    gauges[('process_count', ())] = live
+    return counters, histograms, gauges, buckets
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value) if value != int(value) else f'{value:.1f}'
+    return str(value)
+
+
+def render(counters, histograms, gauges, buckets):
+    """
+    生成 Prometheus 文本格式（0.0.4）
+
+    Returns:
+        str: 指标文本
+    """
+    series = {}
+    for source in (counters, histograms, gauges):
+        for name, labels in source:
+            series.setdefault(name, []).append(labels)
+
+    lines = []
+    for name in sorted(series):
+        kind, help_text = METRICS.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels in sorted(series[name]):
+            key = (name, labels)
+            if key in histograms:
+                counts, total, count = histograms[key]
+                cumulative = 0
+                for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+                    cumulative += bucket_count
+                    le = bound if bound == '+Inf' else _format_value(float(bound))
+                    lines.append(f'{name}_bucket{_format_labels(labels, ("le", le))} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(float(total))}')
+                lines.append(f'{name}_count{_format_labels(labels)} {count}')
+            else:
+                value = counters[key] if key in counters else gauges[key]
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def get_metrics(app=None):
+    """
+    获取应用的指标注册表
+
+    Returns:
+        MetricsRegistry: 未启用时返回None
+    """
+    app = app or current_app
+    return app.extensions.get('metrics')
+
+
+def count(name, value=1, **labels):
+    """
+    计数器加 value（指标未启用时不做任何事）
+
+    Args:
+        name (str): 指标名
+        value (int): 增量
+        **labels: 标签
+    """
+    registry = current_app.extensions.get('metrics')
+    if registry is not None:
+        registry.inc(name, value, **labels)
+
+
+def _sample_components(app, registry):
+    """采集连接池、身份缓存等组件的当前值"""
+    from app.services.pool_metrics import get_pool_stats
+    with app.app_context():
+        stats = get_pool_stats(db.engine)
+    registry.set_gauge('db_pool_checked_out', stats.get('checked_out', 0))
+    registry.set_gauge('db_pool_checked_in', stats.get('checked_in', 0))
+    registry.set_gauge('db_pool_overflow', stats.get('overflow', 0))
+    registry.set_counter('db_pool_timeouts_total', stats['timeouts'])
+
+    identity_cache = app.extensions.get('identity_cache')
+    if identity_cache is not None:
+        registry.set_counter('identity_cache_hits_total', identity_cache.hits)
+        registry.set_counter('identity_cache_misses_total', identity_cache.misses)
+
+
+def collect(app):
+    """
+    汇总全部进程的指标并生成文本
+
+    Args:
+        app: Flask应用实例
+
+    Returns:
+        str: Prometheus 文本格式的指标
+    """
+    registry = app.extensions['metrics']
+    window = app.config.get('METRICS_ACTIVE_WINDOW', 300)
+    _sample_components(app, registry)
+    snapshot = registry.snapshot(window)
+    store = app.extensions.get('metrics_store')
+    if store is None:
+        snapshots = [snapshot]
+    else:
+        store.write(snapshot)
+        store.compact()
+        snapshots = store.read_all()
+    return render(*aggregate(snapshots, window))
+
+
+def _parse_networks(entries):
+    """
+    解析地址白名单
+
+    Args:
+        entries (list): 地址或 CIDR 网段
+
+    Returns:
+        list: ip_network 对象
+    """
+    return [ipaddress.ip_network(entry, strict=False) for entry in entries]
+
+
+def _scrape_allowed(token, networks):
+    """检查当前请求是否允许抓取指标"""
+    if not token and not networks:
+        return True
+    # 定长时间比较，避免按响应时间逐字节猜出令牌（按字节比较，非ASCII请求头不会抛出异常）
+    if token and hmac.compare_digest(request.headers.get('Authorization', '').encode(),
+                                     f'Bearer {token}'.encode()):
+        return True
+    if networks and request.remote_addr:
+        try:
+            address = ipaddress.ip_address(request.remote_addr)
+        except ValueError:
+            return False
+        return any(address in network for network in networks)
+    return False
+
+
+def init_metrics(app):
+    """
+    注册请求指标和 /metrics 端点
+
+    Args:
+        app: Flask应用实例
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        app.extensions['metrics'] = None
+        return
+
+    registry = MetricsRegistry(app.config.get('METRICS_BUCKETS') or DEFAULT_BUCKETS)
+    app.extensions['metrics'] = registry
+    directory = app.config.get('METRICS_DIR')
+    store = MetricsStore(directory) if directory else None
+    app.extensions['metrics_store'] = store
+    if store is not None:
+        try:
+            store.compact()
+        except OSError as e:
+            app.logger.error(f'Metrics compaction failed: {e}')
+    interval = float(app.config.get('METRICS_FLUSH_INTERVAL', 1))
+    window = app.config.get('METRICS_ACTIVE_WINDOW', 300)
+    state = {'flushed_at': 0.0}
+
+    def flush(force=False):
+        now = time.monotonic()
+        if store is None or (not force and now - state['flushed_at'] < interval):
+            return
+        state['flushed_at'] = now
+        try:
+            _sample_components(app, registry)
+            store.write(registry.snapshot(window))
+        except OSError as e:
+            app.logger.error(f'Metrics flush failed: {e}')
+
+    if store is not None:
+        atexit.register(flush, True)
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        blueprint = request.blueprint or ''
+        registry.inc('http_requests_total', blueprint=blueprint, endpoint=endpoint,
+                     method=request.method, status=str(response.status_code))
+        registry.observe('http_request_duration_seconds', time.perf_counter() - started,
+                         blueprint=blueprint, endpoint=endpoint)
+
+        cache_result = response.headers.get('X-Page-Cache')
+        if cache_result:
+            registry.inc('page_cache_requests_total', result=cache_result.lower())
+        stats = g.get('query_stats')
+        if stats is not None:
+            registry.inc('db_queries_total', stats.count, endpoint=endpoint)
+            registry.inc('db_query_duration_seconds_total', stats.total_time, endpoint=endpoint)
+        user_id = session.get('_user_id')
+        if user_id is not None:
+            registry.touch_user(user_id)
+        return response
+
+    @app.teardown_request
+    def _record_failure(exc):
+        # 未处理的异常不会经过 after_request，按500计数
+        started = g.pop('metrics_started', None)
+        if started is not None and exc is not None:
+            endpoint = request.endpoint or 'unmatched'
+            registry.inc('http_requests_total', blueprint=request.blueprint or '', endpoint=endpoint,
+                         method=request.method, status='500')
+            registry.observe('http_request_duration_seconds', time.perf_counter() - started,
+                             blueprint=request.blueprint or '', endpoint=endpoint)
+        flush()
+
+    networks = _parse_networks(app.config.get('METRICS_ALLOWED_IPS') or [])
+    if app.config.get('METRICS_REQUIRE_AUTH') and not app.config.get('METRICS_TOKEN') and not networks:
+        app.logger.warning('/metrics is disabled: set METRICS_TOKEN or METRICS_ALLOWED_IPS to expose it')
+        return
+
+    @csrf.exempt
+    def metrics():
+        """Prometheus 指标端点（按 METRICS_TOKEN 和 METRICS_ALLOWED_IPS 限制访问）"""
+        if not _scrape_allowed(current_app.config.get('METRICS_TOKEN'), networks):
+            abort(403)
+        return Response(collect(current_app), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
@@ -0,0 +1,315 @@
+"""
+数据库迁移服务
+Database Migration Service
+
+替代应用启动时的 ``db.create_all()``:
+
+- 迁移脚本位于 app/migrations，按版本号顺序执行，执行记录保存在
+  schema_migrations 表中
+- ``flask db upgrade`` 执行尚未执行的迁移（MySQL 上使用命名锁，避免多个
+  部署进程同时执行DDL）
+- 应用启动时不再执行DDL；每个进程处理第一个请求时只读取一次已执行的
+  最新版本号并与代码中的最新版本比较
+"""
+import pkgutil
+from contextlib import contextmanager
+from datetime import datetime
+from importlib import import_module
+from flask import abort, current_app, has_app_context
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from app import db
+from app.models.schema_migration import SchemaMigration
+
+MIGRATIONS_PACKAGE = 'app.migrations'
+
+# MySQL 命名锁的名称和等待秒数
+LOCK_NAME = 'blog_schema_migrations'
+LOCK_TIMEOUT = 60
+
+
+class MigrationError(RuntimeError):
+    """迁移脚本定义错误或执行失败"""
+
+
+class Migration:
+    """
+    一个迁移脚本
+
+    Args:
+        revision (str): 版本号
+        description (str): 说明
+        upgrade (callable): 迁移函数
+    """
+
+    def __init__(self, revision, description, upgrade):
+        self.revision = revision
+        self.description = description
+        self.upgrade = upgrade
+
+    def __repr__(self):
+        return f'<Migration {self.revision}>'
+
+
+def load_migrations(package=MIGRATIONS_PACKAGE):
+    """
+    加载全部迁移脚本
+
+    Args:
+        package (str): 迁移脚本所在的包
+
+    Returns:
+        list: 按版本号排序的 Migration 列表
+    """
+    module = import_module(package)
+    migrations = []
+    for info in sorted(pkgutil.iter_modules(module.__path__), key=lambda info: info.name):
+        script = import_module(f'{package}.{info.name}')
+        revision = getattr(script, 'revision', None)
+        if revision is None or not info.name.startswith(revision + '_'):
+            raise MigrationError(f'迁移 {info.name} 的 revision 与文件名前缀不一致')
+        migrations.append(Migration(revision, getattr(script, 'description', ''), script.upgrade))
+
+    revisions = [migration.revision for migration in migrations]
+    if len(set(revisions)) != len(revisions):
+        raise MigrationError(f'迁移版本号重复: {revisions}')
+    return migrations
+
+
+def head_revision(migrations=None):
+    """
+    获取代码中的最新迁移版本
+
+    Returns:
+        str: 版本号，没有迁移时返回None
+    """
+    migrations = load_migrations() if migrations is None else migrations
+    return migrations[-1].revision if migrations else None
+
+
+def applied_revisions(connection=None):
+    """
+    获取已执行的迁移版本
+
+    Args:
+        connection: 数据库连接
+
+    Returns:
+        set: 版本号集合（迁移记录表不存在时为空）
+    """
+    connection = connection or db.session.connection()
+    if not inspect(connection).has_table(SchemaMigration.__tablename__):
+        return set()
+    table = SchemaMigration.__table__
+    return set(connection.execute(select(table.c.revision)).scalars())
+
+
+def current_revision(connection=None):
+    """
+    获取数据库当前的迁移版本（只执行一条查询）
+
+    Args:
+        connection: 数据库连接
+
+    Returns:
+        str: 已执行的最新版本号，未执行过迁移时返回None
+    """
+    connection = connection or db.session.connection()
+    table = SchemaMigration.__table__
+    try:
+        return connection.execute(select(func.max(table.c.revision))).scalar()
+    except (OperationalError, ProgrammingError):
+        # 迁移记录表不存在
+        return None
+
+
+@contextmanager
+def _migration_lock():
+    """在 MySQL 上持有命名锁，保证同一时间只有一个进程执行迁移"""
+    if db.engine.dialect.name != 'mysql':
+        yield
+        return
+
+    with db.engine.connect() as connection:
+        acquired = connection.execute(
+            text('SELECT GET_LOCK(:name, :timeout)'), {'name': LOCK_NAME, 'timeout': LOCK_TIMEOUT}
+        ).scalar()
+        if acquired != 1:
+            raise MigrationError('其他进程正在执行数据库迁移')
+        try:
+            yield
+        finally:
+            connection.execute(text('SELECT RELEASE_LOCK(:name)'), {'name': LOCK_NAME})
+
+
+def _record(migration):
+    SchemaMigration.__table__.create(db.engine, checkfirst=True)
+    with db.engine.begin() as connection:
+        connection.execute(SchemaMigration.__table__.insert().values(
+            revision=migration.revision,
+            description=migration.description[:200],
+            applied_at=datetime.utcnow()
+        ))
+
+
+def add_columns(table, columns):
+    """
+    为已有表补充缺少的字段（供迁移脚本使用）
+
+    Args:
+        table (str): 表名
+        columns (dict): 字段名 -> 字段DDL（例如 ``'INTEGER NOT NULL DEFAULT 0'``）
+
+    Returns:
+        list: 新增的字段名
+    """
+    existing = {column['name'] for column in inspect(db.engine).get_columns(table)}
+    added = []
+    with db.engine.begin() as connection:
+        for name, ddl in columns.items():
+            if name not in existing:
+                connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}'))
+                added.append(name)
+    return added
+
+
+def create_index(name, table, columns):
+    """
+    创建缺少的索引（供迁移脚本使用）
+
+    Args:
+        name (str): 索引名
+        table (str): 表名
+        columns (list): 索引字段
+
+    Returns:
+        bool: 是否新建了索引
+    """
+    if name in {index['name'] for index in inspect(db.engine).get_indexes(table)}:
+        return False
+    with db.engine.begin() as connection:
+        connection.execute(text(f'CREATE INDEX {name} ON {table} ({", ".join(columns)})'))
+    return True
+
+
+def upgrade(target=None, echo=None):
+    """
+    执行尚未执行的迁移
+
+    Args:
+        target (str): 升级到的版本号，默认为最新版本
+        echo (callable): 输出进度的回调，参数为 Migration
+
+    Returns:
+        list: 本次执行的版本号
+    """
+    migrations = load_migrations()
+    if target is not None and target not in {migration.revision for migration in migrations}:
+        raise MigrationError(f'迁移版本不存在: {target}')
+
+    executed = []
+    with _migration_lock():
+        with db.engine.connect() as connection:
+            done = applied_revisions(connection)
+        for migration in migrations:
+            if target is not None and migration.revision > target:
+                break
+            if migration.revision in done:
+                continue
+            if echo is not None:
+                echo(migration)
+            try:
+                migration.upgrade()
+            except Exception as e:
+                db.session.rollback()
+                raise MigrationError(f'迁移 {migration.revision} 执行失败: {e}') from e
+            db.session.commit()
+            _record(migration)
+            executed.append(migration.revision)
+    _reset_schema_state()
+    return executed
+
+
+def stamp(revision=None):
+    """
+    将迁移标记为已执行而不实际执行（用于由 create_all 创建的数据库）
+
+    Args:
+        revision (str): 标记到的版本号，默认为最新版本
+
+    Returns:
+        list: 本次标记的版本号
+    """
+    migrations = load_migrations()
+    revision = revision or head_revision(migrations)
+    with db.engine.connect() as connection:
+        done = applied_revisions(connection)
+    stamped = []
+    for migration in migrations:
+        if migration.revision > revision:
+            break
+        if migration.revision not in done:
+            _record(migration)
+            stamped.append(migration.revision)
+    _reset_schema_state()
+    return stamped
+
+
+def _reset_schema_state():
+    if has_app_context():
+        current_app.extensions.pop('schema_verified', None)
+
+
+def check_schema(app):
+    """
+    比较数据库版本与代码中的最新迁移版本
+
+    版本一致后结果保存在应用中，之后的请求不再查询；不一致时每次调用都
+    重新读取，数据库升级后无需重启进程。
+
+    Args:
+        app: Flask应用实例
+
+    Returns:
+        tuple: (是否为最新版本, 数据库版本, 代码版本)
+    """
+    head = app.extensions['schema_head']
+    if app.extensions.get('schema_verified'):
+        return True, head, head
+
+    with db.engine.connect() as connection:
+        current = current_revision(connection)
+    if current == head:
+        app.extensions['schema_verified'] = True
+    return current == head, current, head
+
+
+def init_schema_check(app):
+    """
+    注册数据库版本检查
+
+    SCHEMA_REVISION_CHECK 为 'error' 时数据库未升级则返回 503，为 'warn'
+    时只记录警告，为 'off' 时不检查。
+
+    Args:
+        app: Flask应用实例
+    """
+    mode = app.config.get('SCHEMA_REVISION_CHECK', 'warn')
+    app.extensions['schema_head'] = head_revision()
+    if mode == 'off':
+        return
+
+    @app.before_request
+    def _verify_schema_revision():
+        is_current, current, head = check_schema(current_app)
+        if is_current:
+            return None
+        if mode == 'error':
+            current_app.logger.error('Database schema is at %s, code expects %s; run "flask db upgrade"',
+                                     current, head)
+            abort(503)
+        # warn 模式只记录一次，之后不再检查
+        current_app.logger.warning('Database schema is at %s, code expects %s; run "flask db upgrade"',
+                                   current, head)
+        current_app.extensions['schema_verified'] = True
+        return None
@@ -0,0 +1,361 @@
+"""
+匿名页面缓存服务
+Anonymous Page Cache Service
+
+为未登录用户缓存首页、文章列表页和文章详情页渲染后的HTML，命中时不再
+执行SQL查询和模板渲染。
+
+缓存键由路由路径、查询参数和若干作用域版本号组成:
+- site: 分类变更、作者显示信息变更时更新，影响所有页面
+- lists: 任意文章或评论变更时更新，影响首页和列表页
+- article:<id>: 该文章及其评论变更时更新，影响详情页
+
+版本号在数据库事务提交后更新，旧版本的缓存条目不再被读取，随TTL或
+LRU淘汰自然清除。后端可选进程内 LRU（memory）或多 worker 共享的
+文件目录（file）。
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+from flask import current_app, has_app_context, request, session, Response
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.orm import Session, attributes
+from app.models.user import User
+from app.models.category import Category
+from app.models.article import Article
+from app.models.comment import Comment
+
+# 影响页面显示的用户字段
+USER_DISPLAY_FIELDS = ('username', 'nickname', 'avatar', 'bio')
+
+
+class MemoryBackend:
+    """
+    进程内 LRU 缓存后端
+
+    条目按最近使用顺序淘汰，并在读取时检查过期时间。版本号单独保存，
+    不参与淘汰，避免版本号丢失后读到旧条目。
+    """
+
+    def __init__(self, max_entries=512):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._versions = {}
+        self.max_entries = max(int(max_entries), 1)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_version(self, name):
+        with self._lock:
+            return self._versions.get(name, '0')
+
+    def bump_version(self, name):
+        with self._lock:
+            self._versions[name] = uuid.uuid4().hex
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FileBackend:
+    """
+    文件目录缓存后端
+
+    每个条目保存为一个JSON文件，写入时先写临时文件再原子替换，多个
+    worker 进程可共享同一目录。版本号保存在 versions 子目录中。
+    """
+
+    # 每写入多少条目清理一次过期文件
+    PRUNE_EVERY = 200
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._versions_dir = os.path.join(directory, 'versions')
+        os.makedirs(self._versions_dir, exist_ok=True)
+        self._writes = 0
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, self._digest(key) + '.json')
+
+    def _version_path(self, name):
+        return os.path.join(self._versions_dir, self._digest(name))
+
+    def _write(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def get(self, key):
+        path = self._entry_path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('key') != key or entry.get('expires_at', 0) <= time.time():
+            return None
+        return entry.get('value')
+
+    def set(self, key, value, ttl):
+        entry = {'key': key, 'expires_at': time.time() + ttl, 'value': value}
+        try:
+            self._write(self._entry_path(key), json.dumps(entry))
+        except OSError:
+            return
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def get_version(self, name):
+        try:
+            with open(self._version_path(name), encoding='utf-8') as f:
+                return f.read().strip() or '0'
+        except OSError:
+            return '0'
+
+    def bump_version(self, name):
+        self._write(self._version_path(name), uuid.uuid4().hex)
+
+    def prune(self):
+        """
+        删除已过期的条目文件
+
+        Returns:
+            int: 删除的文件数量
+        """
+        removed = 0
+        now = time.time()
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                with open(path, encoding='utf-8') as f:
+                    expires_at = json.load(f).get('expires_at', 0)
+            except (OSError, ValueError):
+                expires_at = 0
+            if expires_at <= now:
+                try:
+                    os.unlink(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def clear(self):
+        for directory in (self.directory, self._versions_dir):
+            for filename in os.listdir(directory):
+                path = os.path.join(directory, filename)
+                if os.path.isfile(path):
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+
+
+def create_backend(app):
+    """
+    根据配置创建缓存后端
+
+    Args:
+        app: Flask应用实例
+
+    Returns:
+        缓存后端，配置为 none 时返回None
+    """
+    name = (app.config.get('PAGE_CACHE_BACKEND') or 'none').lower()
+    if name == 'memory':
+        return MemoryBackend(app.config.get('PAGE_CACHE_MAX_ENTRIES', 512))
+    if name == 'file':
+        directory = app.config.get('PAGE_CACHE_DIR') or os.path.join(app.instance_path, 'page_cache')
+        return FileBackend(directory)
+    if name == 'none':
+        return None
+    raise ValueError(f'未知的页面缓存后端: {name}')
+
+
+class PageCache:
+    """
+    匿名页面缓存
+
+    通过 ``cached`` 装饰器应用于视图函数，只缓存未登录用户的 GET 请求，
+    并跳过有待显示闪现消息或在渲染过程中写入了会话的响应。
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        绑定Flask应用并创建缓存后端
+
+        Args:
+            app: Flask应用实例
+        """
+        app.extensions['page_cache'] = create_backend(app)
+
+    @property
+    def backend(self):
+        if not has_app_context():
+            return None
+        return current_app.extensions.get('page_cache')
+
+    def invalidate(self, *scopes):
+        """
+        使指定作用域下的缓存失效
+
+        Args:
+            scopes (str): 作用域名称（site、lists 或 article:<id>）
+        """
+        backend = self.backend
+        if backend is None:
+            return
+        for scope in scopes:
+            backend.bump_version(scope)
+
+    def clear(self):
+        """清空全部缓存"""
+        backend = self.backend
+        if backend is not None:
+            backend.clear()
+
+    def _cache_key(self, backend, scopes):
+        args = urlencode(sorted(request.args.items(multi=True)))
+        versions = ','.join(f'{scope}={backend.get_version(scope)}' for scope in scopes)
+        return f'page:{request.path}?{args}|{versions}'
+
+    @staticmethod
+    def _cacheable_request():
+        return (request.method == 'GET'
+                and not current_user.is_authenticated
+                and '_flashes' not in session)
+
+    def cached(self, *scopes, on_hit=None):
+        """
+        缓存视图函数的响应
+
+        Args:
+            scopes: 页面依赖的作用域，可以是字符串或接收视图参数返回字符串的函数
+            on_hit: 命中缓存时调用的函数，接收视图参数（例如记录浏览次数）
+
+        Returns:
+            function: 装饰器
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                backend = self.backend
+                if backend is None or not self._cacheable_request():
+                    return view(*args, **kwargs)
+
+                resolved = ['site'] + [scope(**kwargs) if callable(scope) else scope for scope in scopes]
+                key = self._cache_key(backend, resolved)
+                entry = backend.get(key)
+                if entry is not None:
+                    if on_hit is not None:
+                        on_hit(**kwargs)
+                    response = Response(entry['body'], status=entry['status'], mimetype=entry['mimetype'])
+                    response.headers['X-Page-Cache'] = 'HIT'
+                    return response
+
+                response = current_app.make_response(view(*args, **kwargs))
+                if (response.status_code == 200
+                        and not response.direct_passthrough
+                        and not session.modified
+                        and response.mimetype == 'text/html'):
+                    backend.set(key, {
+                        'body': response.get_data(as_text=True),
+                        'status': response.status_code,
+                        'mimetype': response.mimetype
+                    }, current_app.config.get('PAGE_CACHE_TTL', 60))
+                    response.headers['X-Page-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+
+page_cache = PageCache()
+
+
+def _pending_scopes(session_):
+    return session_.info.setdefault('page_cache_scopes', set())
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_scopes(session_, flush_context):
+    """记录本次 flush 影响的缓存作用域，等待事务提交后再失效"""
+    scopes = set()
+    for obj in list(session_.new) + list(session_.dirty) + list(session_.deleted):
+        if isinstance(obj, Article):
+            scopes.update(('lists', f'article:{obj.id}'))
+        elif isinstance(obj, Comment):
+            scopes.update(('lists', f'article:{obj.article_id}'))
+            old_article_id = attributes.get_history(obj, 'article_id').deleted
+            if old_article_id and old_article_id[0] is not None:
+                scopes.add(f'article:{old_article_id[0]}')
+        elif isinstance(obj, Category):
+            scopes.add('site')
+        elif isinstance(obj, User):
+            if obj in session_.new:
+                continue
+            if obj in session_.dirty and not any(
+                    attributes.get_history(obj, field).has_changes() for field in USER_DISPLAY_FIELDS):
+                continue
+            scopes.add('site')
+    if scopes:
+        _pending_scopes(session_).update(scopes)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_scopes(session_):
+    scopes = session_.info.pop('page_cache_scopes', None)
+    if scopes:
+        page_cache.invalidate(*sorted(scopes))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_scopes(session_):
+    session_.info.pop('page_cache_scopes', None)
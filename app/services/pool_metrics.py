@@ -0,0 +1,159 @@
+"""
+数据库连接池指标
+Database Connection Pool Metrics
+
+记录当前 worker 进程中连接池的借出、归还、新建连接、失效和等待时间，
+用于根据 worker 数量调整连接池大小。
+"""
+import os
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """
+    连接池运行指标（每个进程、每个连接池一份）
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def _increment(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self, pool):
+        """
+        获取指标快照
+
+        Args:
+            pool: 连接池
+
+        Returns:
+            dict: 指标字典
+        """
+        with self._lock:
+            data = {
+                'pid': os.getpid(),
+                'pool_class': type(pool).__name__,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'timeouts': self.timeouts,
+                'wait': {
+                    'count': self.wait_count,
+                    'total_ms': round(self.wait_total * 1000, 3),
+                    'avg_ms': round(self.wait_total * 1000 / self.wait_count, 3) if self.wait_count else 0.0,
+                    'max_ms': round(self.wait_max * 1000, 3)
+                }
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': max(pool.overflow(), 0),
+                'max_overflow': pool._max_overflow,
+                'timeout': pool.timeout()
+            })
+        return data
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    记录借出等待时间和超时次数的 QueuePool
+    """
+
+    def connect(self):
+        metrics = getattr(self, '_metrics', None)
+        if metrics is None:
+            return super().connect()
+
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            metrics.record_timeout()
+            raise
+        metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool._metrics = getattr(self, '_metrics', None)
+        return pool
+
+
+def attach_pool_metrics(engine):
+    """
+    为引擎的连接池注册指标事件
+
+    Args:
+        engine: SQLAlchemy 引擎
+
+    Returns:
+        PoolMetrics: 指标对象
+    """
+    pool = engine.pool
+    metrics = getattr(pool, '_metrics', None)
+    if metrics is not None:
+        return metrics
+
+    metrics = PoolMetrics()
+    pool._metrics = metrics
+    event.listen(engine, 'checkout', lambda *args: metrics._increment('checkouts'))
+    event.listen(engine, 'checkin', lambda *args: metrics._increment('checkins'))
+    event.listen(engine, 'connect', lambda *args: metrics._increment('connects'))
+    event.listen(engine, 'invalidate', lambda *args: metrics._increment('invalidations'))
+    return metrics
+
+
+def configure_engine_options(app):
+    """
+    使用可记录指标的连接池类
+
+    配置了 pool_size 且未指定 poolclass 时替换为 InstrumentedQueuePool，
+    需在 ``db.init_app`` 之前调用。
+
+    Args:
+        app: Flask应用实例
+    """
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if 'pool_size' in options and 'poolclass' not in options:
+        options['poolclass'] = InstrumentedQueuePool
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def get_pool_stats(engine):
+    """
+    获取引擎连接池的指标
+
+    Args:
+        engine: SQLAlchemy 引擎
+
+    Returns:
+        dict: 指标字典
+    """
+    return attach_pool_metrics(engine).snapshot(engine.pool)
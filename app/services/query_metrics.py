@@ -0,0 +1,262 @@
+"""
+请求级SQL指标
+Per-Request SQL Metrics
+
+通过引擎事件记录每个请求执行的SQL（监听器注册在应用的主库和从库引擎上，
+不影响进程内的其他引擎）:
+
+- 每个请求的语句数量、数据库耗时、最慢的语句和重复形状（N+1）
+- 按端点累计到进程内的注册表，由 /admin/perf 展示
+- 调试模式（或 SQL_DEBUG_HEADER）下通过响应头返回本请求的统计
+- 同一形状的语句在一个请求中超过 SQL_REPEAT_THRESHOLD 次时记录警告
+
+流式响应在 after_request 之后仍可能查询，响应头只包含此前的语句，
+注册表中的数据在请求结束（teardown）时记录，包含全部语句。
+"""
+import heapq
+import threading
+import time
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from app import db
+from app.utils.query_counter import fingerprint
+
+
+class RequestQueryStats:
+    """
+    一个请求的SQL统计
+
+    Args:
+        slow_limit (int): 保留的最慢语句数量
+    """
+
+    def __init__(self, slow_limit=5):
+        self.slow_limit = slow_limit
+        self.count = 0
+        self.total_time = 0.0
+        self.statements = Counter()
+        self._slowest = []  # 最小堆 (耗时, 序号, 语句)
+
+    def record(self, statement, duration):
+        """记录一条语句（按原始语句计数，请求结束时才计算指纹）"""
+        self.count += 1
+        self.total_time += duration
+        self.statements[statement] += 1
+        entry = (duration, self.count, statement)
+        if len(self._slowest) < self.slow_limit:
+            heapq.heappush(self._slowest, entry)
+        elif duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    @property
+    def shapes(self):
+        """按语句形状（指纹）合并的执行次数，每条不同的语句只计算一次指纹"""
+        shapes = Counter()
+        for statement, count in self.statements.items():
+            shapes[fingerprint(statement)] += count
+        return shapes
+
+    @property
+    def slowest(self):
+        """最慢的语句，(耗时秒数, 语句) 按耗时从高到低排序"""
+        return [(duration, statement) for duration, _, statement in sorted(self._slowest, reverse=True)]
+
+    @property
+    def max_repeats(self):
+        """重复次数最多的语句形状执行的次数"""
+        shapes = self.shapes
+        return max(shapes.values()) if shapes else 0
+
+    def repeated(self, threshold):
+        """
+        重复次数超过阈值的语句形状
+
+        Args:
+            threshold (int): 允许的重复次数
+
+        Returns:
+            list: (指纹, 次数)
+        """
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+class EndpointQueryStats:
+    """一个端点的累计SQL统计"""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_time = 0.0
+        self.total_time = 0.0
+        self.slowest = []  # 最小堆 (耗时, 语句)
+        self.repeats = {}  # 指纹 -> {'max': 单个请求中的最大次数, 'requests': 超过阈值的请求数}
+
+    def to_dict(self):
+        requests = self.requests or 1
+        return {
+            'endpoint': self.endpoint,
+            'requests': self.requests,
+            'avg_queries': round(self.queries / requests, 2),
+            'max_queries': self.max_queries,
+            'avg_db_ms': round(self.db_time * 1000 / requests, 3),
+            'avg_request_ms': round(self.total_time * 1000 / requests, 3),
+            'db_ratio': round(self.db_time / self.total_time, 3) if self.total_time else 0.0,
+            'slowest': [{'ms': round(duration * 1000, 3), 'statement': statement}
+                        for duration, statement in sorted(self.slowest, reverse=True)],
+            'repeated': [dict(shape=shape, **counts) for shape, counts in
+                         sorted(self.repeats.items(), key=lambda item: item[1]['max'], reverse=True)]
+        }
+
+
+class QueryMetricsRegistry:
+    """
+    按端点累计的SQL统计（每个进程一份）
+
+    Args:
+        slow_limit (int): 每个端点保留的最慢语句数量
+        repeat_threshold (int): 判定为 N+1 的重复次数
+    """
+
+    def __init__(self, slow_limit=5, repeat_threshold=5):
+        self.slow_limit = slow_limit
+        self.repeat_threshold = repeat_threshold
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, stats, elapsed):
+        """
+        记录一个请求
+
+        Args:
+            endpoint (str): 端点名称
+            stats (RequestQueryStats): 请求的SQL统计
+            elapsed (float): 请求耗时（秒）
+        """
+        repeated = stats.repeated(self.repeat_threshold)
+        with self._lock:
+            entry = self._endpoints.get(endpoint)
+            if entry is None:
+                entry = self._endpoints[endpoint] = EndpointQueryStats(endpoint)
+            entry.requests += 1
+            entry.queries += stats.count
+            entry.max_queries = max(entry.max_queries, stats.count)
+            entry.db_time += stats.total_time
+            entry.total_time += elapsed
+            for duration, statement in stats.slowest:
+                if len(entry.slowest) < self.slow_limit:
+                    heapq.heappush(entry.slowest, (duration, statement))
+                elif duration > entry.slowest[0][0]:
+                    heapq.heapreplace(entry.slowest, (duration, statement))
+            for shape, count in repeated:
+                counts = entry.repeats.setdefault(shape, {'max': 0, 'requests': 0})
+                counts['max'] = max(counts['max'], count)
+                counts['requests'] += 1
+
+    def snapshot(self):
+        """
+        获取全部端点的统计，按平均语句数量从多到少排序
+
+        Returns:
+            list: 端点统计字典
+        """
+        with self._lock:
+            data = [entry.to_dict() for entry in self._endpoints.values()]
+        return sorted(data, key=lambda item: (item['avg_queries'], item['avg_db_ms']), reverse=True)
+
+    def get(self, endpoint):
+        """获取单个端点的统计，没有记录时返回None"""
+        with self._lock:
+            entry = self._endpoints.get(endpoint)
+            return entry.to_dict() if entry is not None else None
+
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self._endpoints.clear()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    stats = g.get('query_stats')
+    started = getattr(context, '_query_started', None)
+    if stats is None or started is None:
+        return
+    stats.record(statement, time.perf_counter() - started)
+
+
+def attach_query_metrics(engine):
+    """
+    在引擎上注册SQL统计的事件监听（重复调用不会重复注册）
+
+    Args:
+        engine: 数据库引擎
+    """
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def get_query_metrics(app=None):
+    """
+    获取应用的SQL统计注册表
+
+    Returns:
+        QueryMetricsRegistry: 未启用时返回None
+    """
+    app = app or current_app
+    return app.extensions.get('query_metrics')
+
+
+def init_query_metrics(app):
+    """
+    注册请求级SQL统计
+
+    Args:
+        app: Flask应用实例
+    """
+    if not app.config.get('SQL_METRICS_ENABLED', True):
+        app.extensions['query_metrics'] = None
+        return
+
+    slow_limit = app.config.get('SQL_SLOW_STATEMENTS', 5)
+    threshold = app.config.get('SQL_REPEAT_THRESHOLD', 5)
+    registry = QueryMetricsRegistry(slow_limit=slow_limit, repeat_threshold=threshold)
+    app.extensions['query_metrics'] = registry
+    # 从库引擎在 set_replicas() 中注册
+    with app.app_context():
+        attach_query_metrics(db.engine)
+
+    @app.before_request
+    def _start_query_stats():
+        g.query_stats = RequestQueryStats(slow_limit)
+        g.query_stats_started = time.perf_counter()
+
+    @app.after_request
+    def _query_stats_headers(response):
+        stats = g.get('query_stats')
+        if stats is not None and (current_app.debug or current_app.config.get('SQL_DEBUG_HEADER')):
+            response.headers['X-Query-Count'] = str(stats.count)
+            response.headers['X-Query-Time-Ms'] = f'{stats.total_time * 1000:.3f}'
+            response.headers['X-Query-Max-Repeats'] = str(stats.max_repeats)
+        return response
+
+    @app.teardown_request
+    def _record_query_stats(exc):
+        stats = g.pop('query_stats', None)
+        started = g.pop('query_stats_started', None)
+        if stats is None:
+            return
+        endpoint = request.endpoint or 'unmatched'
+        registry.record(endpoint, stats, time.perf_counter() - started)
+        for shape, count in stats.repeated(threshold):
+            current_app.logger.warning('Possible N+1 on %s: statement ran %d times: %s',
+                                       endpoint, count, shape)
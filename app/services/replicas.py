@@ -0,0 +1,250 @@
+"""
+只读从库路由服务
+Read Replica Routing Service
+
+- 配置 SQLALCHEMY_REPLICA_URIS 后，REPLICA_READ_BLUEPRINTS 中蓝图的
+  GET/HEAD 请求以及使用 ``use_replica`` 装饰的视图从从库读取
+- ``use_primary`` 装饰的视图始终使用主库
+- 从库复制延迟超过 REPLICA_MAX_LAG 秒（或无法检测）时自动退回主库
+- 用户提交写入后的 REPLICA_STICKY_SECONDS 秒内，其请求都读主库
+
+复制延迟通过心跳表检测: 后台线程每 REPLICA_HEARTBEAT_INTERVAL 秒在主库
+写入当前时间，请求中只从从库读回心跳，不访问主库。
+"""
+import itertools
+import os
+import threading
+import time
+from flask import g, request, session
+from sqlalchemy import create_engine, select, update, insert
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.models.replica import ReplicaHeartbeat
+
+HEARTBEAT_ID = 1
+
+
+def write_heartbeat(engine, beat_at=None):
+    """
+    写入心跳时间戳
+
+    Args:
+        engine: 主库引擎
+        beat_at (float): 时间戳，默认当前时间
+    """
+    beat_at = time.time() if beat_at is None else beat_at
+    table = ReplicaHeartbeat.__table__
+    with engine.begin() as connection:
+        updated = connection.execute(
+            update(table).where(table.c.id == HEARTBEAT_ID).values(beat_at=beat_at)
+        ).rowcount
+        if not updated:
+            connection.execute(insert(table).values(id=HEARTBEAT_ID, beat_at=beat_at))
+
+
+def read_lag(engine):
+    """
+    读取从库的复制延迟
+
+    Args:
+        engine: 从库引擎
+
+    Returns:
+        float: 延迟秒数，没有心跳时返回None
+    """
+    table = ReplicaHeartbeat.__table__
+    with engine.connect() as connection:
+        beat_at = connection.execute(
+            select(table.c.beat_at).where(table.c.id == HEARTBEAT_ID)
+        ).scalar()
+    if beat_at is None:
+        return None
+    return max(time.time() - beat_at, 0.0)
+
+
+class ReplicaSet:
+    """
+    一组从库引擎及其延迟状态
+
+    Args:
+        primary: 主库引擎（写入心跳）
+        engines (list): 从库引擎
+        max_lag (float): 允许的最大延迟（秒）
+        check_interval (float): 延迟检测结果的缓存时间（秒）
+        heartbeat_interval (float): 后台写入心跳的间隔（秒），0表示不启动心跳线程
+    """
+
+    def __init__(self, primary, engines, max_lag=5.0, check_interval=1.0, heartbeat_interval=1.0):
+        self.primary = primary
+        self.engines = list(engines)
+        self.max_lag = float(max_lag)
+        self.check_interval = float(check_interval)
+        self.heartbeat_interval = float(heartbeat_interval)
+        self._lock = threading.Lock()
+        self._rotation = itertools.cycle(range(len(self.engines))) if self.engines else None
+        self._lags = {}
+        self._stopped = threading.Event()
+        self._heartbeat = None
+        self._heartbeat_pid = None
+
+    def beat(self):
+        """
+        在主库写入一次心跳
+
+        Returns:
+            bool: 是否写入成功
+        """
+        try:
+            write_heartbeat(self.primary)
+        except SQLAlchemyError:
+            return False
+        return True
+
+    def start_heartbeat(self):
+        """启动后台心跳线程（已在本进程中运行时不做任何事，fork 后在子进程中重新启动）"""
+        if self.heartbeat_interval <= 0 or self._stopped.is_set():
+            return
+        pid = os.getpid()
+        if self._heartbeat_pid == pid and self._heartbeat is not None and self._heartbeat.is_alive():
+            return
+        with self._lock:
+            if self._heartbeat_pid == pid and self._heartbeat is not None and self._heartbeat.is_alive():
+                return
+            self._heartbeat = threading.Thread(target=self._run_heartbeat, name='replica-heartbeat', daemon=True)
+            self._heartbeat_pid = pid
+            self._heartbeat.start()
+
+    def _run_heartbeat(self):
+        """后台线程：立即写入一次心跳，之后按间隔写入"""
+        while True:
+            self.beat()
+            if self._stopped.wait(self.heartbeat_interval):
+                return
+
+    def lag(self, index):
+        """
+        获取从库延迟（按检测间隔缓存，只读取从库的心跳行）
+
+        Args:
+            index (int): 从库序号
+
+        Returns:
+            float: 延迟秒数，无法检测时返回None
+        """
+        now = time.time()
+        with self._lock:
+            checked_at, lag = self._lags.get(index, (0.0, None))
+            if now - checked_at < self.check_interval:
+                return lag
+        try:
+            lag = read_lag(self.engines[index])
+        except SQLAlchemyError:
+            lag = None
+        with self._lock:
+            self._lags[index] = (now, lag)
+        return lag
+
+    def choose(self):
+        """
+        轮询选择一个延迟在允许范围内的从库
+
+        Returns:
+            Engine: 从库引擎，全部不可用时返回None（使用主库）
+        """
+        if not self.engines:
+            return None
+        self.start_heartbeat()
+        with self._lock:
+            start = next(self._rotation)
+        for offset in range(len(self.engines)):
+            index = (start + offset) % len(self.engines)
+            lag = self.lag(index)
+            if lag is not None and lag <= self.max_lag:
+                return self.engines[index]
+        return None
+
+    def status(self):
+        """
+        获取各从库状态
+
+        Returns:
+            list: 每个从库的地址和最近一次检测到的延迟
+        """
+        return [
+            {'url': engine.url.render_as_string(hide_password=True),
+             'lag': self._lags.get(index, (0.0, None))[1]}
+            for index, engine in enumerate(self.engines)
+        ]
+
+    def dispose(self):
+        """停止心跳线程并关闭从库连接池"""
+        self._stopped.set()
+        for engine in self.engines:
+            engine.dispose()
+
+
+def set_replicas(app, uris):
+    """
+    为应用配置从库
+
+    Args:
+        app: Flask应用实例
+        uris (list): 从库连接地址，为空时关闭读写分离
+    """
+    previous = app.extensions.get('replicas')
+    if previous is not None:
+        previous.dispose()
+    if not uris:
+        app.extensions['replicas'] = None
+        return
+
+    from app.services.pool_metrics import attach_pool_metrics
+    from app.services.query_metrics import attach_query_metrics
+    from app.services.tracing import attach_tracing
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    engines = []
+    for uri in uris:
+        engine = create_engine(uri, **options)
+        attach_pool_metrics(engine)
+        if app.extensions.get('query_metrics') is not None:
+            attach_query_metrics(engine)
+        if app.extensions.get('tracing') is not None:
+            attach_tracing(engine)
+        engines.append(engine)
+    with app.app_context():
+        primary = db.engine
+    app.extensions['replicas'] = ReplicaSet(primary, engines,
+                                            max_lag=app.config.get('REPLICA_MAX_LAG', 5),
+                                            check_interval=app.config.get('REPLICA_LAG_CHECK_INTERVAL', 1),
+                                            heartbeat_interval=app.config.get('REPLICA_HEARTBEAT_INTERVAL', 1))
+
+
+def _select_route(app):
+    """为当前请求选择主库或从库"""
+    g.db_route = 'primary'
+    if app.extensions.get('replicas') is None:
+        return
+
+    view = app.view_functions.get(request.endpoint)
+    route = getattr(view, '_db_route', None)
+    if route is None:
+        read_only = request.method in ('GET', 'HEAD')
+        route = 'replica' if read_only and request.blueprint in app.config.get('REPLICA_READ_BLUEPRINTS', ()) \
+            else 'primary'
+    if route == 'replica' and session.get('_primary_until', 0) > time.time():
+        route = 'primary'
+    g.db_route = route
+
+
+def init_replicas(app):
+    """
+    初始化读写分离
+
+    Args:
+        app: Flask应用实例
+    """
+    set_replicas(app, app.config.get('SQLALCHEMY_REPLICA_URIS') or [])
+
+    @app.before_request
+    def select_database_route():
+        _select_route(app)
@@ -0,0 +1,130 @@
+"""
+索引与查询计划服务
+Index and Query Plan Service
+
+热点查询按“等值条件列 + 排序列”的顺序建立组合索引（定义在各模型的
+``__table_args__`` 中，由迁移 0004 创建）。本模块提供:
+
+- HOT_QUERIES: 与路由中实际查询形状一致的热点查询
+- explain(): 读取 SQLite / MySQL 的查询计划，判断是否使用索引、
+  是否需要额外排序（filesort / 临时B树）或全表扫描
+"""
+import re
+from datetime import datetime
+from sqlalchemy import select
+from app import db
+from app.models.article import Article
+from app.models.comment import Comment
+from app.models.job import Job
+
+# 热点查询（名称 -> 构建 SELECT 语句的函数）
+HOT_QUERIES = {
+    'published_articles': lambda: select(Article.id)
+        .where(Article.status == 'published')
+        .order_by(Article.published_at.desc(), Article.id.desc()),
+    'category_articles': lambda: select(Article.id)
+        .where(Article.category_id == 1, Article.status == 'published')
+        .order_by(Article.published_at.desc(), Article.id.desc()),
+    'author_articles': lambda: select(Article.id)
+        .where(Article.author_id == 1)
+        .order_by(Article.created_at.desc(), Article.id.desc()),
+    'article_comments': lambda: select(Comment.id)
+        .where(Comment.article_id == 1, Comment.status == 'approved')
+        .order_by(Comment.created_at.asc(), Comment.id.asc()),
+    'author_comments': lambda: select(Comment.id)
+        .where(Comment.author_id == 1)
+        .order_by(Comment.created_at.desc(), Comment.id.desc()),
+    'comment_replies': lambda: select(Comment.id)
+        .where(Comment.parent_id == 1, Comment.status == 'approved'),
+    'due_jobs': lambda: select(Job.id)
+        .where(Job.status == 'queued', Job.run_at <= datetime(2000, 1, 1))
+        .order_by(Job.run_at.asc(), Job.id.asc()),
+}
+
+
+class QueryPlan:
+    """
+    查询计划摘要
+
+    Attributes:
+        indexes (list): 使用的索引名
+        full_scan (bool): 是否存在未使用索引的全表扫描
+        filesort (bool): 是否需要额外排序
+        details (list): 原始计划行
+    """
+
+    def __init__(self, indexes, full_scan, filesort, details):
+        self.indexes = indexes
+        self.full_scan = full_scan
+        self.filesort = filesort
+        self.details = details
+
+    @property
+    def ok(self):
+        """是否使用索引且无需全表扫描和额外排序"""
+        return bool(self.indexes) and not self.full_scan and not self.filesort
+
+    def __repr__(self):
+        return f'<QueryPlan indexes={self.indexes} full_scan={self.full_scan} filesort={self.filesort}>'
+
+
+_SQLITE_INDEX = re.compile(r'USING (?:COVERING )?INDEX (\w+)')
+
+
+def _explain_sqlite(connection, sql, params):
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', params).all()
+    details = [row[-1] for row in rows]
+    indexes = [match.group(1) for detail in details for match in [_SQLITE_INDEX.search(detail)] if match]
+    full_scan = any(detail.startswith('SCAN ') and 'INDEX' not in detail for detail in details)
+    filesort = any('USE TEMP B-TREE' in detail for detail in details)
+    return QueryPlan(indexes, full_scan, filesort, details)
+
+
+def _explain_mysql(connection, sql, params):
+    result = connection.exec_driver_sql(f'EXPLAIN {sql}', params)
+    rows = [dict(row._mapping) for row in result]
+    indexes = [row['key'] for row in rows if row.get('key')]
+    full_scan = any(row.get('type') == 'ALL' for row in rows)
+    filesort = any('filesort' in (row.get('Extra') or '') or 'temporary' in (row.get('Extra') or '')
+                   for row in rows)
+    return QueryPlan(indexes, full_scan, filesort, rows)
+
+
+def explain(statement, connection=None):
+    """
+    获取查询计划
+
+    Args:
+        statement: SELECT 语句
+        connection: 数据库连接，默认使用当前会话的连接
+
+    Returns:
+        QueryPlan: 查询计划摘要
+    """
+    connection = connection or db.session.connection()
+    dialect = connection.dialect
+    compiled = statement.compile(dialect=dialect)
+    if dialect.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+
+    if dialect.name == 'sqlite':
+        return _explain_sqlite(connection, str(compiled), params)
+    if dialect.name == 'mysql':
+        return _explain_mysql(connection, str(compiled), params)
+    raise NotImplementedError(f'不支持的数据库: {dialect.name}')
+
+
+def explain_hot_queries(connection=None):
+    """
+    获取全部热点查询的查询计划
+
+    Args:
+        connection: 数据库连接
+
+    Returns:
+        dict: 查询名称 -> QueryPlan
+    """
+    return {name: explain(build(), connection) for name, build in HOT_QUERIES.items()}
+
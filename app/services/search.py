@@ -0,0 +1,276 @@
+"""
+全文搜索服务
+Full-Text Search Service
+
+基于数据库表的嵌入式倒排索引，不依赖外部搜索服务:
+- 英文/数字按单词切分，中日韩文字按单字和相邻双字（bigram）切分
+- 标题、摘要、正文按不同权重累计词频
+- 查询时要求包含全部查询词项，按 BM25 得分排序并分页
+"""
+import math
+import re
+import unicodedata
+from collections import Counter
+from flask_sqlalchemy.pagination import Pagination
+from sqlalchemy import func, select
+from app import db
+from app.models.article import Article
+from app.models.search import SearchDocument, SearchPosting
+from app.services.jobs import job
+
+# 字段权重
+FIELD_WEIGHTS = {
+    'title': 3,
+    'summary': 2,
+    'content': 1
+}
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 词项最大长度（与 search_postings.term 列长度一致）
+MAX_TERM_LENGTH = 64
+
+# 英文单词或连续的中日韩字符
+_TOKEN_PATTERN = re.compile(
+    r'[0-9a-z]+'
+    r'|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+'
+)
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+def tokenize(text, for_query=False):
+    """
+    切分文本为词项
+
+    中日韩文字连续片段在建索引时同时产生单字和双字词项；查询时只使用
+    双字词项（片段只有一个字时使用单字），以保证短语匹配的准确性。
+
+    Args:
+        text (str): 文本
+        for_query (bool): 是否为查询切分
+
+    Returns:
+        list: 词项列表
+    """
+    if not text:
+        return []
+
+    text = unicodedata.normalize('NFKC', _TAG_PATTERN.sub(' ', text)).lower()
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        run = match.group()
+        if run[0].isascii():
+            tokens.append(run[:MAX_TERM_LENGTH])
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            if not for_query:
+                tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def analyze_article(article):
+    """
+    计算文章的加权词频
+
+    Args:
+        article: 文章对象
+
+    Returns:
+        Counter: 词项 -> 加权词频
+    """
+    frequencies = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(getattr(article, field)):
+            frequencies[term] += weight
+    return frequencies
+
+
+def index_article(connection, article):
+    """
+    增量更新一篇文章的索引
+
+    Args:
+        connection: 数据库连接（可为 flush 中的连接）
+        article: 文章对象
+    """
+    remove_article(connection, article.id)
+
+    frequencies = analyze_article(article)
+    connection.execute(SearchDocument.__table__.insert(), {
+        'article_id': article.id,
+        'length': sum(frequencies.values())
+    })
+    if frequencies:
+        connection.execute(SearchPosting.__table__.insert(), [
+            {'term': term, 'article_id': article.id, 'tf': tf}
+            for term, tf in frequencies.items()
+        ])
+
+
+def remove_article(connection, article_id):
+    """
+    从索引中移除一篇文章
+
+    Args:
+        connection: 数据库连接
+        article_id (int): 文章ID
+    """
+    postings = SearchPosting.__table__
+    documents = SearchDocument.__table__
+    connection.execute(postings.delete().where(postings.c.article_id == article_id))
+    connection.execute(documents.delete().where(documents.c.article_id == article_id))
+
+
+def rebuild_index(batch_size=200):
+    """
+    重建整个语料库的索引
+
+    Args:
+        batch_size (int): 每批处理的文章数量
+
+    Returns:
+        int: 已索引的文章数量
+    """
+    db.session.execute(SearchPosting.__table__.delete())
+    db.session.execute(SearchDocument.__table__.delete())
+    db.session.commit()
+
+    total = 0
+    last_id = 0
+    while True:
+        articles = Article.query.options(
+            db.load_only(Article.id, Article.title, Article.summary, Article.content)
+        ).filter(Article.id > last_id).order_by(Article.id.asc()).limit(batch_size).all()
+        if not articles:
+            break
+
+        connection = db.session.connection()
+        for article in articles:
+            index_article(connection, article)
+        db.session.commit()
+
+        total += len(articles)
+        last_id = articles[-1].id
+        db.session.expunge_all()
+    return total
+
+
+@job('search.rebuild', max_attempts=3, concurrency=1)
+def rebuild_index_job(batch_size=200):
+    """
+    后台任务: 重建整个语料库的索引
+
+    Args:
+        batch_size (int): 每批处理的文章数量
+
+    Returns:
+        dict: 已索引的文章数量
+    """
+    return {'indexed': rebuild_index(batch_size=batch_size)}
+
+
+def rank_articles(keyword, category_id=None, status='published'):
+    """
+    按 BM25 得分对匹配的文章排序
+
+    Args:
+        keyword (str): 搜索关键词
+        category_id (int): 分类ID
+        status (str): 文章状态，None 表示不限
+
+    Returns:
+        list: 按相关度降序排列的文章ID
+    """
+    terms = sorted(set(tokenize(keyword, for_query=True)))
+    if not terms:
+        return []
+
+    postings = SearchPosting.__table__
+    documents = SearchDocument.__table__
+    articles = Article.__table__
+
+    doc_count, avg_length = db.session.execute(
+        select(func.count(), func.avg(documents.c.length))
+    ).one()
+    if not doc_count:
+        return []
+    avg_length = float(avg_length or 1) or 1.0
+
+    document_frequency = dict(db.session.execute(
+        select(postings.c.term, func.count())
+        .where(postings.c.term.in_(terms))
+        .group_by(postings.c.term)
+    ).all())
+    if len(document_frequency) < len(terms):
+        return []
+
+    query = select(postings.c.article_id, postings.c.term, postings.c.tf,
+                   documents.c.length, articles.c.published_at)\
+        .join(documents, documents.c.article_id == postings.c.article_id)\
+        .join(articles, articles.c.id == postings.c.article_id)\
+        .where(postings.c.term.in_(terms))
+    if status:
+        query = query.where(articles.c.status == status)
+    if category_id:
+        query = query.where(articles.c.category_id == category_id)
+
+    scores = {}
+    matched = Counter()
+    recency = {}
+    for article_id, term, tf, length, published_at in db.session.execute(query):
+        df = document_frequency[term]
+        idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+        norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+        scores[article_id] = scores.get(article_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+        matched[article_id] += 1
+        recency[article_id] = published_at.timestamp() if published_at else 0
+
+    # 必须包含全部查询词项；得分相同时较新的文章在前
+    candidates = [article_id for article_id, count in matched.items() if count == len(terms)]
+    candidates.sort(key=lambda article_id: (-scores[article_id], -recency[article_id], -article_id))
+    return candidates
+
+
+class SearchPagination(Pagination):
+    """
+    搜索结果分页对象
+
+    与 ``Query.paginate()`` 返回的分页对象接口一致，可直接用于模板分页导航。
+    """
+
+    def _query_items(self):
+        ranked_ids = self._query_args['ranked_ids']
+        page_ids = ranked_ids[self._query_offset:self._query_offset + self.per_page]
+        if not page_ids:
+            return []
+        articles = {
+            article.id: article
+            for article in Article.query.options(*Article.list_loader_options())
+                                        .filter(Article.id.in_(page_ids)).all()
+        }
+        return [articles[article_id] for article_id in page_ids if article_id in articles]
+
+    def _query_count(self):
+        return len(self._query_args['ranked_ids'])
+
+
+def search_articles(keyword, category_id=None, status='published', page=1, per_page=10):
+    """
+    搜索文章并分页
+
+    Args:
+        keyword (str): 搜索关键词
+        category_id (int): 分类ID
+        status (str): 文章状态
+        page (int): 页码
+        per_page (int): 每页数量
+
+    Returns:
+        SearchPagination: 分页对象
+    """
+    ranked_ids = rank_articles(keyword, category_id=category_id, status=status)
+    return SearchPagination(page=page, per_page=per_page, error_out=False, ranked_ids=ranked_ids)
@@ -0,0 +1,128 @@
+"""
+模板预编译与字节码缓存
+Template Precompilation and Bytecode Cache
+
+Jinja 默认在每个 worker 第一次渲染模板时解析并编译模板源码，部署或
+worker 回收后的首批请求因此出现延迟尖峰。本模块:
+
+- 启用 TEMPLATE_BYTECODE_CACHE 时使用 FileSystemBytecodeCache，编译结果
+  保存在 TEMPLATE_CACHE_DIR（默认 instance/jinja_cache），各 worker 共享
+- ``flask templates compile`` 在部署时预先编译全部模板写入缓存目录，
+  同时检查模板语法
+- 启用 TEMPLATE_PRELOAD 时在应用启动阶段从缓存加载全部模板，首个请求
+  不再编译
+
+缓存条目以模板源码的校验和为键，模板修改后旧条目自动失效。
+"""
+import os
+from jinja2 import FileSystemBytecodeCache, TemplateSyntaxError
+
+CACHE_FILE_PATTERN = 'blog_%s.cache'
+
+
+def template_cache_dir(app):
+    """
+    获取字节码缓存目录
+
+    Args:
+        app: Flask应用实例
+
+    Returns:
+        str: 目录路径
+    """
+    return app.config.get('TEMPLATE_CACHE_DIR') or os.path.join(app.instance_path, 'jinja_cache')
+
+
+def create_bytecode_cache(directory):
+    """
+    创建文件系统字节码缓存
+
+    Args:
+        directory (str): 缓存目录（不存在时创建）
+
+    Returns:
+        FileSystemBytecodeCache: 字节码缓存
+    """
+    os.makedirs(directory, exist_ok=True)
+    return FileSystemBytecodeCache(directory, CACHE_FILE_PATTERN)
+
+
+def list_template_names(app):
+    """
+    列出应用和蓝图中的全部HTML模板
+
+    Returns:
+        list: 模板名称
+    """
+    extensions = app.config.get('TEMPLATE_PRELOAD_EXTENSIONS', ('html',))
+    return app.jinja_env.list_templates(extensions=extensions)
+
+
+def precompile_templates(app, directory=None, force=False):
+    """
+    编译全部模板并写入字节码缓存
+
+    Args:
+        app: Flask应用实例
+        directory (str): 缓存目录，默认使用应用配置的目录
+        force (bool): 是否重新编译已有最新缓存的模板
+
+    Returns:
+        tuple: (编译的模板列表, 已是最新的模板列表, {模板名: 错误信息})
+    """
+    env = app.jinja_env
+    cache = create_bytecode_cache(directory or template_cache_dir(app))
+    compiled, current, errors = [], [], {}
+    for name in list_template_names(app):
+        try:
+            source, filename, _ = env.loader.get_source(env, name)
+            bucket = cache.get_bucket(env, name, filename, source)
+            if bucket.code is not None and not force:
+                current.append(name)
+                continue
+            bucket.code = env.compile(source, name, filename)
+            cache.set_bucket(bucket)
+            compiled.append(name)
+        except TemplateSyntaxError as e:
+            errors[name] = f'{e.message} (line {e.lineno})'
+    return compiled, current, errors
+
+
+def clear_template_cache(app, directory=None):
+    """清空字节码缓存目录"""
+    create_bytecode_cache(directory or template_cache_dir(app)).clear()
+
+
+def preload_templates(app):
+    """
+    将全部模板加载到 Jinja 的模板缓存中（启用字节码缓存时从缓存读取）
+
+    Args:
+        app: Flask应用实例
+
+    Returns:
+        int: 加载的模板数量
+    """
+    env = app.jinja_env
+    loaded = 0
+    for name in list_template_names(app):
+        try:
+            env.get_template(name)
+            loaded += 1
+        except TemplateSyntaxError as e:
+            app.logger.error(f'Template preload failed for {name}: {e}')
+    return loaded
+
+
+def init_template_cache(app):
+    """
+    根据配置启用字节码缓存和启动时预加载
+
+    Args:
+        app: Flask应用实例
+    """
+    env = app.jinja_env
+    if app.config.get('TEMPLATE_BYTECODE_CACHE'):
+        env.bytecode_cache = create_bytecode_cache(template_cache_dir(app))
+    if app.config.get('TEMPLATE_PRELOAD'):
+        preload_templates(app)
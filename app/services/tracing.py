@@ -0,0 +1,391 @@
+"""
+请求耗时追踪
+Request Span Tracing
+
+轻量的进程内追踪器，不依赖外部采集服务:
+
+- 按 TRACE_SAMPLE_RATE 对请求采样，采样的请求在 contextvar 中保存当前追踪，
+  各处通过 span() 记录耗时片段
+- 自动记录: 视图函数、render_template、模板过滤器（如 nl2br）、会话 flush
+  以及每条SQL语句；本应用的表单（继承 app.forms.base.AppForm）记录构造和验证
+- 请求结束时将片段以 Chrome Trace Event 格式（JSON 数组，可在
+  chrome://tracing 或 Perfetto 中打开）追加写入 TRACE_FILE，多个 worker
+  进程可写入同一个文件
+
+采样率为0时不注册任何钩子；未被采样的请求中 span() 只读取一次 contextvar。
+"""
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+from flask import before_render_template, g, request, template_rendered
+from sqlalchemy import event
+
+# 当前请求的追踪（未采样时为None）
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+
+_instrumented = False
+_instrument_lock = threading.Lock()
+
+SQL_ARG_MAX_LENGTH = 500
+
+
+class Trace:
+    """
+    一个请求的追踪记录
+
+    Args:
+        max_spans (int): 最多记录的片段数量，超过后丢弃
+    """
+
+    def __init__(self, max_spans=5000):
+        self.max_spans = max_spans
+        self.pid = os.getpid()
+        self.tid = threading.get_ident()
+        self.events = []
+        self.dropped = 0
+        self.render_starts = []  # 正在渲染的模板的开始时间
+        # 以墙上时间为起点、perf_counter 计算偏移，不同进程的时间戳可以对齐
+        self._wall_origin = time.time()
+        self._perf_origin = time.perf_counter()
+
+    def timestamp(self, perf):
+        """将 perf_counter 时间转换为微秒时间戳"""
+        return (self._wall_origin + (perf - self._perf_origin)) * 1_000_000
+
+    def add(self, name, category, start, end, args=None):
+        """
+        记录一个已完成的片段
+
+        Args:
+            name (str): 片段名称
+            category (str): 分类
+            start (float): 开始时间（perf_counter）
+            end (float): 结束时间（perf_counter）
+            args (dict): 附加信息
+        """
+        if len(self.events) >= self.max_spans:
+            self.dropped += 1
+            return
+        item = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round(self.timestamp(start), 3),
+            'dur': round((end - start) * 1_000_000, 3),
+            'pid': self.pid,
+            'tid': self.tid,
+        }
+        if args:
+            item['args'] = args
+        self.events.append(item)
+
+
+class Span:
+    """
+    一个耗时片段（上下文管理器）
+
+    Args:
+        trace (Trace): 所属追踪
+        name (str): 片段名称
+        category (str): 分类
+        args (dict): 附加信息
+    """
+
+    __slots__ = ('trace', 'name', 'category', 'args', 'start')
+
+    def __init__(self, trace, name, category, args):
+        self.trace = trace
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        args = self.args
+        if exc_type is not None:
+            args = dict(args or {}, error=exc_type.__name__)
+        self.trace.add(self.name, self.category, self.start, time.perf_counter(), args)
+        return False
+
+
+class _NoopSpan:
+    """未采样时使用的空片段"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def current_trace():
+    """
+    获取当前请求的追踪
+
+    Returns:
+        Trace: 未采样时返回None
+    """
+    return _current_trace.get()
+
+
+def span(name, category='app', **args):
+    """
+    记录一个耗时片段，当前请求未被采样时不做任何事
+
+    用法::
+
+        with span('comments.build_tree', article_id=article.id):
+            ...
+
+    Args:
+        name (str): 片段名称
+        category (str): 分类
+        **args: 附加信息
+
+    Returns:
+        上下文管理器
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return Span(trace, name, category, args or None)
+
+
+def traced(name=None, category='app'):
+    """
+    记录函数耗时的装饰器
+
+    Args:
+        name (str): 片段名称，默认为函数的限定名
+        category (str): 分类
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            with Span(trace, span_name, category, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TraceWriter:
+    """
+    将追踪以 Chrome Trace Event JSON 数组格式追加写入文件
+
+    文件以 "[" 开头，每个事件后跟逗号和换行，不写结尾的 "]"（该格式允许
+    省略），多个进程可以追加写入同一个文件。
+
+    Args:
+        path (str): 文件路径
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _ensure_header(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            return
+        try:
+            os.write(fd, b'[\n')
+        finally:
+            os.close(fd)
+
+    def write(self, trace):
+        """
+        追加写入一个追踪的全部片段（一次 write 调用）
+
+        Args:
+            trace (Trace): 追踪记录
+        """
+        if not trace.events:
+            return
+        data = ''.join(json.dumps(item, ensure_ascii=False) + ',\n' for item in trace.events)
+        with self._lock:
+            self._ensure_header()
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+            try:
+                os.write(fd, data.encode('utf-8'))
+            finally:
+                os.close(fd)
+
+
+def load_trace_events(path):
+    """
+    读取追踪文件中的全部事件
+
+    Args:
+        path (str): 文件路径
+
+    Returns:
+        list: 事件字典
+    """
+    with open(path, encoding='utf-8') as f:
+        content = f.read().strip()
+    if not content:
+        return []
+    if not content.endswith(']'):
+        content = content.rstrip(',') + ']'
+    return json.loads(content)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current_trace.get() is not None:
+        context._trace_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _current_trace.get()
+    started = getattr(context, '_trace_started', None)
+    if trace is None or started is None:
+        return
+    trace.add('sql', 'db', started, time.perf_counter(),
+              {'statement': statement[:SQL_ARG_MAX_LENGTH], 'executemany': executemany})
+
+
+def _before_flush(session, flush_context, instances):
+    if _current_trace.get() is not None:
+        session.info['_trace_flush_started'] = (time.perf_counter(), len(session.new),
+                                                 len(session.dirty), len(session.deleted))
+
+
+def _after_flush_postexec(session, flush_context):
+    trace = _current_trace.get()
+    started = session.info.pop('_trace_flush_started', None)
+    if trace is None or started is None:
+        return
+    start, new, dirty, deleted = started
+    trace.add('db.flush', 'db', start, time.perf_counter(), {'new': new, 'dirty': dirty, 'deleted': deleted})
+
+
+def attach_tracing(engine):
+    """
+    在引擎上注册SQL片段的事件监听（重复调用不会重复注册）
+
+    Args:
+        engine: 数据库引擎
+    """
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def _instrument_libraries():
+    """为会话 flush 注册一次性钩子（表单耗时由 app.forms.base.AppForm 记录）"""
+    global _instrumented
+    with _instrument_lock:
+        if _instrumented:
+            return
+        from app import db
+
+        session_class = db.session.session_factory.class_
+        event.listen(session_class, 'before_flush', _before_flush)
+        event.listen(session_class, 'after_flush_postexec', _after_flush_postexec)
+        _instrumented = True
+
+
+def _trace_view(endpoint, view):
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        trace = _current_trace.get()
+        if trace is None:
+            return view(*args, **kwargs)
+        with Span(trace, f'view {endpoint}', 'view', None):
+            return view(*args, **kwargs)
+    return wrapper
+
+
+def init_tracing(app):
+    """
+    注册请求追踪（需要在注册蓝图和模板过滤器之后调用）
+
+    Args:
+        app: Flask应用实例
+    """
+    rate = float(app.config.get('TRACE_SAMPLE_RATE') or 0)
+    if rate <= 0:
+        app.extensions['tracing'] = None
+        return
+
+    path = app.config.get('TRACE_FILE') or os.path.join(app.instance_path, 'traces', 'trace.json')
+    writer = TraceWriter(path)
+    max_spans = app.config.get('TRACE_MAX_SPANS', 5000)
+    app.extensions['tracing'] = writer
+    _instrument_libraries()
+    from app import db
+    with app.app_context():
+        attach_tracing(db.engine)
+    replicas = app.extensions.get('replicas')
+    if replicas is not None:
+        for engine in replicas.engines:
+            attach_tracing(engine)
+
+    for endpoint, view in list(app.view_functions.items()):
+        if endpoint != 'static':
+            app.view_functions[endpoint] = _trace_view(endpoint, view)
+    for name in app.config.get('TRACE_FILTERS', ()):
+        if name in app.jinja_env.filters:
+            app.jinja_env.filters[name] = traced(f'filter.{name}', 'template')(app.jinja_env.filters[name])
+
+    @app.before_request
+    def _start_trace():
+        if request.endpoint == 'static' or random.random() >= rate:
+            return
+        trace = Trace(max_spans)
+        g.trace_token = _current_trace.set(trace)
+        g.trace_started = time.perf_counter()
+
+    @app.teardown_request
+    def _finish_trace(exc):
+        token = g.pop('trace_token', None)
+        if token is None:
+            return
+        trace = token.var.get()
+        _current_trace.reset(token)
+        args = {'method': request.method, 'path': request.path}
+        if trace.dropped:
+            args['dropped_spans'] = trace.dropped
+        if exc is not None:
+            args['error'] = type(exc).__name__
+        trace.max_spans += 1  # 保证根片段总能记录
+        trace.add(f'request {request.endpoint}', 'request', g.pop('trace_started'), time.perf_counter(), args)
+        try:
+            writer.write(trace)
+        except OSError as e:
+            app.logger.error(f'Trace write failed: {e}')
+
+    def _template_started(sender, template, context, **extra):
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.render_starts.append(time.perf_counter())
+
+    def _template_finished(sender, template, context, **extra):
+        trace = _current_trace.get()
+        if trace is not None and trace.render_starts:
+            trace.add(f'render {template.name}', 'template', trace.render_starts.pop(), time.perf_counter())
+
+    before_render_template.connect(_template_started, app, weak=False)
+    template_rendered.connect(_template_finished, app, weak=False)
@@ -0,0 +1,318 @@
+"""
+文章浏览计数缓冲服务
+Buffered Article View Counter Service
+"""
+import atexit
+import sqlite3
+import threading
+import time
+from sqlalchemy import bindparam
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+
+
+class ViewCounter:
+    """
+    文章浏览次数聚合器
+
+    浏览增量先在进程内累积（可选地汇总到本地共享 SQLite 文件，供多个
+    worker 共用），再按时间间隔或数量阈值以批量
+    ``UPDATE articles SET view_count = view_count + n`` 语句写回数据库，
+    避免每次访问文章详情都对同一行加锁提交。
+
+    写回失败或进程退出时未写回的增量会重新入队/在退出时再刷新一次，
+    保证至少一次（at-least-once）写入。应用关闭时调用 shutdown() 写回
+    剩余增量并解除绑定，此后退出时的刷新不再访问该应用的数据库。
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = {}
+        self._pending_total = 0
+        self._app = None
+        self._store_path = None
+        self._threshold = 100
+        self._interval = 5.0
+        self._worker = None
+        self._atexit_registered = False
+
+        # 统计信息
+        self._flushed_total = 0
+        self._flush_failures = 0
+        self._last_flush_at = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        绑定Flask应用并读取配置
+
+        Args:
+            app: Flask应用实例
+        """
+        self._app = app
+        self._threshold = max(int(app.config.get('VIEW_COUNT_FLUSH_THRESHOLD', 100)), 1)
+        self._interval = float(app.config.get('VIEW_COUNT_FLUSH_INTERVAL', 5))
+        self._store_path = app.config.get('VIEW_COUNT_STORE_PATH')
+
+        if self._store_path:
+            self._init_store()
+
+        app.extensions['view_counter'] = self
+
+        if self._interval > 0:
+            self._start_worker()
+
+        if not self._atexit_registered:
+            atexit.register(self._flush_at_exit)
+            self._atexit_registered = True
+
+    def shutdown(self, app):
+        """
+        应用关闭前写回剩余增量并解除绑定
+
+        Args:
+            app: 要关闭的Flask应用实例（计数器已绑定到其他应用时不做任何事）
+
+        Returns:
+            int: 写回的浏览次数
+        """
+        if self._app is not app:
+            return 0
+        flushed = self.flush()
+        self._app = None
+        return flushed
+
+    def _flush_at_exit(self):
+        """进程退出时写回剩余增量（应用已关闭时跳过）"""
+        if self._app is not None:
+            self.flush()
+
+    def record(self, article_id, count=1):
+        """
+        记录文章浏览
+
+        Args:
+            article_id (int): 文章ID
+            count (int): 增量
+        """
+        with self._lock:
+            self._pending[article_id] = self._pending.get(article_id, 0) + count
+            self._pending_total += count
+            reached = self._pending_total >= self._threshold
+
+        if reached:
+            # 有后台线程时交给后台线程刷新，否则在当前线程刷新
+            if self._worker is not None and self._worker.is_alive():
+                self._wakeup.set()
+            else:
+                self.flush()
+
+    def get_pending(self, article_id):
+        """
+        获取文章在本进程中尚未写回的浏览增量
+
+        Args:
+            article_id (int): 文章ID
+
+        Returns:
+            int: 未写回的增量
+        """
+        with self._lock:
+            return self._pending.get(article_id, 0)
+
+    def backlog_size(self):
+        """
+        获取积压的浏览增量总数（本进程缓冲 + 共享存储）
+
+        Returns:
+            int: 积压的浏览次数
+        """
+        with self._lock:
+            total = self._pending_total
+        if self._store_path:
+            total += self._store_backlog()
+        return total
+
+    def stats(self):
+        """
+        获取计数器运行指标
+
+        Returns:
+            dict: 指标字典
+        """
+        with self._lock:
+            pending_articles = len(self._pending)
+            pending_views = self._pending_total
+        return {
+            'pending_articles': pending_articles,
+            'pending_views': pending_views,
+            'store_pending_views': self._store_backlog() if self._store_path else 0,
+            'flushed_total': self._flushed_total,
+            'flush_failures': self._flush_failures,
+            'last_flush_at': self._last_flush_at
+        }
+
+    def flush(self):
+        """
+        将积压的浏览增量批量写回数据库
+
+        Returns:
+            int: 本次写回的浏览次数
+        """
+        batch = self._take_pending()
+
+        if self._store_path:
+            # 先并入共享存储，再由当前进程整体取出写回
+            try:
+                if batch:
+                    self._store_merge(batch)
+                    batch = {}
+                batch = self._store_drain()
+            except sqlite3.Error as e:
+                self._flush_failures += 1
+                self._requeue_local(batch)
+                if self._app is not None:
+                    self._app.logger.error(f"View count store error: {e}")
+                return 0
+
+        if not batch or self._app is None:
+            if batch:
+                self._requeue(batch)
+            return 0
+
+        try:
+            with self._app.app_context():
+                self._apply(batch)
+        except SQLAlchemyError as e:
+            self._flush_failures += 1
+            self._requeue(batch)
+            self._app.logger.error(f"View count flush failed: {e}")
+            return 0
+
+        flushed = sum(batch.values())
+        self._flushed_total += flushed
+        self._last_flush_at = time.time()
+        return flushed
+
+    def _take_pending(self):
+        """取出并清空进程内缓冲"""
+        with self._lock:
+            batch = self._pending
+            self._pending = {}
+            self._pending_total = 0
+        return batch
+
+    def _requeue(self, batch):
+        """写回失败时将增量放回缓冲"""
+        if self._store_path:
+            try:
+                self._store_merge(batch)
+                return
+            except sqlite3.Error:
+                pass
+        self._requeue_local(batch)
+
+    def _requeue_local(self, batch):
+        """将增量放回进程内缓冲"""
+        with self._lock:
+            for article_id, count in batch.items():
+                self._pending[article_id] = self._pending.get(article_id, 0) + count
+                self._pending_total += count
+
+    def _apply(self, batch):
+        """执行批量 UPDATE（保留 updated_at，浏览次数不算作文章修改）"""
+        from app.models.article import Article
+
+        table = Article.__table__
+        stmt = table.update().where(
+            table.c.id == bindparam('article_id')
+        ).values(
+            view_count=table.c.view_count + bindparam('delta'),
+            updated_at=table.c.updated_at
+        )
+        params = [
+            {'article_id': article_id, 'delta': count}
+            for article_id, count in sorted(batch.items())
+        ]
+        # 使用独立连接，避免影响当前请求的会话事务
+        with db.engine.begin() as conn:
+            conn.execute(stmt, params)
+
+    def _start_worker(self):
+        """启动后台刷新线程"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(
+            target=self._run_worker, name='view-counter-flush', daemon=True
+        )
+        self._worker.start()
+
+    def _run_worker(self):
+        """后台线程：按间隔或阈值唤醒后刷新"""
+        while True:
+            self._wakeup.wait(self._interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:  # 后台线程不能因异常退出
+                if self._app is not None:
+                    self._app.logger.error(f"View count worker error: {e}")
+
+    # 共享存储（本地SQLite文件，供同一主机上的多个worker共享）
+
+    def _connect_store(self):
+        conn = sqlite3.connect(self._store_path, timeout=10, isolation_level=None)
+        return conn
+
+    def _init_store(self):
+        conn = self._connect_store()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS pending_views ('
+                'article_id INTEGER PRIMARY KEY, delta INTEGER NOT NULL)'
+            )
+        finally:
+            conn.close()
+
+    def _store_merge(self, batch):
+        conn = self._connect_store()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(
+                'INSERT INTO pending_views (article_id, delta) VALUES (?, ?) '
+                'ON CONFLICT(article_id) DO UPDATE SET delta = delta + excluded.delta',
+                list(batch.items())
+            )
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+    def _store_drain(self):
+        conn = self._connect_store()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute('SELECT article_id, delta FROM pending_views').fetchall()
+            conn.execute('DELETE FROM pending_views')
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        return dict(rows)
+
+    def _store_backlog(self):
+        try:
+            conn = self._connect_store()
+            try:
+                row = conn.execute('SELECT COALESCE(SUM(delta), 0) FROM pending_views').fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return 0
+        return row[0]
+
+
+# 全局浏览计数器实例
+view_counter = ViewCounter()
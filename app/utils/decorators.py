@@ -101,4 +101,32 @@ def active_user_required(f):
             return redirect(url_for('auth.login'))
         
         return f(*args, **kwargs)
-    return decorated_function
\ No newline at end of file
+    return decorated_function
+
+
+def use_replica(f):
+    """
+    视图只读，允许从只读从库查询（未配置从库或从库延迟过大时仍使用主库）
+    
+    Args:
+        f: 被装饰的函数
+        
+    Returns:
+        原函数
+    """
+    f._db_route = 'replica'
+    return f
+
+
+def use_primary(f):
+    """
+    视图始终使用主库（例如需要读取最新数据的编辑表单）
+    
+    Args:
+        f: 被装饰的函数
+        
+    Returns:
+        原函数
+    """
+    f._db_route = 'primary'
+    return f
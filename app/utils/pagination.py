@@ -0,0 +1,250 @@
+"""
+键集分页工具
+Keyset Pagination Utilities
+
+键集（seek）分页按排序键定位下一页，不使用 OFFSET，翻到多深都只需
+一次索引范围扫描；总数改为可选的封顶计数，不再每页执行完整 COUNT(*)。
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from flask import request, current_app, abort
+from flask_sqlalchemy.pagination import QueryPagination
+from sqlalchemy import and_, or_, literal_column
+
+
+class InvalidCursor(ValueError):
+    """游标格式无效"""
+
+
+def count_rows(query, limit=None):
+    """
+    统计查询的行数
+
+    计数子查询只选择常量，不展开实体的全部列（包括延迟加载的大字段），
+    也不应用连接加载选项。
+
+    Args:
+        query: 未应用 LIMIT 的 SQLAlchemy 查询对象
+        limit (int): 最多统计的行数，None表示不限
+
+    Returns:
+        int: 行数
+    """
+    query = query.order_by(None).enable_eagerloads(False).with_entities(literal_column('1'))
+    if limit is not None:
+        query = query.limit(limit)
+    return query.count()
+
+
+class CountingPagination(QueryPagination):
+    """
+    使用 count_rows() 统计总数的页码分页
+    """
+
+    def _query_count(self):
+        return count_rows(self._query_args['query'])
+
+
+def encode_cursor(values, direction='next'):
+    """
+    将排序键编码为不透明的游标字符串
+
+    Args:
+        values (list): 排序键的值
+        direction (str): 翻页方向（next 或 prev）
+
+    Returns:
+        str: 游标
+    """
+    payload = {
+        'd': direction,
+        'k': [{'dt': value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    解码游标字符串
+
+    Args:
+        cursor (str): 游标
+
+    Returns:
+        tuple: (排序键的值列表, 翻页方向)
+
+    Raises:
+        InvalidCursor: 游标格式无效时抛出
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw.decode('utf-8'))
+        values = [
+            datetime.fromisoformat(value['dt']) if isinstance(value, dict) else value
+            for value in payload['k']
+        ]
+        direction = payload.get('d', 'next')
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(str(e))
+
+    if direction not in ('next', 'prev'):
+        raise InvalidCursor(direction)
+    return values, direction
+
+
+class KeysetPagination:
+    """
+    键集分页结果
+
+    提供与页码分页对象相近的属性（items、has_next、has_prev、per_page、total），
+    另外提供 next_cursor / prev_cursor 用于生成翻页链接。
+    """
+
+    is_keyset = True
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None,
+                 total=None, total_capped=False):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+        self.total_capped = total_capped
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def to_dict(self):
+        """
+        转换为字典（用于JSON接口）
+
+        Returns:
+            dict: 分页信息字典
+        """
+        return {
+            'per_page': self.per_page,
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor,
+            'has_next': self.has_next,
+            'has_prev': self.has_prev,
+            'total': self.total,
+            'total_capped': self.total_capped
+        }
+
+
+def _seek_condition(columns, values, descending):
+    """构造 (c1, c2) < (v1, v2) 形式的展开比较条件"""
+    clauses = []
+    for i, column in enumerate(columns):
+        equals = [columns[j] == values[j] for j in range(i)]
+        compare = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equals, compare))
+    return or_(*clauses)
+
+
+def _row_key(item, columns):
+    return [getattr(item, column.key) for column in columns]
+
+
+def keyset_paginate(query, columns, cursor=None, per_page=20, descending=True, count_cap=None):
+    """
+    键集分页
+
+    Args:
+        query: 未排序的 SQLAlchemy 查询对象
+        columns (tuple): 排序键列，最后一列必须唯一（通常为主键），且均不可为空
+        cursor (str): 游标，None 表示第一页
+        per_page (int): 每页数量
+        descending (bool): 是否降序
+        count_cap (int): 总数封顶值，None 或 0 表示不计算总数
+
+    Returns:
+        KeysetPagination: 分页结果
+
+    Raises:
+        InvalidCursor: 游标格式无效时抛出
+    """
+    values, direction = decode_cursor(cursor) if cursor else (None, 'next')
+    if values is not None and len(values) != len(columns):
+        raise InvalidCursor('cursor does not match sort keys')
+
+    # 向前翻页时反转排序方向，取出后再恢复顺序
+    reverse = direction == 'prev'
+    scan_descending = descending != reverse
+
+    page_query = query
+    if values is not None:
+        page_query = page_query.filter(_seek_condition(columns, values, scan_descending))
+    page_query = page_query.order_by(
+        *[column.desc() if scan_descending else column.asc() for column in columns]
+    )
+
+    rows = page_query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+    if reverse:
+        items.reverse()
+
+    next_cursor = prev_cursor = None
+    if items:
+        if (has_more and not reverse) or (reverse and values is not None):
+            next_cursor = encode_cursor(_row_key(items[-1], columns), 'next')
+        if (has_more and reverse) or (not reverse and values is not None):
+            prev_cursor = encode_cursor(_row_key(items[0], columns), 'prev')
+
+    total = None
+    total_capped = False
+    if count_cap:
+        total = count_rows(query, limit=count_cap + 1)
+        if total > count_cap:
+            total = count_cap
+            total_capped = True
+
+    return KeysetPagination(items, per_page,
+                            next_cursor=next_cursor,
+                            prev_cursor=prev_cursor,
+                            total=total,
+                            total_capped=total_capped)
+
+
+def paginate_request(query, columns, per_page, descending=True):
+    """
+    按请求参数选择分页方式
+
+    请求带有 ``cursor`` 参数（可为空，表示第一页）时使用键集分页，
+    否则保持原有的页码分页。
+
+    Args:
+        query: 未排序的 SQLAlchemy 查询对象
+        columns (tuple): 排序键列
+        per_page (int): 每页数量
+        descending (bool): 是否降序
+
+    Returns:
+        KeysetPagination 或 Pagination: 分页对象
+    """
+    if 'cursor' in request.args:
+        try:
+            return keyset_paginate(query, columns,
+                                   cursor=request.args.get('cursor') or None,
+                                   per_page=per_page,
+                                   descending=descending,
+                                   count_cap=current_app.config.get('KEYSET_COUNT_CAP'))
+        except InvalidCursor:
+            abort(400)
+
+    page = request.args.get('page', 1, type=int)
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+    return CountingPagination(query=query.order_by(*ordering), page=page, per_page=per_page,
+                              error_out=False)
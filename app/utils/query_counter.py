@@ -0,0 +1,171 @@
+"""
+SQL查询计数工具
+SQL Query Counting Utilities
+"""
+import re
+from collections import Counter
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import db
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAMETER_LIST = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(statement):
+    """
+    计算SQL语句的形状指纹：去掉字面量、合并 IN 参数列表和空白，
+    只是参数不同的语句得到相同的指纹（用于发现 N+1 查询）
+
+    Args:
+        statement (str): SQL语句
+
+    Returns:
+        str: 指纹
+    """
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    statement = _PARAMETER_LIST.sub('(?)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+
+def repeated_statements(statements, threshold):
+    """
+    找出同一形状出现次数超过阈值的语句
+
+    Args:
+        statements (list): SQL语句
+        threshold (int): 允许的重复次数
+
+    Returns:
+        list: (指纹, 次数)，按次数从多到少排序
+    """
+    counts = Counter(fingerprint(statement) for statement in statements)
+    return [(shape, count) for shape, count in counts.most_common() if count > threshold]
+
+
+class QueryCounter:
+    """
+    记录一段代码执行期间发往数据库的SQL语句
+
+    用法::
+
+        with QueryCounter() as counter:
+            client.get('/articles')
+        assert counter.count <= 3
+    """
+
+    def __init__(self, engine=None):
+        """
+        Args:
+            engine: 数据库引擎，默认使用当前应用的引擎
+        """
+        self._engine = engine
+        self.statements = []
+
+    @property
+    def count(self):
+        """已执行的语句数量"""
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        if self._engine is None:
+            self._engine = db.engine
+        event.listen(self._engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        event.remove(self._engine, 'before_cursor_execute', self._record)
+        return False
+
+
+@contextmanager
+def assert_query_budget(max_queries=None, max_repeats=None, engine=None):
+    """
+    断言代码块的SQL语句数量不超过预算，且同一形状的语句重复次数不超过
+    max_repeats（超过说明存在 N+1 查询）
+
+    Args:
+        max_queries (int): 允许的最大语句数量，None表示不限制
+        max_repeats (int): 同一形状语句允许的最大次数，None表示不检查
+        engine: 数据库引擎
+
+    Raises:
+        AssertionError: 超过预算或重复次数时抛出
+    """
+    with QueryCounter(engine) as counter:
+        yield counter
+
+    problems = []
+    if max_queries is not None and counter.count > max_queries:
+        problems.append(f'执行了 {counter.count} 条SQL语句，超过上限 {max_queries}')
+    if max_repeats is not None:
+        for shape, count in repeated_statements(counter.statements, max_repeats):
+            problems.append(f'同一形状的语句执行了 {count} 次（上限 {max_repeats}），可能是 N+1 查询: {shape}')
+    if problems:
+        details = '\n'.join(f'  {i}. {statement}' for i, statement in enumerate(counter.statements, 1))
+        raise AssertionError('\n'.join(problems) + f'\n全部语句:\n{details}')
+
+
+def deferred_columns(*models):
+    """
+    获取模型中延迟加载的列
+
+    Args:
+        *models: 模型类
+
+    Returns:
+        list: "表名.列名" 形式的列名
+    """
+    from sqlalchemy import inspect
+
+    names = []
+    for model in models:
+        mapper = inspect(model)
+        for prop in mapper.column_attrs:
+            if prop.deferred:
+                names.extend(f'{column.table.name}.{column.name}' for column in prop.columns)
+    return names
+
+
+@contextmanager
+def assert_no_deferred_columns(*models, engine=None):
+    """
+    断言代码块执行的SQL语句没有取回模型中延迟加载的列，用于捕获列表页
+    加载大字段的回归
+
+    只检查 SELECT 的结果列（包括连接加载时的表别名），WHERE 条件中引用
+    这些列（例如按正文搜索）不算。
+
+    Args:
+        *models: 模型类
+        engine: 数据库引擎
+
+    Raises:
+        AssertionError: 取回了延迟加载的列时抛出
+    """
+    patterns = {}
+    for name in deferred_columns(*models):
+        table, column = name.split('.')
+        patterns[name] = re.compile(rf'\b{re.escape(table)}(_\d+)?\.{re.escape(column)} AS ')
+
+    with QueryCounter(engine) as counter:
+        yield counter
+
+    offending = []
+    for statement in counter.statements:
+        if not statement.lstrip().upper().startswith('SELECT'):
+            continue
+        selected = re.split(r'\sWHERE\s', statement, maxsplit=1)[0]
+        found = [name for name, pattern in patterns.items() if pattern.search(selected)]
+        if found:
+            offending.append((', '.join(found), statement))
+    if offending:
+        details = '\n'.join(f'  [{found}] {statement}' for found, statement in offending)
+        raise AssertionError(f'取回了延迟加载的列:\n{details}')
@@ -0,0 +1,57 @@
+"""
+读写分离会话
+Read/Write Routing Session
+
+在当前请求被标记为只读（走从库）时，把 SELECT 语句发往从库，其余语句
+（flush、INSERT/UPDATE/DELETE、原始SQL）以及同一会话中发生写入之后的
+所有查询都发往主库，保证本请求内“写后读”一致。
+"""
+import time
+from flask import current_app, g, has_request_context, session as http_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+
+def _replica_for_request():
+    """获取当前请求使用的从库引擎，同一请求内固定使用同一个从库"""
+    if not has_request_context() or g.get('db_route') != 'replica':
+        return None
+    if 'db_replica' not in g:
+        replicas = current_app.extensions.get('replicas')
+        g.db_replica = replicas.choose() if replicas is not None else None
+    return g.db_replica
+
+
+class RoutingSession(Session):
+    """
+    按请求路由到主库或从库的会话
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and clause is not None:
+            if getattr(clause, 'is_dml', False):
+                self.info['wrote'] = True
+            elif (getattr(clause, 'is_select', False)
+                    and not self._flushing
+                    and not self.info.get('wrote')):
+                engine = _replica_for_request()
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(session_, flush_context):
+    session_.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _stick_to_primary(session_):
+    """
+    提交写入后，在从库追上之前让该用户的后续请求继续读主库
+    """
+    if not session_.info.get('wrote') or not has_request_context():
+        return
+    sticky = current_app.config.get('REPLICA_STICKY_SECONDS', 0)
+    if sticky and current_app.extensions.get('replicas') is not None:
+        http_session['_primary_until'] = time.time() + sticky
@@ -0,0 +1,125 @@
+"""
+文章内容派生工具
+Article Content Derivation Utilities
+
+保存文章时从正文计算纯文本摘录、字数和阅读时长，列表页直接读取这些
+字段而不必加载正文。正则表达式在模块加载时编译一次。
+"""
+import html
+import math
+import re
+
+# 摘录长度（与 articles.excerpt 列长度匹配，含省略号）
+EXCERPT_LENGTH = 200
+
+# 阅读速度：每分钟字数（中日韩文字按字计，其他语言按词计）
+READING_SPEED = 300
+
+# 整段移除的标签（脚本、样式等不显示为正文的内容）
+_HIDDEN_BLOCK_PATTERN = re.compile(
+    r'<(script|style|template|noscript)\b[^>]*>.*?</\1\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+_COMMENT_PATTERN = re.compile(r'<!--.*?-->', re.DOTALL)
+# 块级标签替换为空白，避免相邻段落的文字粘连
+_BLOCK_TAG_PATTERN = re.compile(
+    r'</?(p|div|br|li|ul|ol|h[1-6]|blockquote|pre|tr|td|th|table|section|article|hr)\b[^>]*>',
+    re.IGNORECASE
+)
+_TAG_PATTERN = re.compile(r'<[^>]*>')
+_SPACE_PATTERN = re.compile(r'\s+')
+_WORD_PATTERN = re.compile(
+    r'[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]'
+    r'|[^\s぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]+'
+)
+
+
+def html_to_text(content):
+    """
+    将正文转换为纯文本
+
+    移除脚本、样式、注释和标签，解码HTML实体并合并空白。
+
+    Args:
+        content (str): 正文（可包含HTML）
+
+    Returns:
+        str: 纯文本
+    """
+    if not content:
+        return ''
+    text = _HIDDEN_BLOCK_PATTERN.sub(' ', content)
+    text = _COMMENT_PATTERN.sub(' ', text)
+    text = _BLOCK_TAG_PATTERN.sub(' ', text)
+    text = _TAG_PATTERN.sub('', text)
+    return _SPACE_PATTERN.sub(' ', html.unescape(text)).strip()
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """
+    截取纯文本摘录
+
+    超出长度时在最后一个空白处截断（找不到合适的空白时按字截断），
+    并追加省略号。
+
+    Args:
+        text (str): 纯文本
+        length (int): 最大长度（不含省略号）
+
+    Returns:
+        str: 摘录
+    """
+    if len(text) <= length:
+        return text
+    cut = text[:length]
+    boundary = cut.rfind(' ')
+    if boundary > length * 0.6:
+        cut = cut[:boundary]
+    return cut.rstrip(' ,.;:，。；：、') + '...'
+
+
+def count_words(text):
+    """
+    统计字数（中日韩文字每字计一，其他语言按空白分隔的词计数）
+
+    Args:
+        text (str): 纯文本
+
+    Returns:
+        int: 字数
+    """
+    return sum(1 for _ in _WORD_PATTERN.finditer(text))
+
+
+def reading_time(word_count, speed=READING_SPEED):
+    """
+    估算阅读时长
+
+    Args:
+        word_count (int): 字数
+        speed (int): 每分钟字数
+
+    Returns:
+        int: 分钟数（至少为1）
+    """
+    return max(1, math.ceil(word_count / speed))
+
+
+def derive_content(content, excerpt_length=EXCERPT_LENGTH):
+    """
+    从正文计算摘录、字数和阅读时长
+
+    Args:
+        content (str): 正文
+        excerpt_length (int): 摘录长度
+
+    Returns:
+        dict: excerpt、word_count、reading_time
+    """
+    text = html_to_text(content)
+    words = count_words(text)
+    return {
+        'excerpt': make_excerpt(text, excerpt_length),
+        'word_count': words,
+        'reading_time': reading_time(words)
+    }
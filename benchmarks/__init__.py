@@ -0,0 +1,14 @@
+"""
+性能基准测试
+Performance Benchmarks
+
+- datagen: 生成合成数据（用户、中英文文章、多层评论线程）
+- runner: 通过 WSGI 测试客户端和本地多进程服务器压测热点路由，
+  统计 p50/p95/p99 延迟、每秒请求数和每个请求的查询数量
+- 结果以 JSON 保存，可与 benchmarks/baselines 中的基线比较
+
+用法::
+
+    python -m benchmarks --save-baseline benchmarks/baselines/default.json
+    python -m benchmarks --compare benchmarks/baselines/default.json
+"""
@@ -0,0 +1,68 @@
+"""
+基准测试命令行入口
+Benchmark Command Line Entry
+
+    python -m benchmarks [--users 50] [--articles 200] [--mode client --mode server]
+                         [--output result.json] [--save-baseline path] [--compare path]
+
+与基线比较发现回归时以状态码 1 退出。
+"""
+import argparse
+import sys
+from benchmarks.runner import (DEFAULT_TOLERANCE, compare_reports, format_report, load_report,
+                               run_benchmark, save_report)
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='压测博客热点路由')
+    parser.add_argument('--users', type=int, default=50, help='用户数量')
+    parser.add_argument('--articles', type=int, default=200, help='文章数量')
+    parser.add_argument('--comments', type=int, default=20, help='每篇文章的评论数量')
+    parser.add_argument('--depth', type=int, default=8, help='评论线程最大深度')
+    parser.add_argument('--requests', type=int, default=200, help='每个场景测量的请求数量')
+    parser.add_argument('--warmup', type=int, default=10, help='每个场景预热的请求数量')
+    parser.add_argument('--mode', action='append', choices=('client', 'server'),
+                        help='压测方式（可重复指定），默认两种都执行')
+    parser.add_argument('--concurrency', type=int, default=8, help='server 方式的并发线程数量')
+    parser.add_argument('--workers', type=int, default=4, help='server 方式的 worker 进程数量')
+    parser.add_argument('--seed', type=int, default=2024, help='数据生成的随机种子')
+    parser.add_argument('--database-url', help='数据库地址（数据会被清空），默认使用临时 SQLite 文件')
+    parser.add_argument('--output', help='保存本次结果的 JSON 文件')
+    parser.add_argument('--save-baseline', help='将本次结果保存为基线')
+    parser.add_argument('--compare', help='与指定基线比较')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='允许的变化比例')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    执行压测并输出结果
+
+    Returns:
+        int: 退出状态码
+    """
+    args = parse_args(argv)
+    report = run_benchmark(users=args.users, articles=args.articles, comments_per_article=args.comments,
+                           max_depth=args.depth, requests=args.requests, warmup=args.warmup,
+                           modes=tuple(args.mode or ('client', 'server')), concurrency=args.concurrency,
+                           workers=args.workers, seed=args.seed, database_url=args.database_url)
+    print(format_report(report))
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            save_report(report, path)
+            print(f'结果已保存: {path}')
+
+    if args.compare:
+        regressions = compare_reports(report, load_report(args.compare), args.tolerance)
+        for mode, name, metric, old, new in regressions:
+            print(f'回归 [{mode}] {name} {metric}: {old} -> {new}')
+        if regressions:
+            return 1
+        print('与基线相比没有回归')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
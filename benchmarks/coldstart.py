@@ -0,0 +1,178 @@
+"""
+冷启动基准测试
+Cold-Start Benchmark
+
+在全新的 Python 进程中测量应用启动耗时和各页面的首次请求耗时，比较
+模板缓存的三种配置:
+
+- default: 不使用字节码缓存，首次渲染时编译模板（改动前的行为）
+- bytecode_cache: 使用 ``flask templates compile`` 预编译的字节码缓存
+- bytecode_cache_preload: 使用字节码缓存并在启动时预加载全部模板
+
+用法::
+
+    python -m benchmarks.coldstart [--repeat 7] [--save-baseline benchmarks/baselines/coldstart.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = {
+    'default': {'TEMPLATE_BYTECODE_CACHE': False, 'TEMPLATE_PRELOAD': False},
+    'bytecode_cache': {'TEMPLATE_BYTECODE_CACHE': True, 'TEMPLATE_PRELOAD': False},
+    'bytecode_cache_preload': {'TEMPLATE_BYTECODE_CACHE': True, 'TEMPLATE_PRELOAD': True},
+}
+
+# 首次请求的页面（{article_id} 替换为一篇已发布文章的ID）
+ROUTES = ('/', '/articles', '/articles/{article_id}', '/auth/login', '/auth/register')
+
+
+def prepare(directory):
+    """
+    创建基准数据库并预编译模板
+
+    Args:
+        directory (str): 工作目录
+
+    Returns:
+        dict: 数据库地址、模板缓存目录和文章ID
+    """
+    from app import create_app, db
+    from app.services.migrations import upgrade
+    from app.services.templates import precompile_templates
+    from benchmarks.datagen import generate_dataset
+
+    database_url = f'sqlite:///{os.path.join(directory, "coldstart.db")}'
+    cache_dir = os.path.join(directory, 'jinja_cache')
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': database_url})
+    with app.app_context():
+        upgrade()
+        dataset = generate_dataset(users=5, articles=20, comments_per_article=10, max_depth=4)
+        db.session.remove()
+        db.engine.dispose()
+    compiled, _, errors = precompile_templates(app, cache_dir)
+    if errors:
+        raise RuntimeError(f'模板编译失败: {errors}')
+    return {'database_url': database_url, 'cache_dir': cache_dir, 'article_id': dataset['article_ids'][0],
+            'templates': len(compiled)}
+
+
+def measure_child(settings):
+    """
+    子进程：导入应用、创建应用并依次发送首次请求
+
+    Args:
+        settings (dict): 模式配置、数据库地址、缓存目录和文章ID
+
+    Returns:
+        dict: 各阶段耗时（毫秒）
+    """
+    started = time.perf_counter()
+    from app import create_app
+    imported = time.perf_counter()
+
+    overrides = dict(MODES[settings['mode']], SQLALCHEMY_DATABASE_URI=settings['database_url'],
+                     TEMPLATE_CACHE_DIR=settings['cache_dir'], TEMPLATES_AUTO_RELOAD=False)
+    app = create_app('testing', overrides)
+    created = time.perf_counter()
+
+    client = app.test_client()
+    first_requests = {}
+    for route in ROUTES:
+        path = route.format(article_id=settings['article_id'])
+        begin = time.perf_counter()
+        response = client.get(path)
+        response.get_data()
+        if response.status_code != 200:
+            raise RuntimeError(f'GET {path} 返回 {response.status_code}')
+        first_requests[route] = (time.perf_counter() - begin) * 1000
+    finished = time.perf_counter()
+
+    return {
+        'import_ms': (imported - started) * 1000,
+        'create_app_ms': (created - imported) * 1000,
+        'first_requests_ms': first_requests,
+        'ready_ms': (finished - imported) * 1000,  # 创建应用并完成全部首次请求
+    }
+
+
+def _run_child(settings):
+    result = subprocess.run([sys.executable, '-m', 'benchmarks.coldstart', '--child', json.dumps(settings)],
+                            capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _median(values):
+    return round(statistics.median(values), 3)
+
+
+def run_coldstart(repeat=7):
+    """
+    对每种模式启动 repeat 个新进程并取中位数
+
+    Args:
+        repeat (int): 每种模式的进程数量
+
+    Returns:
+        dict: meta 和各模式的中位数耗时
+    """
+    report = {'meta': {'repeat': repeat, 'python': sys.version.split()[0]}, 'modes': {}}
+    with tempfile.TemporaryDirectory(prefix='blog-coldstart-') as directory:
+        prepared = prepare(directory)
+        report['meta']['templates'] = prepared['templates']
+        for mode in MODES:
+            settings = dict(prepared, mode=mode)
+            runs = [_run_child(settings) for _ in range(repeat)]
+            report['modes'][mode] = {
+                'import_ms': _median([run['import_ms'] for run in runs]),
+                'create_app_ms': _median([run['create_app_ms'] for run in runs]),
+                'first_requests_ms': {route: _median([run['first_requests_ms'][route] for run in runs])
+                                      for route in ROUTES},
+                'ready_ms': _median([run['ready_ms'] for run in runs]),
+            }
+    return report
+
+
+def format_report(report):
+    """将结果格式化为文本表格"""
+    routes = list(ROUTES)
+    header = f'{"mode":<24}{"create_app":>12}' + ''.join(f'{route[:14]:>16}' for route in routes) + f'{"ready":>10}'
+    lines = [header]
+    for mode, stats in report['modes'].items():
+        lines.append(f'{mode:<24}{stats["create_app_ms"]:>12.1f}'
+                     + ''.join(f'{stats["first_requests_ms"][route]:>16.1f}' for route in routes)
+                     + f'{stats["ready_ms"]:>10.1f}')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.coldstart', description='测量冷启动首次请求耗时')
+    parser.add_argument('--repeat', type=int, default=7, help='每种模式启动的进程数量')
+    parser.add_argument('--output', help='保存结果的 JSON 文件')
+    parser.add_argument('--save-baseline', help='将结果保存为基线')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure_child(json.loads(args.child))))
+        return 0
+
+    from benchmarks.runner import save_report
+    report = run_coldstart(args.repeat)
+    print(format_report(report))
+    for path in (args.output, args.save_baseline):
+        if path:
+            save_report(report, path)
+            print(f'结果已保存: {path}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+基准测试数据生成
+Benchmark Data Generator
+
+按固定随机种子生成可重复的数据集:
+- N 个用户（第一个用户为管理员），密码哈希只计算一次
+- M 篇中文、英文或中英混排的文章，发布时间分散在过去一段时间内
+- 每篇文章若干条评论，其中一部分沿上一条评论向下回复，形成多层线程
+
+数据通过ORM写入，评论路径、冗余计数和搜索索引由模型事件维护，
+与真实写入路径一致。
+"""
+import random
+from datetime import datetime, timedelta
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models.admin import Admin
+from app.models.article import Article
+from app.models.category import Category
+from app.models.comment import Comment
+from app.models.user import User
+
+BENCH_PASSWORD = 'benchpass'
+ADMIN_USERNAME = 'bench_admin'
+
+CHINESE_WORDS = (
+    '数据库', '索引', '缓存', '查询', '性能', '服务器', '博客', '文章', '评论', '用户',
+    '分页', '线程', '进程', '事务', '连接池', '部署', '监控', '日志', '架构', '设计',
+    '算法', '优化', '延迟', '吞吐量', '并发', '存储', '网络', '接口', '测试', '版本',
+    '我们', '这个', '可以', '需要', '通过', '已经', '如果', '因为', '所以', '然后',
+)
+
+ENGLISH_WORDS = (
+    'database', 'index', 'cache', 'query', 'latency', 'server', 'request', 'response',
+    'thread', 'process', 'pool', 'worker', 'template', 'session', 'article', 'comment',
+    'search', 'render', 'deploy', 'monitor', 'metric', 'trace', 'python', 'flask',
+    'the', 'a', 'with', 'for', 'when', 'we', 'this', 'that', 'is', 'are', 'into',
+    'fast', 'slow', 'simple', 'large', 'small', 'every', 'page', 'list', 'detail',
+)
+
+CATEGORY_NAMES = (('技术', 'tech'), ('生活', 'life'), ('随笔', 'essay'), ('Python', 'python'),
+                  ('数据库', 'database'))
+
+# 搜索场景使用的关键词（两种语言各一个，均出现在生成的文本中）
+SEARCH_KEYWORDS = ('缓存', 'database')
+
+
+class TextGenerator:
+    """
+    生成中文、英文或中英混排的文本
+
+    Args:
+        rng (random.Random): 随机数生成器
+    """
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def sentence(self, language):
+        """
+        生成一个句子
+
+        Args:
+            language (str): 'zh'、'en' 或 'mixed'
+
+        Returns:
+            str: 句子
+        """
+        if language == 'mixed':
+            language = self.rng.choice(('zh', 'en'))
+        count = self.rng.randint(6, 16)
+        if language == 'zh':
+            return ''.join(self.rng.choices(CHINESE_WORDS, k=count)) + '。'
+        words = self.rng.choices(ENGLISH_WORDS, k=count)
+        return ' '.join(words).capitalize() + '.'
+
+    def paragraph(self, language, sentences=None):
+        """生成一个段落"""
+        sentences = sentences or self.rng.randint(3, 6)
+        separator = '' if language == 'zh' else ' '
+        return separator.join(self.sentence(language) for _ in range(sentences))
+
+    def document(self, language, paragraphs):
+        """生成由多个 <p> 段落组成的正文"""
+        return '\n'.join(f'<p>{self.paragraph(language)}</p>' for _ in range(paragraphs))
+
+    def title(self, language):
+        """生成标题"""
+        return self.sentence(language).rstrip('。.')[:120]
+
+
+def _choose_parent(rng, comments, max_depth):
+    """
+    选择新评论的父评论：一半概率回复上一条评论（形成深层线程），
+    四分之一概率回复任意评论，其余为顶级评论
+    """
+    if not comments:
+        return None
+    roll = rng.random()
+    if roll < 0.5:
+        candidate = comments[-1]
+    elif roll < 0.75:
+        candidate = rng.choice(comments)
+    else:
+        return None
+    return candidate if candidate[1] < max_depth else None
+
+
+def generate_dataset(users=50, articles=200, comments_per_article=20, max_depth=8,
+                     paragraphs=6, seed=2024, batch_size=50):
+    """
+    在当前应用的数据库中生成基准测试数据（需要在应用上下文中调用）
+
+    Args:
+        users (int): 用户数量
+        articles (int): 文章数量
+        comments_per_article (int): 每篇已发布文章的评论数量
+        max_depth (int): 评论线程的最大深度
+        paragraphs (int): 每篇文章的段落数量
+        seed (int): 随机种子
+        batch_size (int): 每次提交的文章数量
+
+    Returns:
+        dict: 数据集摘要，包括管理员账号、已发布文章ID、评论ID和搜索关键词
+    """
+    rng = random.Random(seed)
+    text = TextGenerator(rng)
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+
+    categories = [Category(name=name, slug=slug) for name, slug in CATEGORY_NAMES]
+    db.session.add_all(categories)
+
+    authors = []
+    for index in range(users):
+        username = ADMIN_USERNAME if index == 0 else f'bench_user_{index}'
+        authors.append(User(username=username, email=f'{username}@bench.local',
+                            password_hash=password_hash, bio=text.paragraph('mixed', 2)))
+    db.session.add_all(authors)
+    db.session.flush()
+    db.session.add(Admin(user_id=authors[0].id))
+    db.session.commit()
+
+    languages = ('zh', 'en', 'mixed')
+    now = datetime.utcnow()
+    published_ids = []
+    comment_ids = []
+    pending = []
+    for index in range(articles):
+        language = languages[index % len(languages)]
+        status = 'draft' if index % 10 == 9 else 'published'
+        article = Article(title=text.title(language),
+                          content=text.document(language, paragraphs),
+                          author_id=rng.choice(authors).id,
+                          category_id=rng.choice(categories).id,
+                          status=status)
+        if status == 'published':
+            article.published_at = now - timedelta(minutes=index * 7 + rng.randint(0, 6))
+        db.session.add(article)
+        pending.append(article)
+
+        if len(pending) >= batch_size or index == articles - 1:
+            db.session.flush()
+            for item in pending:
+                if item.status == 'published':
+                    published_ids.append(item.id)
+                    comment_ids.extend(_add_comments(rng, text, item, authors,
+                                                     comments_per_article, max_depth))
+            db.session.commit()
+            pending = []
+
+    return {
+        'users': users,
+        'articles': articles,
+        'published_articles': len(published_ids),
+        'comments': len(comment_ids),
+        'max_depth': max_depth,
+        'seed': seed,
+        'admin': {'username': ADMIN_USERNAME, 'password': BENCH_PASSWORD},
+        'article_ids': published_ids,
+        'comment_ids': comment_ids,
+        'search_keywords': list(SEARCH_KEYWORDS),
+    }
+
+
+def _add_comments(rng, text, article, authors, count, max_depth):
+    """
+    为文章生成评论线程
+
+    Returns:
+        list: 评论ID
+    """
+    comments = []  # (Comment, depth)
+    for _ in range(count):
+        parent = _choose_parent(rng, comments, max_depth)
+        comment = Comment(content=text.paragraph('mixed', rng.randint(1, 3)),
+                          author_id=rng.choice(authors).id,
+                          article_id=article.id)
+        depth = 0
+        if parent is not None:
+            comment.parent = parent[0]
+            depth = parent[1] + 1
+        db.session.add(comment)
+        comments.append((comment, depth))
+    db.session.flush()
+    return [comment.id for comment, _ in comments]
@@ -0,0 +1,461 @@
+"""
+基准测试运行器
+Benchmark Runner
+
+两种压测方式:
+- client: 使用 WSGI 测试客户端逐个发送请求，测量单请求延迟并统计每个
+  请求执行的SQL数量（不含网络开销，便于发现查询数量回归）
+- server: 在本地启动多个预先 fork 的 worker 进程共享同一个监听端口，
+  用多个并发线程通过 HTTP 发送请求，测量并发下的延迟和吞吐量
+
+结果按场景汇总为 p50/p95/p99 延迟（毫秒）、每秒请求数和平均查询数，
+可保存为 JSON 并与基线比较。
+"""
+import http.cookiejar
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import socket
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy.engine import make_url
+from werkzeug.serving import WSGIRequestHandler, make_server
+from app import create_app, db
+from app.services.migrations import upgrade
+from app.services.view_counter import view_counter
+from app.utils.query_counter import QueryCounter
+from benchmarks.datagen import generate_dataset
+
+# 与基线比较时允许的变化比例
+DEFAULT_TOLERANCE = 0.25
+
+# 延迟低于该值（毫秒）时不判定为回归，避免微小抖动触发
+MIN_LATENCY_DELTA_MS = 1.0
+
+
+class BenchmarkError(RuntimeError):
+    """压测请求返回了非预期的状态码"""
+
+
+class Scenario:
+    """
+    一个压测场景
+
+    Args:
+        name (str): 场景名称
+        paths (iterable): 请求路径（循环使用）
+        admin (bool): 是否需要以管理员身份请求
+    """
+
+    def __init__(self, name, paths, admin=False):
+        self.name = name
+        self.paths = list(paths)
+        self.admin = admin
+
+    def iter_paths(self):
+        """无限循环返回请求路径"""
+        return itertools.cycle(self.paths)
+
+    def __repr__(self):
+        return f'<Scenario {self.name}>'
+
+
+def default_scenarios(dataset, variants=20):
+    """
+    构建热点路由的压测场景
+
+    Args:
+        dataset (dict): generate_dataset() 返回的数据集摘要
+        variants (int): 每个带ID的场景轮换使用的不同ID数量
+
+    Returns:
+        list: Scenario 列表
+    """
+    article_ids = dataset['article_ids'][:variants]
+    comment_ids = dataset['comment_ids'][::max(1, len(dataset['comment_ids']) // variants)][:variants]
+    keywords = [urllib.parse.quote(keyword) for keyword in dataset['search_keywords']]
+    return [
+        Scenario('index', ['/']),
+        Scenario('article_list', ['/articles', '/articles?page=2']),
+        Scenario('article_detail', [f'/articles/{id}' for id in article_ids]),
+        Scenario('search', [f'/articles?keyword={keyword}' for keyword in keywords]),
+        Scenario('comment_list_api', [f'/api/articles/{id}/comments' for id in article_ids]),
+        Scenario('comment_api', [f'/api/comments/{id}' for id in comment_ids]),
+        Scenario('admin_users', ['/admin/users'], admin=True),
+        Scenario('admin_articles', ['/admin/articles'], admin=True),
+        Scenario('admin_comments', ['/admin/comments'], admin=True),
+    ]
+
+
+def percentile(values, pct):
+    """
+    计算百分位数（线性插值）
+
+    Args:
+        values (list): 数值
+        pct (float): 百分位，0-100
+
+    Returns:
+        float: 百分位数，没有数值时返回None
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(latencies, elapsed, queries=None):
+    """
+    汇总一个场景的测量结果
+
+    Args:
+        latencies (list): 每个请求的耗时（秒）
+        elapsed (float): 全部请求的总耗时（秒）
+        queries (list): 每个请求执行的SQL数量，未统计时为None
+
+    Returns:
+        dict: 延迟（毫秒）、吞吐量和查询数量
+    """
+    milliseconds = [latency * 1000 for latency in latencies]
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(milliseconds, 50), 3),
+        'p95_ms': round(percentile(milliseconds, 95), 3),
+        'p99_ms': round(percentile(milliseconds, 99), 3),
+        'mean_ms': round(sum(milliseconds) / len(milliseconds), 3),
+        'rps': round(len(latencies) / elapsed, 2) if elapsed > 0 else None,
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+        'max_queries': max(queries) if queries else None,
+    }
+
+
+def _check_status(scenario, path, status):
+    if status != 200:
+        raise BenchmarkError(f'{scenario.name}: GET {path} 返回 {status}')
+
+
+def _login(client, credentials):
+    response = client.post('/auth/login', data=credentials)
+    if response.status_code not in (200, 302):
+        raise BenchmarkError(f'管理员登录失败: {response.status_code}')
+
+
+def run_client(app, scenarios, credentials, requests=200, warmup=10):
+    """
+    使用 WSGI 测试客户端压测
+
+    Args:
+        app: Flask应用实例
+        scenarios (list): Scenario 列表
+        credentials (dict): 管理员用户名和密码
+        requests (int): 每个场景测量的请求数量
+        warmup (int): 每个场景预热的请求数量（不计入结果）
+
+    Returns:
+        dict: 场景名称 -> 汇总结果
+    """
+    with app.app_context():
+        engine = db.engine
+    anonymous = app.test_client()
+    admin = app.test_client()
+    _login(admin, credentials)
+
+    results = {}
+    for scenario in scenarios:
+        client = admin if scenario.admin else anonymous
+        paths = scenario.iter_paths()
+        for _ in range(warmup):
+            path = next(paths)
+            _check_status(scenario, path, client.get(path).status_code)
+
+        latencies = []
+        queries = []
+        started = time.perf_counter()
+        for _ in range(requests):
+            path = next(paths)
+            with QueryCounter(engine) as counter:
+                begin = time.perf_counter()
+                response = client.get(path)
+                response.get_data()  # 读取流式响应，使生成器中的查询计入本请求
+                latencies.append(time.perf_counter() - begin)
+            _check_status(scenario, path, response.status_code)
+            queries.append(counter.count)
+        results[scenario.name] = summarize(latencies, time.perf_counter() - started, queries)
+    return results
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    """不输出访问日志的请求处理器"""
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def _serve(app, fd):
+    """worker 进程入口：在继承的监听套接字上处理请求"""
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, request_handler=_QuietRequestHandler, fd=fd)
+    server.serve_forever()
+
+
+class LocalServer:
+    """
+    本地多进程HTTP服务器（预先 fork 的 worker 共享同一个监听套接字）
+
+    不支持 fork 的平台上退化为单进程多线程服务器。
+
+    Args:
+        app: Flask应用实例
+        workers (int): worker 进程数量
+    """
+
+    def __init__(self, app, workers=4):
+        self.app = app
+        self.workers = workers
+        self._socket = None
+        self._processes = []
+        self._server = None
+
+    @property
+    def base_url(self):
+        host, port = self._socket.getsockname()[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(('127.0.0.1', 0))
+        self._socket.listen(128)
+
+        # 子进程不能复用父进程的数据库连接
+        with self.app.app_context():
+            db.engine.dispose()
+
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+            for _ in range(self.workers):
+                process = context.Process(target=_serve, args=(self.app, self._socket.fileno()), daemon=True)
+                process.start()
+                self._processes.append(process)
+        else:
+            self._server = make_server('127.0.0.1', 0, self.app, threaded=True,
+                                       request_handler=_QuietRequestHandler, fd=self._socket.fileno())
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            process.join(timeout=5)
+        if self._server is not None:
+            self._server.shutdown()
+        self._socket.close()
+        return False
+
+
+def _http_opener(base_url, credentials=None):
+    """创建 urllib opener；提供管理员账号时先登录并保存会话 Cookie"""
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    if credentials:
+        data = urllib.parse.urlencode(credentials).encode()
+        opener.open(f'{base_url}/auth/login', data=data, timeout=30).read()
+    return opener
+
+
+def _fetch(opener, url):
+    """发送一个GET请求，返回 (状态码, 耗时秒数)"""
+    begin = time.perf_counter()
+    try:
+        with opener.open(url, timeout=30) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - begin
+
+
+def run_server(app, scenarios, credentials, requests=200, warmup=10, concurrency=8, workers=4):
+    """
+    启动本地多进程服务器并发压测
+
+    Args:
+        app: Flask应用实例（数据库必须是多个进程可共享的文件或服务器数据库）
+        scenarios (list): Scenario 列表
+        credentials (dict): 管理员用户名和密码
+        requests (int): 每个场景测量的请求数量
+        warmup (int): 每个场景预热的请求数量
+        concurrency (int): 并发发送请求的线程数量
+        workers (int): 服务器 worker 进程数量
+
+    Returns:
+        dict: 场景名称 -> 汇总结果（不统计查询数量）
+    """
+    results = {}
+    with LocalServer(app, workers) as server:
+        anonymous = _http_opener(server.base_url)
+        admin = _http_opener(server.base_url, credentials)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for scenario in scenarios:
+                opener = admin if scenario.admin else anonymous
+                paths = scenario.iter_paths()
+                urls = [server.base_url + next(paths) for _ in range(warmup + requests)]
+                for url in urls[:warmup]:
+                    _fetch(opener, url)
+
+                started = time.perf_counter()
+                responses = list(executor.map(lambda url: _fetch(opener, url), urls[warmup:]))
+                elapsed = time.perf_counter() - started
+                for url, (status, _) in zip(urls[warmup:], responses):
+                    _check_status(scenario, url, status)
+                results[scenario.name] = summarize([latency for _, latency in responses], elapsed)
+    return results
+
+
+def run_benchmark(users=50, articles=200, comments_per_article=20, max_depth=8, requests=200,
+                  warmup=10, modes=('client', 'server'), concurrency=8, workers=4, seed=2024,
+                  database_url=None):
+    """
+    生成数据集并执行压测
+
+    Args:
+        users (int): 用户数量
+        articles (int): 文章数量
+        comments_per_article (int): 每篇文章的评论数量
+        max_depth (int): 评论线程最大深度
+        requests (int): 每个场景测量的请求数量
+        warmup (int): 每个场景预热的请求数量
+        modes (tuple): 压测方式，'client' 和/或 'server'
+        concurrency (int): server 方式的并发线程数量
+        workers (int): server 方式的 worker 进程数量
+        seed (int): 数据生成的随机种子
+        database_url (str): 数据库地址，默认使用临时 SQLite 文件（数据会被清空）
+
+    Returns:
+        dict: 包含 meta 和各压测方式结果的字典
+    """
+    with tempfile.TemporaryDirectory(prefix='blog-bench-') as directory:
+        database_url = database_url or f'sqlite:///{os.path.join(directory, "bench.db")}'
+        app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': database_url})
+
+        with app.app_context():
+            db.drop_all()
+            upgrade()
+            started = time.perf_counter()
+            dataset = generate_dataset(users=users, articles=articles,
+                                       comments_per_article=comments_per_article,
+                                       max_depth=max_depth, seed=seed)
+            seed_seconds = time.perf_counter() - started
+            db.session.remove()
+
+        scenarios = default_scenarios(dataset)
+        report = {
+            'meta': {
+                'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'database': make_url(database_url).get_backend_name(),
+                'dataset': {key: dataset[key] for key in ('users', 'articles', 'published_articles',
+                                                          'comments', 'max_depth', 'seed')},
+                'seed_seconds': round(seed_seconds, 2),
+                'requests': requests,
+                'warmup': warmup,
+                'concurrency': concurrency,
+                'workers': workers,
+            }
+        }
+        if 'client' in modes:
+            report['client'] = run_client(app, scenarios, dataset['admin'], requests, warmup)
+        if 'server' in modes:
+            report['server'] = run_server(app, scenarios, dataset['admin'], requests, warmup,
+                                          concurrency, workers)
+
+        # 临时数据库删除前写回缓冲的浏览次数
+        view_counter.shutdown(app)
+        with app.app_context():
+            db.engine.dispose()
+    return report
+
+
+def save_report(report, path):
+    """将结果保存为 JSON 文件"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load_report(path):
+    """读取 JSON 结果文件"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_reports(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    与基线比较，找出回归的指标
+
+    延迟（p50/p95/p99）增加超过 tolerance 比例、吞吐量下降超过 tolerance
+    比例或每个请求的查询数量增加时视为回归。
+
+    Args:
+        current (dict): 本次结果
+        baseline (dict): 基线结果
+        tolerance (float): 允许的变化比例
+
+    Returns:
+        list: 回归描述，每项为 (压测方式, 场景, 指标, 基线值, 本次值)
+    """
+    regressions = []
+    for mode in ('client', 'server'):
+        for name, before in baseline.get(mode, {}).items():
+            after = current.get(mode, {}).get(name)
+            if after is None:
+                continue
+            for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+                old, new = before.get(metric), after.get(metric)
+                if old is not None and new is not None and \
+                        new > old * (1 + tolerance) and new - old > MIN_LATENCY_DELTA_MS:
+                    regressions.append((mode, name, metric, old, new))
+            old, new = before.get('rps'), after.get('rps')
+            if old and new is not None and new < old * (1 - tolerance):
+                regressions.append((mode, name, 'rps', old, new))
+            old, new = before.get('queries_per_request'), after.get('queries_per_request')
+            if old is not None and new is not None and new > old:
+                regressions.append((mode, name, 'queries_per_request', old, new))
+    return regressions
+
+
+def format_report(report):
+    """
+    将结果格式化为文本表格
+
+    Returns:
+        str: 表格文本
+    """
+    lines = []
+    for mode in ('client', 'server'):
+        if mode not in report:
+            continue
+        lines.append(f'[{mode}]')
+        lines.append(f'{"scenario":<20}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"req/s":>10}{"queries":>9}')
+        for name, stats in report[mode].items():
+            queries = stats['queries_per_request']
+            lines.append(f'{name:<20}{stats["p50_ms"]:>10.2f}{stats["p95_ms"]:>10.2f}{stats["p99_ms"]:>10.2f}'
+                         f'{stats["rps"] or 0:>10.1f}{"-" if queries is None else queries:>9}')
+        lines.append('')
+    return '\n'.join(lines)
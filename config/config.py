@@ -8,6 +8,27 @@ from dotenv import load_dotenv
 # 加载环境变量
 load_dotenv()
 
+def pool_options(pool_size, max_overflow, pool_timeout=30, pool_recycle=1800):
+    """
+    构建连接池配置，环境变量优先于各配置类的默认值
+    
+    Args:
+        pool_size (int): 常驻连接数（DB_POOL_SIZE）
+        max_overflow (int): 突发时允许额外创建的连接数（DB_MAX_OVERFLOW）
+        pool_timeout (int): 等待空闲连接的秒数（DB_POOL_TIMEOUT）
+        pool_recycle (int): 连接最长复用秒数，应小于 MySQL wait_timeout（DB_POOL_RECYCLE）
+        
+    Returns:
+        dict: SQLALCHEMY_ENGINE_OPTIONS
+    """
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE') or pool_size),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW') or max_overflow),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT') or pool_timeout),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE') or pool_recycle),
+        'pool_pre_ping': (os.environ.get('DB_POOL_PRE_PING') or 'true').lower() in ('1', 'true', 'yes', 'on')
+    }
+
 class Config:
     """基础配置类"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
@@ -24,10 +45,84 @@ class Config:
         f"{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = pool_options(pool_size=10, max_overflow=20)
+    
+    # 只读从库配置（多个地址以逗号分隔，为空时所有查询使用主库）
+    SQLALCHEMY_REPLICA_URIS = [
+        uri.strip() for uri in (os.environ.get('DATABASE_REPLICA_URLS') or '').split(',') if uri.strip()
+    ]
+    REPLICA_READ_BLUEPRINTS = ('article',)  # GET请求默认读从库的蓝图
+    REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG') or 5)  # 超过该延迟（秒）时退回主库
+    REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('REPLICA_LAG_CHECK_INTERVAL') or 1)
+    REPLICA_HEARTBEAT_INTERVAL = float(os.environ.get('REPLICA_HEARTBEAT_INTERVAL') or 1)  # 后台写入主库心跳的间隔
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS') or 5)  # 写入后读主库的时长
     
     # 分页配置
     POSTS_PER_PAGE = 10
     COMMENTS_PER_PAGE = 20
+    KEYSET_COUNT_CAP = int(os.environ.get('KEYSET_COUNT_CAP') or 1000)  # 键集分页总数封顶值，0表示不计数
+    
+    # 浏览计数缓冲配置（间隔秒数为0时不启动后台刷新线程）
+    VIEW_COUNT_FLUSH_INTERVAL = float(os.environ.get('VIEW_COUNT_FLUSH_INTERVAL') or 5)
+    VIEW_COUNT_FLUSH_THRESHOLD = int(os.environ.get('VIEW_COUNT_FLUSH_THRESHOLD') or 100)
+    VIEW_COUNT_STORE_PATH = os.environ.get('VIEW_COUNT_STORE_PATH')  # 多worker共享的本地SQLite文件
+    
+    # 匿名页面缓存配置（后端: memory / file / none）
+    PAGE_CACHE_BACKEND = os.environ.get('PAGE_CACHE_BACKEND') or 'memory'
+    PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL') or 60)
+    PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES') or 512)
+    PAGE_CACHE_DIR = os.environ.get('PAGE_CACHE_DIR')  # file 后端的共享目录，默认 instance/page_cache
+    
+    # 登录身份快照缓存（秒，0表示不缓存）
+    IDENTITY_CACHE_TTL = float(os.environ.get('IDENTITY_CACHE_TTL') or 30)
+    IDENTITY_CACHE_MAX_ENTRIES = int(os.environ.get('IDENTITY_CACHE_MAX_ENTRIES') or 1024)
+    
+    # 分类注册表（进程内缓存全部分类，按版本号跨 worker 失效）
+    CATEGORY_REGISTRY_CHECK_INTERVAL = float(os.environ.get('CATEGORY_REGISTRY_CHECK_INTERVAL') or 5)
+    CATEGORY_REGISTRY_MAX_AGE = float(os.environ.get('CATEGORY_REGISTRY_MAX_AGE') or 60)  # 刷新文章数量
+    
+    # 批量删除配置（估算行数超过阈值时在后台删除用户）
+    BULK_DELETE_CHUNK_SIZE = int(os.environ.get('BULK_DELETE_CHUNK_SIZE') or 500)
+    BULK_DELETE_BACKGROUND_THRESHOLD = int(os.environ.get('BULK_DELETE_BACKGROUND_THRESHOLD') or 5000)
+    
+    # 后台任务队列配置（flask jobs worker）
+    JOB_HANDLER_MODULES = ('app.services.bulk_delete', 'app.services.search')
+    JOB_WORKER_CONCURRENCY = int(os.environ.get('JOB_WORKER_CONCURRENCY') or 2)
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL') or 1)
+    JOB_LOCK_TIMEOUT = float(os.environ.get('JOB_LOCK_TIMEOUT') or 600)  # 运行超过此时长视为 worker 已崩溃
+    JOB_RETRY_BASE_DELAY = float(os.environ.get('JOB_RETRY_BASE_DELAY') or 10)
+    JOB_RETRY_MAX_DELAY = float(os.environ.get('JOB_RETRY_MAX_DELAY') or 3600)
+    
+    # 请求级SQL统计（/admin/perf；调试模式或 SQL_DEBUG_HEADER 开启时返回 X-Query-* 响应头）
+    SQL_METRICS_ENABLED = (os.environ.get('SQL_METRICS_ENABLED') or 'true').lower() in ('1', 'true', 'yes', 'on')
+    SQL_DEBUG_HEADER = (os.environ.get('SQL_DEBUG_HEADER') or 'false').lower() in ('1', 'true', 'yes', 'on')
+    SQL_SLOW_STATEMENTS = int(os.environ.get('SQL_SLOW_STATEMENTS') or 5)  # 每个端点保留的最慢语句数量
+    SQL_REPEAT_THRESHOLD = int(os.environ.get('SQL_REPEAT_THRESHOLD') or 5)  # 同形状语句超过此次数视为 N+1
+    
+    # 应用指标（/metrics；多 worker 部署时设置 METRICS_DIR 为各进程共享的目录）
+    METRICS_ENABLED = (os.environ.get('METRICS_ENABLED') or 'true').lower() in ('1', 'true', 'yes', 'on')
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL') or 1)  # 写入进程快照的最短间隔
+    METRICS_ACTIVE_WINDOW = float(os.environ.get('METRICS_ACTIVE_WINDOW') or 300)  # 活跃会话窗口（秒）
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # 设置后抓取需要 Authorization: Bearer <token>
+    METRICS_ALLOWED_IPS = [  # 允许抓取的客户端地址或网段（如 10.0.0.0/8），设置后其他地址返回403
+        ip.strip() for ip in (os.environ.get('METRICS_ALLOWED_IPS') or '').split(',') if ip.strip()
+    ]
+    METRICS_REQUIRE_AUTH = False  # 为True时未配置令牌或地址白名单则不开放 /metrics
+    
+    # 请求追踪（采样率为0时关闭；追踪以 Chrome Trace Event 格式追加写入 TRACE_FILE）
+    TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE') or 0)
+    TRACE_FILE = os.environ.get('TRACE_FILE')  # 默认 instance/traces/trace.json
+    TRACE_MAX_SPANS = int(os.environ.get('TRACE_MAX_SPANS') or 5000)  # 每个请求最多记录的片段数量
+    TRACE_FILTERS = ('nl2br',)  # 记录耗时的模板过滤器
+    
+    # 模板字节码缓存（flask templates compile 预编译；TEMPLATE_PRELOAD 在启动时加载全部模板）
+    TEMPLATE_BYTECODE_CACHE = (os.environ.get('TEMPLATE_BYTECODE_CACHE') or 'false').lower() in ('1', 'true', 'yes', 'on')
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR')  # 默认 instance/jinja_cache
+    TEMPLATE_PRELOAD = (os.environ.get('TEMPLATE_PRELOAD') or 'false').lower() in ('1', 'true', 'yes', 'on')
+    
+    # 数据库迁移版本检查（error: 未升级时返回503；warn: 记录警告；off: 不检查）
+    SCHEMA_REVISION_CHECK = os.environ.get('SCHEMA_REVISION_CHECK') or 'warn'
     
     # 文件上传配置
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
@@ -40,16 +135,32 @@ class DevelopmentConfig(Config):
         f"mysql+pymysql://{Config.MYSQL_USER}:{Config.MYSQL_PASSWORD}@"
         f"{Config.MYSQL_HOST}:{Config.MYSQL_PORT}/blog_system_dev"
     )
+    SQLALCHEMY_ENGINE_OPTIONS = pool_options(pool_size=5, max_overflow=5)
 
 class TestingConfig(Config):
     """测试环境配置"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # 内存SQLite使用单连接池，不支持连接池参数
+    SQLALCHEMY_REPLICA_URIS = []
+    REPLICA_HEARTBEAT_INTERVAL = 0  # 测试中由用例直接写入心跳
     WTF_CSRF_ENABLED = False
+    VIEW_COUNT_FLUSH_INTERVAL = 0
+    VIEW_COUNT_STORE_PATH = None
+    PAGE_CACHE_BACKEND = 'none'
+    SCHEMA_REVISION_CHECK = 'off'  # 测试数据库由 create_all 创建
 
 class ProductionConfig(Config):
     """生产环境配置"""
     DEBUG = False
+    SCHEMA_REVISION_CHECK = os.environ.get('SCHEMA_REVISION_CHECK') or 'error'
+    TEMPLATES_AUTO_RELOAD = False  # 模板只在部署时变化，不检查文件修改时间
+    TEMPLATE_BYTECODE_CACHE = (os.environ.get('TEMPLATE_BYTECODE_CACHE') or 'true').lower() in ('1', 'true', 'yes', 'on')
+    TEMPLATE_PRELOAD = (os.environ.get('TEMPLATE_PRELOAD') or 'true').lower() in ('1', 'true', 'yes', 'on')
+    SQLALCHEMY_ENGINE_OPTIONS = pool_options(pool_size=10, max_overflow=20)
+    METRICS_REQUIRE_AUTH = True  # /metrics 需要配置 METRICS_TOKEN 或 METRICS_ALLOWED_IPS
+    # 请求级SQL统计默认关闭（每条语句都要计算指纹），排查时通过环境变量开启
+    SQL_METRICS_ENABLED = (os.environ.get('SQL_METRICS_ENABLED') or 'false').lower() in ('1', 'true', 'yes', 'on')
 
 # 配置字典
 config = {
@@ -18,9 +18,10 @@ def init_database():
             print("正在删除现有数据库表...")
             db.drop_all()
             
-            # 创建所有表
+            # 执行全部迁移创建数据库表
             print("正在创建数据库表...")
-            db.create_all()
+            from app.services.migrations import upgrade
+            upgrade()
             
             print("数据库初始化完成！")
             return True
@@ -5,6 +5,8 @@ Test Configuration
 import pytest
 from app import create_app, db
 from app.models.user import User
+from app.services.view_counter import view_counter
+from app.utils.query_counter import assert_query_budget
 
 @pytest.fixture
 def app():
@@ -24,6 +26,7 @@ def app():
         db.session.commit()
         
         yield app
+        view_counter.shutdown(app)
         db.drop_all()
 
 @pytest.fixture
@@ -31,6 +34,22 @@ def client(app):
     """创建测试客户端"""
     return app.test_client()
 
+@pytest.fixture
+def query_budget(app):
+    """
+    SQL预算断言：超过语句数量或同形状语句重复次数超过阈值时测试失败
+
+    用法::
+
+        with query_budget(3):
+            client.get('/articles')
+    """
+    def budget(max_queries=None, max_repeats=None):
+        if max_repeats is None:
+            max_repeats = app.config['SQL_REPEAT_THRESHOLD']
+        return assert_query_budget(max_queries, max_repeats)
+    return budget
+
 @pytest.fixture
 def runner(app):
     """创建CLI测试运行器"""
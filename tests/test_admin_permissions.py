@@ -0,0 +1,43 @@
+"""
+测试管理员权限编译
+Test Compiled Admin Permissions
+"""
+import json
+from unittest import mock
+from app.models.admin import Admin
+
+
+def test_checks_do_not_parse_json():
+    """测试权限检查不再解析JSON"""
+    admin = Admin(user_id=1)
+    admin.get_permission_set()
+    with mock.patch('app.models.admin.json.loads') as loads:
+        for _ in range(100):
+            assert admin.can_delete_users()
+            assert not admin.has_permission('system_settings', 'shutdown')
+    loads.assert_not_called()
+
+
+def test_same_role_shares_compiled_set():
+    """测试相同权限文本的实例共享编译结果"""
+    first = Admin(user_id=1)
+    second = Admin(user_id=2)
+    first.permissions = second.permissions = json.dumps(Admin.get_default_permissions())
+    assert first.get_permission_set() is second.get_permission_set()
+
+
+def test_recompiled_after_change():
+    """测试修改权限后重新编译"""
+    admin = Admin(user_id=1, permissions={'comment_management': {'view': True}})
+    assert admin.can_manage_comments()
+    assert not admin.can_delete_comments()
+
+    admin.add_permission('comment_management', 'delete')
+    assert admin.can_delete_comments()
+
+    admin.remove_permission('comment_management', 'view')
+    assert not admin.can_manage_comments()
+    assert admin.get_permissions()['comment_management'] == {'view': False, 'delete': True}
+
+    admin.permissions = json.dumps({'user_management': {'view': True}})
+    assert admin.get_permission_set() == frozenset({'user_management:view'})
@@ -0,0 +1,60 @@
+"""
+测试文章列表页查询数量
+Test Article List Query Budget
+"""
+import pytest
+from app import db
+from app.models.user import User
+from app.models.category import Category
+from app.models.article import Article
+from app.models.comment import Comment
+
+
+@pytest.fixture
+def listing(app):
+    """创建不同作者、不同分类且带评论的文章"""
+    articles = []
+    for i in range(10):
+        user = User(username=f'author{i}', email=f'author{i}@example.com', password='password')
+        category = Category(name=f'分类{i}', slug=f'category-{i}')
+        db.session.add_all([user, category])
+        db.session.flush()
+        article = Article(title=f'文章{i}', content='内容', author_id=user.id, category_id=category.id)
+        article.publish()
+        db.session.add(article)
+        db.session.flush()
+        db.session.add(Comment(content='评论', author_id=user.id, article_id=article.id))
+        articles.append(article)
+    db.session.commit()
+    return articles
+
+
+def test_list_page_query_budget(app, client, listing, query_budget):
+    """测试文章列表页的查询数量与文章数量无关"""
+    client.get('/articles')
+    db.session.expire_all()
+    # 文章页 + 总数（分类从注册表读取）
+    with query_budget(2):
+        response = client.get('/articles')
+    assert response.status_code == 200
+    assert 'author9'.encode('utf-8') in response.data
+    assert '分类9'.encode('utf-8') in response.data
+
+
+def test_category_filter_reuses_loaded_categories(app, client, listing, query_budget):
+    """测试按分类筛选不再单独查询当前分类"""
+    category_id = listing[0].category_id
+    client.get('/articles')
+    db.session.expire_all()
+    with query_budget(2):
+        response = client.get(f'/articles?category_id={category_id}')
+    assert response.status_code == 200
+    assert '分类0 - 文章列表'.encode('utf-8') in response.data
+
+
+def test_query_budget_reports_statements(app, query_budget):
+    """测试超过查询上限时抛出断言错误并列出全部语句"""
+    with pytest.raises(AssertionError, match='(?s)超过上限 1.*FROM categories'):
+        with query_budget(1):
+            User.query.all()
+            Category.query.all()
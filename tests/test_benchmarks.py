@@ -0,0 +1,56 @@
+"""
+测试基准测试工具
+Test Benchmark Tools
+"""
+from app import db
+from app.models.article import Article
+from app.models.comment import Comment
+from benchmarks.datagen import generate_dataset
+from benchmarks.runner import compare_reports, default_scenarios, percentile, run_client
+
+
+def test_percentile_interpolates():
+    """测试百分位数线性插值"""
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50.5
+    assert percentile(values, 99) == 99.01
+    assert percentile([7], 95) == 7
+    assert percentile([], 50) is None
+
+
+def test_generate_dataset(app):
+    """测试生成的数据集包含中英文文章和多层评论线程"""
+    dataset = generate_dataset(users=3, articles=6, comments_per_article=12, max_depth=4)
+
+    assert dataset['published_articles'] == len(dataset['article_ids']) == 6
+    depths = [depth for depth, in db.session.query(Comment.depth)]
+    assert len(depths) == dataset['comments'] == 72
+    assert max(depths) >= 2 and max(depths) <= 4
+
+    contents = [article.content for article in Article.query.all()]
+    assert any('数据库' in content or '缓存' in content for content in contents)
+    assert any('database' in content or 'cache' in content for content in contents)
+
+
+def test_run_client_reports_queries(app):
+    """测试测试客户端压测统计延迟和查询数量"""
+    dataset = generate_dataset(users=3, articles=4, comments_per_article=5, max_depth=3)
+    results = run_client(app, default_scenarios(dataset), dataset['admin'], requests=3, warmup=1)
+
+    assert set(results) >= {'index', 'article_detail', 'search', 'comment_list_api', 'admin_users'}
+    for stats in results.values():
+        assert stats['requests'] == 3
+        assert stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms']
+        assert stats['queries_per_request'] >= 1
+
+
+def test_compare_reports_flags_regressions():
+    """测试与基线比较时发现延迟、吞吐量和查询数量回归"""
+    baseline = {'client': {'index': {'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 30.0,
+                                     'rps': 100.0, 'queries_per_request': 2.0}}}
+    current = {'client': {'index': {'p50_ms': 10.5, 'p95_ms': 40.0, 'p99_ms': 30.0,
+                                    'rps': 60.0, 'queries_per_request': 3.0}}}
+
+    regressions = {metric for _, _, metric, _, _ in compare_reports(current, baseline)}
+    assert regressions == {'p95_ms', 'rps', 'queries_per_request'}
+    assert compare_reports(baseline, baseline) == []
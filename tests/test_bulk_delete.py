@@ -0,0 +1,124 @@
+"""
+测试批量级联删除
+Test Bulk Cascade Delete
+"""
+import pytest
+from app import db
+from app.models.user import User
+from app.models.admin import Admin
+from app.models.category import Category
+from app.models.article import Article
+from app.models.comment import Comment
+from app.models.search import SearchPosting
+from app.models.job import Job
+from app.services.bulk_delete import BulkDeleter
+from app.services.jobs import JobWorker
+from app.services.search import search_articles
+
+
+@pytest.fixture
+def spammer(app):
+    """创建一个拥有文章和评论的用户，以及在其内容下回复的其他用户"""
+    other = User.query.filter_by(username='testuser').first()
+    spammer = User(username='spammer', email='spam@example.com', password='password')
+    category = Category(name='杂谈', slug='misc')
+    db.session.add_all([spammer, category])
+    db.session.commit()
+
+    own = []
+    for i in range(5):
+        article = Article(title=f'广告{i}', content='广告内容', author_id=spammer.id, category_id=category.id)
+        article.publish()
+        own.append(article)
+    target = Article(title='正常文章', content='正常内容', author_id=other.id, category_id=category.id)
+    target.publish()
+    db.session.add_all(own + [target])
+    db.session.commit()
+
+    for article in own:
+        db.session.add(Comment(content='路过', author_id=other.id, article_id=article.id))
+    spam = Comment(content='垃圾评论', author_id=spammer.id, article_id=target.id)
+    keep = Comment(content='正常评论', author_id=other.id, article_id=target.id)
+    db.session.add_all([spam, keep])
+    db.session.commit()
+    reply = Comment(content='回复垃圾评论', author_id=other.id, article_id=target.id, parent_id=spam.id)
+    db.session.add(reply)
+    db.session.commit()
+    return spammer.id, other.id, category.id, target.id
+
+
+def test_delete_user_removes_content_and_adjusts_counters(app, spammer):
+    """测试删除用户时分批删除内容并调整冗余计数和索引"""
+    spammer_id, other_id, category_id, target_id = spammer
+    phases = []
+    removed = BulkDeleter(chunk_size=2, progress=lambda *args: phases.append(args)).delete_user(spammer_id)
+
+    assert removed['articles'] == 5
+    assert removed['comments'] == 7
+    assert removed['users'] == 1
+    assert ('articles', 5, 5) in phases
+
+    assert db.session.get(User, spammer_id) is None
+    assert Article.query.filter_by(author_id=spammer_id).count() == 0
+    assert [c.content for c in Comment.query.all()] == ['正常评论']
+
+    other = db.session.get(User, other_id)
+    assert other.comment_count == 1
+    assert db.session.get(Article, target_id).comment_count == 1
+    assert db.session.get(Category, category_id).published_article_count == 1
+    assert SearchPosting.query.filter(SearchPosting.article_id != target_id).count() == 0
+    assert search_articles('广告').total == 0
+
+
+def test_delete_article(app, spammer):
+    """测试删除文章时删除评论并调整作者计数"""
+    spammer_id, other_id, category_id, target_id = spammer
+    BulkDeleter().delete_article(target_id)
+
+    assert db.session.get(Article, target_id) is None
+    assert Comment.query.filter_by(article_id=target_id).count() == 0
+    assert db.session.get(User, spammer_id).comment_count == 0
+    assert db.session.get(User, other_id).published_article_count == 0
+    assert db.session.get(Category, category_id).published_article_count == 5
+
+
+def test_admin_deletes_large_account_in_background(app, client, auth, spammer):
+    """测试内容较多的账号在后台删除"""
+    spammer_id, other_id = spammer[:2]
+    db.session.add(Admin(user_id=other_id))
+    db.session.commit()
+    app.config['BULK_DELETE_BACKGROUND_THRESHOLD'] = 3
+    auth.login()
+
+    response = client.post(f'/admin/users/{spammer_id}/delete', follow_redirects=True)
+    assert '正在后台删除'.encode('utf-8') in response.data
+
+    task_id = int(response.data.decode('utf-8').split('任务 ')[1].split('）')[0])
+    assert db.session.get(Job, task_id).status == 'queued'
+    assert db.session.get(User, spammer_id).is_active is False
+
+    assert JobWorker(app).run_once() == 1
+    db.session.expire_all()
+    task = client.get(f'/admin/tasks/{task_id}').get_json()['task']
+    assert task['status'] == 'succeeded'
+    assert task['result']['articles'] == 5
+    assert task['progress']['phase'] == 'user'
+    assert db.session.get(User, spammer_id) is None
+
+
+def test_rerun_after_failure_finds_remaining_replies(app, spammer):
+    """测试中途失败后重新执行能找到剩余的回复，不留下失去父评论的回复"""
+    spammer_id = spammer[0]
+
+    def fail_before_last_chunk(phase, done, total):
+        if phase == 'comments' and done == total - 1:
+            raise RuntimeError('中断')
+
+    with pytest.raises(RuntimeError):
+        BulkDeleter(chunk_size=1, progress=fail_before_last_chunk).delete_user(spammer_id)
+    db.session.rollback()
+    remaining = Comment.query.all()
+    assert all(c.parent_id is None or db.session.get(Comment, c.parent_id) for c in remaining)
+
+    BulkDeleter(chunk_size=1).delete_user(spammer_id)
+    assert [c.content for c in Comment.query.all()] == ['正常评论']
@@ -0,0 +1,85 @@
+"""
+测试分类注册表
+Test Category Registry
+"""
+from app import db
+from app.models.category import Category
+from app.services.categories import (get_registry, get_categories, get_category, get_category_by_slug,
+                                     bump_version)
+from app.forms.article import ArticleForm
+from app.utils.query_counter import QueryCounter
+
+
+def test_registry_indexes_categories(app):
+    """测试按ID和slug读取分类"""
+    tech = Category(name='技术', slug='tech')
+    life = Category(name='生活', slug='life')
+    db.session.add_all([tech, life])
+    db.session.commit()
+
+    assert [entry.name for entry in get_categories()] == ['技术', '生活']
+    assert get_category(tech.id).slug == 'tech'
+    assert get_category_by_slug('life').id == life.id
+    assert get_category(999) is None
+
+
+def test_registry_reads_without_queries(app):
+    """测试注册表加载后不再查询数据库"""
+    db.session.add(Category(name='技术', slug='tech'))
+    db.session.commit()
+    get_categories()
+
+    with QueryCounter() as counter:
+        form = ArticleForm(meta={'csrf': False})
+        get_category_by_slug('tech')
+    assert counter.count == 0
+    assert (get_category_by_slug('tech').id, '技术') in form.category_id.choices
+
+
+def test_changes_invalidate_registry(app):
+    """测试分类变更提交后注册表重新加载"""
+    category = Category(name='技术', slug='tech')
+    db.session.add(category)
+    db.session.commit()
+    assert get_category(category.id).name == '技术'
+
+    category.name = '编程'
+    db.session.commit()
+    assert get_category(category.id).name == '编程'
+
+    db.session.delete(category)
+    db.session.commit()
+    assert get_categories() == ()
+
+
+def test_version_stamp_seen_by_other_workers(app):
+    """测试其他进程变更分类后，版本号变化时重新加载"""
+    registry = get_registry()
+    registry.check_interval = 0
+    db.session.add(Category(name='技术', slug='tech'))
+    db.session.commit()
+    get_categories()
+    loads = registry.loads
+
+    # 版本号未变化时只读取版本号
+    with QueryCounter() as counter:
+        get_categories()
+    assert counter.count == 1
+    assert registry.loads == loads
+
+    # 模拟其他 worker 的提交：数据和版本号变化，但本进程的快照未被主动清除
+    db.session.execute(Category.__table__.insert().values(name='生活', slug='life', published_article_count=0))
+    bump_version(db.session.connection())
+    db.session.commit()
+    assert [entry.slug for entry in get_categories()] == ['tech', 'life']
+    assert registry.loads == loads + 1
+
+
+def test_invalid_category_rejected(app):
+    """测试表单拒绝不存在的分类"""
+    data = {'title': '标题', 'content': '内容', 'category_id': '42', 'status': 'draft'}
+    with app.test_request_context(method='POST', data=data):
+        form = ArticleForm(meta={'csrf': False})
+        form.category_id.choices.append((42, '幽灵分类'))
+        assert not form.validate()
+    assert '选择的分类不存在' in form.category_id.errors
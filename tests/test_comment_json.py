@@ -0,0 +1,73 @@
+"""
+测试评论JSON流式接口
+Test Streaming Comment JSON API
+"""
+import pytest
+from app import db
+from app.models.user import User
+from app.models.article import Article
+from app.models.comment import Comment
+from app.utils.query_counter import QueryCounter
+
+
+@pytest.fixture
+def discussion(app):
+    """创建带多条顶级评论和回复的文章"""
+    user = User.query.filter_by(username='testuser').first()
+    article = Article(title='讨论', content='内容', author_id=user.id)
+    article.publish()
+    db.session.add(article)
+    db.session.commit()
+
+    def add_thread(count):
+        for i in range(count):
+            root = Comment(content=f'顶级{i}', author_id=user.id, article_id=article.id)
+            db.session.add(root)
+            db.session.commit()
+            for j in range(2):
+                reply = Comment(content=f'回复{i}-{j}', author_id=user.id, article_id=article.id, parent_id=root.id)
+                db.session.add(reply)
+                db.session.commit()
+            db.session.add(Comment(content=f'深层{i}', author_id=user.id, article_id=article.id,
+                                   parent_id=reply.id))
+            db.session.add(Comment(content=f'待审核{i}', author_id=user.id, article_id=article.id,
+                                   parent_id=root.id, status='pending'))
+            db.session.commit()
+    return article, add_thread
+
+
+def test_matches_to_dict(client, discussion):
+    """测试流式输出与 to_dict() 的结果一致"""
+    article, add_thread = discussion
+    add_thread(3)
+    response = client.get(f'/api/articles/{article.id}/comments')
+    assert response.is_streamed
+    data = response.get_json()
+
+    roots = Comment.query.filter_by(article_id=article.id, parent_id=None).order_by(Comment.id).all()
+    assert data['comments'] == [root.to_dict(include_replies=True) for root in roots]
+    assert data['pagination']['total'] == 3
+    assert data['comments'][0]['replies'][1]['reply_count'] == 1
+
+
+def test_query_count_is_fixed(app, client, discussion):
+    """测试查询数量与评论和回复数量无关"""
+    article, add_thread = discussion
+    add_thread(2)
+    with QueryCounter() as small:
+        client.get(f'/api/articles/{article.id}/comments').get_json()
+    add_thread(6)
+    with QueryCounter() as large:
+        client.get(f'/api/articles/{article.id}/comments').get_json()
+    assert small.count == large.count <= 4
+
+
+def test_single_comment_api(client, discussion):
+    """测试单条评论接口"""
+    article, add_thread = discussion
+    add_thread(1)
+    root = Comment.query.filter_by(article_id=article.id, parent_id=None).first()
+    assert client.get(f'/api/comments/{root.id}').get_json() == root.to_dict(include_replies=True)
+
+    pending = Comment.query.filter_by(status='pending').first()
+    assert client.get(f'/api/comments/{pending.id}').status_code == 404
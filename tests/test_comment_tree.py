@@ -0,0 +1,164 @@
+"""
+测试评论树构建
+Test Comment Tree Assembly
+"""
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models.user import User
+from app.models.article import Article
+from app.models.comment import Comment, CommentDepthError, MAX_DEPTH
+from app.services.comment_tree import build_comment_tree
+
+
+@pytest.fixture
+def thread(app):
+    """创建一篇带多层回复的文章"""
+    user = User.query.filter_by(username='testuser').first()
+    other = User(username='otheruser', email='other@example.com', password='otherpass', nickname='另一位')
+    db.session.add(other)
+    article = Article(title='测试文章', content='测试内容', author_id=user.id)
+    article.publish()
+    db.session.add(article)
+    db.session.commit()
+
+    root = Comment(content='顶级评论', author_id=other.id, article_id=article.id)
+    db.session.add(root)
+    db.session.commit()
+    reply = Comment(content='一级回复', author_id=user.id, article_id=article.id, parent_id=root.id)
+    db.session.add(reply)
+    db.session.commit()
+    nested = Comment(content='二级回复', author_id=other.id, article_id=article.id, parent_id=reply.id)
+    pending = Comment(content='待审核', author_id=other.id, article_id=article.id,
+                      parent_id=root.id, status='pending')
+    db.session.add_all([nested, pending])
+    db.session.commit()
+    return article, user, root, reply, nested
+
+
+def test_tree_structure(thread):
+    """测试树结构、层级深度和回复数量"""
+    article, user, root, reply, nested = thread
+    tree = build_comment_tree(article.id, user)
+
+    assert len(tree) == 3
+    assert [node.comment.id for node in tree] == [root.id]
+
+    root_node = tree.roots[0]
+    assert root_node.depth == 0
+    assert root_node.reply_count == 1
+    assert root_node.can_delete is False
+
+    reply_node = root_node.children[0]
+    assert reply_node.comment.id == reply.id
+    assert reply_node.depth == 1
+    assert reply_node.parent_author_name == '另一位'
+    assert reply_node.can_delete is True
+
+    nested_node = reply_node.children[0]
+    assert nested_node.depth == 2
+    assert nested_node.reply_count == 0
+
+
+def test_tree_uses_single_query(app, thread):
+    """测试构建评论树和访问作者不产生额外查询"""
+    article_id = thread[0].id
+    db.session.expire_all()
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        tree = build_comment_tree(article_id)
+        names = [node.comment.author.get_display_name() for node in tree.nodes]
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+    assert len(names) == 3
+    assert len(statements) == 1
+
+
+def test_detail_page_renders_tree(client, thread):
+    """测试文章详情页渲染评论树"""
+    article = thread[0]
+    response = client.get(f'/articles/{article.id}')
+    assert response.status_code == 200
+    assert '二级回复'.encode('utf-8') in response.data
+    assert '待审核'.encode('utf-8') not in response.data
+
+
+def test_paths_maintained_on_insert(thread):
+    """测试插入时维护物化路径和深度"""
+    article, user, root, reply, nested = thread
+    assert root.depth == 0 and reply.depth == 1 and nested.depth == 2
+    assert nested.path == root.path + f'{reply.id:010d}/' + f'{nested.id:010d}/'
+    assert nested.get_thread_root_id() == root.id
+    assert nested.get_thread_root() is root
+
+
+def test_subtree_and_thread_listing(app, thread):
+    """测试子树和线程顺序查询"""
+    article, user, root, reply, nested = thread
+    later_root = Comment(content='第二个顶级评论', author_id=user.id, article_id=article.id)
+    db.session.add(later_root)
+    db.session.commit()
+
+    assert [c.id for c in root.get_subtree()] == [reply.id, nested.id]
+    assert len(root.get_subtree(status=None).all()) == 3
+    assert [c.id for c in Comment.get_thread_listing(article.id)] == [root.id, reply.id, nested.id, later_root.id]
+
+
+def test_reparent_moves_subtree(app, thread):
+    """测试修改父评论时整体移动子树"""
+    article, user, root, reply, nested = thread
+    reply.parent_id = None
+    db.session.commit()
+    db.session.expire_all()
+    assert reply.depth == 0
+    assert nested.depth == 1
+    assert nested.path == f'{reply.id:010d}/{nested.id:010d}/'
+
+
+def test_backfill_paths(app, thread):
+    """测试回填已有评论的路径"""
+    from app.services.comment_tree import backfill_comment_paths
+    article, user, root, reply, nested = thread
+    expected = nested.path
+    db.session.execute(Comment.__table__.update().values(path=None, depth=0))
+    db.session.commit()
+
+    total, remaining = backfill_comment_paths(batch_size=1)
+    assert (total, remaining) == (4, 0)
+    db.session.expire_all()
+    assert nested.path == expected
+    assert nested.depth == 2
+
+
+def test_reply_too_deep_is_rejected(client, auth, thread):
+    """测试回复层级超过路径长度限制时返回提示而不是500"""
+    article, user, root, reply, nested = thread
+    parent = nested
+    while parent.depth < MAX_DEPTH:
+        child = Comment(content='更深的回复', author_id=user.id, article_id=article.id, parent_id=parent.id)
+        db.session.add(child)
+        db.session.commit()
+        parent = child
+    count = Comment.query.count()
+    auth.login()
+
+    response = client.post(f'/comments/{parent.id}/reply', follow_redirects=True,
+                           data={'content': '太深了', 'article_id': article.id, 'parent_id': parent.id})
+    assert response.status_code == 200
+    assert '回复层级不能超过'.encode('utf-8') in response.data
+    response = client.post(f'/articles/{article.id}/comments', follow_redirects=True,
+                           data={'content': '太深了', 'article_id': article.id, 'parent_id': parent.id})
+    assert response.status_code == 200
+    assert '回复层级不能超过'.encode('utf-8') in response.data
+    assert Comment.query.count() == count
+
+    with pytest.raises(CommentDepthError):
+        db.session.add(Comment(content='绕过检查', author_id=user.id, article_id=article.id, parent_id=parent.id))
+        db.session.commit()
+    db.session.rollback()
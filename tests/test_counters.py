@@ -0,0 +1,166 @@
+"""
+测试冗余计数字段
+Test Denormalized Counters
+"""
+import pytest
+from sqlalchemy import text
+from app import db
+from app.models.user import User
+from app.models.category import Category
+from app.models.article import Article
+from app.models.comment import Comment
+from app.models.counters import reconcile_counters
+
+
+@pytest.fixture
+def author(app):
+    """获取测试用户"""
+    return User.query.filter_by(username='testuser').first()
+
+
+@pytest.fixture
+def category(app):
+    """创建测试分类"""
+    category = Category(name='技术', slug='tech')
+    db.session.add(category)
+    db.session.commit()
+    return category
+
+
+def _refresh(*objects):
+    for obj in objects:
+        db.session.refresh(obj)
+
+
+def test_published_article_counts(author, category):
+    """测试发布、取消发布和删除文章时维护已发布文章计数"""
+    draft = Article(title='草稿', content='内容', author_id=author.id, category_id=category.id)
+    published = Article(title='已发布', content='内容', author_id=author.id, category_id=category.id)
+    published.publish()
+    db.session.add_all([draft, published])
+    db.session.commit()
+    _refresh(author, category)
+    assert author.get_article_count() == 1
+    assert category.get_article_count() == 1
+
+    draft.publish()
+    db.session.commit()
+    _refresh(author, category)
+    assert author.get_article_count() == 2
+    assert category.get_article_count() == 2
+
+    published.unpublish()
+    published.category_id = None
+    db.session.commit()
+    _refresh(author, category)
+    assert author.get_article_count() == 1
+    assert category.get_article_count() == 1
+
+    db.session.delete(draft)
+    db.session.commit()
+    _refresh(author, category)
+    assert author.get_article_count() == 0
+    assert category.get_article_count() == 0
+
+
+def test_comment_counts_with_cascade(author):
+    """测试评论计数在创建、删除和级联删除时保持一致"""
+    article = Article(title='文章', content='内容', author_id=author.id)
+    article.publish()
+    db.session.add(article)
+    db.session.commit()
+
+    root = Comment(content='评论', author_id=author.id, article_id=article.id)
+    db.session.add(root)
+    db.session.commit()
+    reply = Comment(content='回复', author_id=author.id, article_id=article.id, parent_id=root.id)
+    db.session.add(reply)
+    db.session.commit()
+    _refresh(author, article)
+    assert article.get_comment_count() == 2
+    assert author.get_comment_count() == 2
+
+    db.session.delete(reply)
+    db.session.commit()
+    _refresh(author, article)
+    assert article.get_comment_count() == 1
+    assert author.get_comment_count() == 1
+
+    db.session.delete(article)
+    db.session.commit()
+    _refresh(author)
+    assert author.get_comment_count() == 0
+    assert author.get_article_count() == 0
+
+
+def test_reconcile_command(runner, author, category):
+    """测试重新计算命令修复不一致的计数"""
+    article = Article(title='文章', content='内容', author_id=author.id, category_id=category.id)
+    article.publish()
+    db.session.add(article)
+    db.session.commit()
+    db.session.add(Comment(content='评论', author_id=author.id, article_id=article.id))
+    db.session.commit()
+
+    db.session.execute(Article.__table__.update().values(comment_count=99))
+    db.session.execute(User.__table__.update().values(comment_count=99, published_article_count=99))
+    db.session.execute(Category.__table__.update().values(published_article_count=99))
+    db.session.commit()
+
+    result = runner.invoke(args=['counters', 'reconcile'])
+    assert result.exit_code == 0
+
+    _refresh(author, category, article)
+    assert article.get_comment_count() == 1
+    assert author.get_comment_count() == 1
+    assert author.get_article_count() == 1
+    assert category.get_article_count() == 1
+
+
+def test_upgrade_adds_missing_columns(runner, author, category):
+    """测试已有数据库缺少计数字段时，执行迁移补充字段并回填"""
+    article = Article(title='文章', content='内容', author_id=author.id, category_id=category.id)
+    article.publish()
+    db.session.add(article)
+    db.session.commit()
+    db.session.add(Comment(content='评论', author_id=author.id, article_id=article.id))
+    db.session.commit()
+    article_id = article.id
+
+    db.session.remove()
+    with db.engine.begin() as connection:
+        connection.execute(text('ALTER TABLE articles DROP COLUMN comment_count'))
+        connection.execute(text('ALTER TABLE users DROP COLUMN comment_count'))
+        connection.execute(text('ALTER TABLE users DROP COLUMN published_article_count'))
+        connection.execute(text('ALTER TABLE categories DROP COLUMN published_article_count'))
+
+    result = runner.invoke(args=['db', 'upgrade'])
+    assert result.exit_code == 0
+    assert '执行迁移 0005' in result.output
+
+    assert db.session.get(Article, article_id).get_comment_count() == 1
+    user = User.query.filter_by(username='testuser').first()
+    assert user.get_comment_count() == 1
+    assert user.get_article_count() == 1
+    assert Category.query.filter_by(slug='tech').first().get_article_count() == 1
+
+
+def test_counters_keep_updated_at(author, category):
+    """测试评论增删和重新计算计数不修改文章、用户的更新时间"""
+    article = Article(title='文章', content='内容', author_id=author.id, category_id=category.id)
+    article.publish()
+    db.session.add(article)
+    db.session.commit()
+    _refresh(author, article)
+    article_updated, author_updated = article.updated_at, author.updated_at
+
+    comment = Comment(content='评论', author_id=author.id, article_id=article.id)
+    db.session.add(comment)
+    db.session.commit()
+    db.session.delete(comment)
+    db.session.commit()
+    reconcile_counters()
+
+    _refresh(author, article)
+    assert article.updated_at == article_updated
+    assert author.updated_at == author_updated
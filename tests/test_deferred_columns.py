@@ -0,0 +1,65 @@
+"""
+测试大字段延迟加载
+Test Deferred Loading of Large Columns
+"""
+import pytest
+from app import db
+from app.models.user import User
+from app.models.admin import Admin
+from app.models.article import Article
+from app.models.comment import Comment
+from app.utils.query_counter import assert_no_deferred_columns, deferred_columns
+
+
+@pytest.fixture
+def content(app):
+    """创建管理员、带简介的作者、文章和评论"""
+    user = User.query.filter_by(username='testuser').first()
+    user.bio = '个人简介'
+    db.session.add(Admin(user_id=user.id))
+    article = Article(title='标题', content='正文内容', author_id=user.id)
+    article.publish()
+    db.session.add(article)
+    db.session.flush()
+    db.session.add(Comment(content='评论内容', author_id=user.id, article_id=article.id))
+    db.session.commit()
+    db.session.expire_all()
+    return article.id
+
+
+def test_deferred_column_groups():
+    """测试模型中延迟加载的列"""
+    assert deferred_columns(Article, Comment, User) == ['articles.content', 'comments.content', 'users.bio']
+
+
+@pytest.mark.parametrize('url', ['/', '/articles', '/my-articles', '/admin/articles', '/admin/users'])
+def test_list_pages_skip_large_columns(app, client, auth, content, url):
+    """测试列表页不取回正文和个人简介"""
+    auth.login()
+    db.session.expire_all()
+    with assert_no_deferred_columns(Article, Comment, User):
+        response = client.get(url)
+    assert response.status_code == 200
+
+
+def test_detail_loads_content_in_one_query(app, client, content, query_budget):
+    """测试详情页随文章一起加载正文和作者简介"""
+    db.session.expire_all()
+    # 文章（含作者、分类） + 评论树
+    with query_budget(2):
+        response = client.get(f'/articles/{content}')
+    assert '正文内容'.encode('utf-8') in response.data
+    assert '个人简介'.encode('utf-8') in response.data
+    assert '评论内容'.encode('utf-8') in response.data
+
+
+def test_helper_reports_deferred_columns(app, content):
+    """测试取回延迟加载的列时断言失败"""
+    from sqlalchemy.orm import undefer
+    with pytest.raises(AssertionError, match='articles.content'):
+        with assert_no_deferred_columns(Article):
+            Article.query.options(undefer(Article.content)).all()
+
+    # 只在条件中引用不算
+    with assert_no_deferred_columns(Article):
+        Article.query.filter(Article.content.contains('正文')).all()
@@ -0,0 +1,76 @@
+"""
+测试文章派生字段
+Test Article Derived Content Fields
+"""
+from app import db
+from app.models.article import Article
+from app.models.user import User
+from app.services.excerpts import backfill_content_fields
+from app.utils.query_counter import assert_no_deferred_columns
+from app.utils.text import html_to_text, make_excerpt, count_words, reading_time
+
+
+def test_html_to_text():
+    """测试移除脚本、标签和实体"""
+    html = '<p>第一段</p><script>alert(1)</script><div>Second&nbsp;<b>part</b> &amp; more</div>'
+    assert html_to_text(html) == '第一段 Second part & more'
+
+
+def test_make_excerpt_breaks_on_space():
+    """测试摘录在空白处截断"""
+    assert make_excerpt('short') == 'short'
+    assert make_excerpt('alpha beta gamma delta', 15) == 'alpha beta...'
+
+
+def test_word_count_and_reading_time():
+    """测试中英文混合字数和阅读时长"""
+    assert count_words('博客 system 设计') == 5
+    assert reading_time(0) == 1
+    assert reading_time(301) == 2
+
+
+def test_fields_derived_on_save(app):
+    """测试保存和修改正文时计算派生字段"""
+    user = User.query.filter_by(username='testuser').first()
+    article = Article(title='标题', content='<p>' + '字' * 650 + '</p>', author_id=user.id)
+    db.session.add(article)
+    db.session.commit()
+    assert article.summary is None
+    assert article.excerpt == '字' * 200 + '...'
+    assert article.word_count == 650
+    assert article.reading_time == 3
+
+    article.content = '<em>new</em> body'
+    db.session.commit()
+    assert article.get_excerpt() == 'new body'
+    assert article.word_count == 2
+
+
+def test_list_does_not_load_content(app, client):
+    """测试列表页不查询正文列"""
+    user = User.query.filter_by(username='testuser').first()
+    article = Article(title='列表文章', content='很长的正文', author_id=user.id)
+    article.publish()
+    db.session.add(article)
+    db.session.commit()
+    db.session.expire_all()
+
+    with assert_no_deferred_columns(Article):
+        response = client.get('/articles')
+    assert '很长的正文'.encode('utf-8') in response.data
+
+
+def test_backfill_content_fields(app):
+    """测试为已有文章回填派生字段"""
+    user = User.query.filter_by(username='testuser').first()
+    article = Article(title='旧文章', content='old content here', author_id=user.id)
+    db.session.add(article)
+    db.session.commit()
+    db.session.execute(Article.__table__.update().values(excerpt=None, word_count=0))
+    db.session.commit()
+
+    assert backfill_content_fields(batch_size=1) == 1
+    db.session.expire_all()
+    assert db.session.get(Article, article.id).excerpt == 'old content here'
+    assert db.session.get(Article, article.id).word_count == 3
+    assert backfill_content_fields() == 0
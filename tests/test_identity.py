@@ -0,0 +1,81 @@
+"""
+测试登录身份缓存
+Test Authenticated Identity Cache
+"""
+from app import db
+from app.models.user import User
+from app.models.admin import Admin
+from app.services.identity import load_identity
+from app.utils.query_counter import QueryCounter
+
+
+def _user_id():
+    return User.query.filter_by(username='testuser').first().id
+
+
+def test_snapshot_reused_without_queries(app):
+    """测试第二次加载用户及管理员信息不产生查询"""
+    user_id = _user_id()
+    db.session.add(Admin(user_id=user_id))
+    db.session.commit()
+    db.session.expire_all()
+
+    with app.test_request_context():
+        with QueryCounter() as first:
+            user = load_identity(user_id)
+            assert user.is_admin()
+        assert first.count == 1
+
+    with app.test_request_context():
+        with QueryCounter() as second:
+            user = load_identity(user_id)
+            assert user.has_permission('user_management', 'delete')
+            assert user in db.session
+        assert second.count == 0
+
+
+def test_commit_invalidates_snapshot(app):
+    """测试用户修改提交后快照失效"""
+    user_id = _user_id()
+    cache = app.extensions['identity_cache']
+    with app.test_request_context():
+        load_identity(user_id)
+    assert len(cache) == 1
+
+    user = db.session.get(User, user_id)
+    user.nickname = '新昵称'
+    db.session.commit()
+    assert len(cache) == 0
+
+    with app.test_request_context():
+        assert load_identity(user_id).nickname == '新昵称'
+
+
+def test_merged_user_can_be_updated(app, client, auth):
+    """测试从快照恢复的当前用户仍可修改并保存"""
+    auth.login()
+    client.get('/profile')
+    response = client.post('/profile/edit', data={'nickname': '缓存用户', 'bio': ''},
+                           follow_redirects=True)
+    assert response.status_code == 200
+    db.session.expire_all()
+    assert User.query.filter_by(username='testuser').first().nickname == '缓存用户'
+
+
+def test_deactivated_user_is_rejected(app, client, auth):
+    """测试禁用用户后缓存的快照不再生效"""
+    auth.login()
+    assert client.get('/profile').status_code == 200
+
+    user = User.query.filter_by(username='testuser').first()
+    user.is_active = False
+    db.session.commit()
+    assert client.get('/profile').status_code == 302
+
+
+def test_permission_set_refreshes_on_set_permissions(app):
+    """测试权限集合在修改权限后重新计算"""
+    admin = Admin(user_id=_user_id(), permissions={'article_management': {'view': True, 'delete': False}})
+    assert admin.get_permission_set() == frozenset({'article_management:view'})
+    admin.add_permission('article_management', 'delete')
+    assert admin.has_permission('article_management', 'delete')
@@ -0,0 +1,138 @@
+"""
+测试后台任务队列
+Test Background Job Queue
+"""
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models.job import Job
+from app.services.jobs import job, enqueue, report_progress, retry_delay, JobWorker
+
+calls = []
+
+
+@job('tests.echo')
+def echo_job(value):
+    report_progress(step=1)
+    calls.append(value)
+    return {'value': value}
+
+
+@job('tests.flaky', max_attempts=2)
+def flaky_job():
+    raise RuntimeError('boom')
+
+
+@job('tests.limited', concurrency=1)
+def limited_job():
+    return None
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+def test_enqueue_and_run(app):
+    """测试任务入队并由 worker 执行"""
+    queued = enqueue('tests.echo', {'value': 3})
+    assert queued.status == 'queued'
+
+    assert JobWorker(app).run_once() == 1
+    db.session.expire_all()
+    finished = db.session.get(Job, queued.id)
+    assert calls == [3]
+    assert finished.status == 'succeeded'
+    assert finished.attempts == 1
+    assert finished.locked_at is None
+    assert finished.to_dict()['result'] == {'value': 3}
+    assert finished.to_dict()['progress'] == {'step': 1}
+
+
+def test_idempotency_key(app):
+    """测试相同幂等键只入队一次"""
+    first = enqueue('tests.echo', {'value': 1}, idempotency_key='echo-1')
+    second = enqueue('tests.echo', {'value': 2}, idempotency_key='echo-1')
+    assert first.id == second.id
+    assert Job.query.count() == 1
+
+
+def test_idempotency_key_requeues_failed_job(app):
+    """测试相同幂等键的任务已失败时再次入队会重新排队"""
+    queued = enqueue('tests.flaky', idempotency_key='flaky-1', max_attempts=1)
+    JobWorker(app).run_once()
+    db.session.expire_all()
+    assert db.session.get(Job, queued.id).status == 'failed'
+
+    again = enqueue('tests.flaky', idempotency_key='flaky-1')
+    assert again.id == queued.id
+    assert again.status == 'queued'
+    assert again.attempts == 0
+    assert again.finished_at is None
+    assert JobWorker(app).run_once() == 1
+
+
+def test_unknown_job_rejected(app):
+    """测试入队未注册的任务"""
+    with pytest.raises(ValueError):
+        enqueue('tests.missing')
+
+
+def test_retry_with_backoff(app):
+    """测试失败后按指数退避重试，超过次数后标记失败"""
+    assert retry_delay(1, 10, 3600) == 10
+    assert retry_delay(3, 10, 3600) == 40
+    assert retry_delay(20, 10, 3600) == 3600
+
+    queued = enqueue('tests.flaky')
+    worker = JobWorker(app)
+    worker.run_once()
+    db.session.expire_all()
+    retried = db.session.get(Job, queued.id)
+    assert retried.status == 'queued'
+    assert 'boom' in retried.last_error
+    assert retried.run_at > datetime.utcnow() + timedelta(seconds=5)
+
+    # 未到重试时间时不会被认领
+    assert worker.run_once() == 0
+
+    retried.run_at = datetime.utcnow()
+    db.session.commit()
+    worker.run_once()
+    db.session.expire_all()
+    assert db.session.get(Job, queued.id).status == 'failed'
+    assert db.session.get(Job, queued.id).attempts == 2
+
+
+def test_concurrency_limit(app):
+    """测试同名任务的并发数量限制"""
+    enqueue('tests.limited')
+    enqueue('tests.limited')
+    worker = JobWorker(app, concurrency=4)
+    assert len(worker.claim(4)) == 1
+    assert worker.claim(4) == []
+    assert Job.query.filter_by(status='queued').count() == 1
+
+
+def test_recover_stale_jobs(app):
+    """测试超过锁定超时的运行中任务重新排队"""
+    queued = enqueue('tests.echo', {'value': 5})
+    worker = JobWorker(app)
+    worker.claim(1)
+    db.session.get(Job, queued.id).locked_at = datetime.utcnow() - timedelta(hours=1)
+    db.session.commit()
+
+    assert worker.recover_stale() == 1
+    assert worker.run_once() == 1
+    assert calls == [5]
+
+
+def test_worker_command(app, runner):
+    """测试 flask jobs worker --once 命令"""
+    enqueue('tests.echo', {'value': 7})
+    result = runner.invoke(args=['jobs', 'worker', '--once'])
+    assert '已执行 1 个任务' in result.output
+    assert calls == [7]
+
+    result = runner.invoke(args=['jobs', 'status'])
+    assert 'tests.echo succeeded: 1' in result.output
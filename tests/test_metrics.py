@@ -0,0 +1,161 @@
+"""
+测试应用指标
+Test Application Metrics
+"""
+import multiprocessing
+import pytest
+from app import create_app
+from app.services.metrics import MetricsRegistry, MetricsStore, aggregate, get_metrics, render
+from config.config import ProductionConfig
+
+
+def _child_increments(registry, directory):
+    """子进程：继承的数据应已清空，只写入自己的计数"""
+    registry.inc('http_requests_total', endpoint='child', status='200')
+    MetricsStore(directory).write(registry.snapshot())
+
+
+def test_render_text_format():
+    """测试计数器和直方图的文本格式"""
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.inc('http_requests_total', endpoint='main.index', status='200')
+    registry.inc('http_requests_total', endpoint='main.index', status='200')
+    registry.observe('http_request_duration_seconds', 0.05, endpoint='main.index')
+    registry.observe('http_request_duration_seconds', 0.5, endpoint='main.index')
+    registry.observe('http_request_duration_seconds', 3, endpoint='main.index')
+    registry.set_gauge('db_pool_checked_out', 2)
+
+    text = render(*aggregate([registry.snapshot()]))
+    assert '# TYPE http_requests_total counter' in text
+    assert 'http_requests_total{endpoint="main.index",status="200"} 2' in text
+    assert '# TYPE http_request_duration_seconds histogram' in text
+    assert 'http_request_duration_seconds_bucket{endpoint="main.index",le="0.1"} 1' in text
+    assert 'http_request_duration_seconds_bucket{endpoint="main.index",le="1.0"} 2' in text
+    assert 'http_request_duration_seconds_bucket{endpoint="main.index",le="+Inf"} 3' in text
+    assert 'http_request_duration_seconds_count{endpoint="main.index"} 3' in text
+    assert 'http_request_duration_seconds_sum{endpoint="main.index"} 3.55' in text
+    assert 'db_pool_checked_out 2' in text
+
+
+def test_aggregate_across_processes():
+    """测试计数器累加全部进程，仪表和活跃会话只统计存活的进程"""
+    live = MetricsRegistry()
+    live.inc('http_requests_total', status='200')
+    live.set_gauge('db_pool_checked_out', 1)
+    live.touch_user(1)
+    dead = live.snapshot()
+    dead['pid'] = 2 ** 22 + 12345  # 不存在的进程
+    dead['active_users'] = {'2': dead['active_users']['1']}
+
+    counters, _, gauges, _ = aggregate([live.snapshot(), dead])
+    assert counters[('http_requests_total', (('status', '200'),))] == 2
+    assert gauges[('db_pool_checked_out', ())] == 1
+    assert gauges[('active_sessions', ())] == 1
+    assert gauges[('process_count', ())] == 1
+
+
+def test_store_compacts_dead_processes(tmp_path):
+    """测试已退出进程的快照合并进一个文件后删除，计数器总数不变"""
+    store = MetricsStore(str(tmp_path))
+    live = MetricsRegistry()
+    live.inc('http_requests_total', status='200')
+    store.write(live.snapshot())
+    for offset in range(3):
+        dead = MetricsRegistry()
+        dead.inc('http_requests_total', status='200')
+        dead.observe('http_request_duration_seconds', 0.2)
+        dead.set_gauge('db_pool_checked_out', 1)
+        snapshot = dead.snapshot()
+        snapshot['pid'] = 2 ** 22 + 12345 + offset  # 不存在的进程
+        store.write(snapshot)
+
+    assert store.compact() == 3
+    assert sorted(path.name for path in tmp_path.glob('metrics-*.json')) == [
+        f'metrics-{live.pid}.json', MetricsStore.RETIRED]
+    assert store.compact() == 0
+
+    counters, histograms, gauges, _ = aggregate(store.read_all())
+    assert counters[('http_requests_total', (('status', '200'),))] == 4
+    assert histograms[('http_request_duration_seconds', ())][2] == 3
+    assert ('db_pool_checked_out', ()) not in gauges
+    assert gauges[('process_count', ())] == 1
+
+
+def test_metrics_token_rejects_non_ascii(app, client):
+    """测试令牌比较对非ASCII请求头返回403而不是500"""
+    app.config['METRICS_TOKEN'] = 'secret'
+    assert client.get('/metrics', headers={'Authorization': 'Bearer sécret'}).status_code == 403
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='需要 fork')
+def test_forked_workers_share_directory(tmp_path):
+    """测试 fork 出的 worker 写入各自的快照且不重复计数"""
+    registry = MetricsRegistry()
+    registry.inc('http_requests_total', endpoint='parent', status='200')
+    store = MetricsStore(str(tmp_path))
+    store.write(registry.snapshot())
+
+    context = multiprocessing.get_context('fork')
+    for _ in range(2):
+        process = context.Process(target=_child_increments, args=(registry, str(tmp_path)))
+        process.start()
+        process.join(10)
+        assert process.exitcode == 0
+
+    counters, _, _, _ = aggregate(store.read_all())
+    assert counters[('http_requests_total', (('endpoint', 'parent'), ('status', '200')))] == 1
+    assert counters[('http_requests_total', (('endpoint', 'child'), ('status', '200')))] == 2
+
+
+def test_metrics_endpoint(app, client, auth):
+    """测试 /metrics 输出请求、登录和活跃会话指标"""
+    client.get('/auth/login')
+    client.get('/no-such-page')
+    client.post('/auth/login', data={'username': 'testuser', 'password': 'wrong'})
+    auth.login()
+    client.get('/articles')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.data.decode('utf-8')
+    assert 'http_requests_total{blueprint="auth",endpoint="auth.login",method="GET",status="200"} 1' in text
+    assert 'http_requests_total{blueprint="",endpoint="unmatched",method="GET",status="404"} 1' in text
+    assert 'auth_login_attempts_total{result="failure"} 1' in text
+    assert 'auth_login_attempts_total{result="success"} 1' in text
+    assert 'http_request_duration_seconds_bucket{blueprint="article",endpoint="article.list_articles",le="+Inf"} 1' in text
+    assert 'db_queries_total{endpoint="article.list_articles"}' in text
+    assert 'active_sessions 1' in text
+
+
+def test_metrics_directory_and_token(app, client, tmp_path):
+    """测试配置 METRICS_DIR 时写入进程快照，配置令牌后需要认证"""
+    app.extensions['metrics_store'] = MetricsStore(str(tmp_path))
+    app.config['METRICS_TOKEN'] = 'secret'
+
+    assert client.get('/metrics').status_code == 403
+    response = client.get('/metrics', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200
+    assert list(tmp_path.glob('metrics-*.json'))
+    assert get_metrics(app) is app.extensions['metrics']
+
+
+def test_metrics_ip_allowlist():
+    """测试配置地址白名单后只允许白名单内的地址抓取，令牌可作为替代"""
+    app = create_app('testing', {'METRICS_ALLOWED_IPS': ['10.0.0.0/8'], 'METRICS_TOKEN': 'secret'})
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', environ_base={'REMOTE_ADDR': '10.1.2.3'}).status_code == 200
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+
+
+def test_metrics_require_auth():
+    """测试生产环境未配置令牌或地址白名单时不开放 /metrics"""
+    assert ProductionConfig.METRICS_REQUIRE_AUTH is True
+    app = create_app('testing', {'METRICS_REQUIRE_AUTH': True})
+    assert app.test_client().get('/metrics').status_code == 404
+
+    app = create_app('testing', {'METRICS_REQUIRE_AUTH': True, 'METRICS_TOKEN': 'secret'})
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
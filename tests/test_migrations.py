@@ -0,0 +1,183 @@
+"""
+测试数据库迁移
+Test Database Migrations
+"""
+from sqlalchemy import inspect, text
+from app import create_app, db
+from app.models.user import User
+from app.models.category import Category
+from app.models.article import Article
+from app.services.jobs import JobWorker
+from app.services.migrations import (load_migrations, head_revision, current_revision, upgrade, stamp,
+                                     check_schema, init_schema_check)
+from app.services.schema import explain_hot_queries
+from app.services.search import search_articles
+from app.services.view_counter import view_counter
+
+# 最初版本的模型由 create_all 建出的表结构（SQLite）
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER NOT NULL, username VARCHAR(50) NOT NULL, email VARCHAR(100) NOT NULL,
+    password_hash VARCHAR(255) NOT NULL, nickname VARCHAR(50), avatar VARCHAR(255), bio TEXT,
+    is_active BOOLEAN NOT NULL, created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_users_username ON users (username);
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+CREATE TABLE categories (
+    id INTEGER NOT NULL, name VARCHAR(50) NOT NULL, description TEXT, slug VARCHAR(50) NOT NULL,
+    created_at DATETIME NOT NULL, PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_categories_slug ON categories (slug);
+CREATE UNIQUE INDEX ix_categories_name ON categories (name);
+CREATE TABLE admins (
+    id INTEGER NOT NULL, user_id INTEGER NOT NULL, role VARCHAR(20) NOT NULL, permissions TEXT,
+    created_at DATETIME NOT NULL, PRIMARY KEY (id), UNIQUE (user_id),
+    FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE TABLE articles (
+    id INTEGER NOT NULL, title VARCHAR(200) NOT NULL, content TEXT NOT NULL, summary VARCHAR(500),
+    author_id INTEGER NOT NULL, category_id INTEGER, status VARCHAR(9) NOT NULL,
+    view_count INTEGER NOT NULL, created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL,
+    published_at DATETIME, PRIMARY KEY (id),
+    FOREIGN KEY(author_id) REFERENCES users (id), FOREIGN KEY(category_id) REFERENCES categories (id)
+);
+CREATE TABLE comments (
+    id INTEGER NOT NULL, content TEXT NOT NULL, author_id INTEGER NOT NULL, article_id INTEGER NOT NULL,
+    parent_id INTEGER, status VARCHAR(8) NOT NULL, created_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL, PRIMARY KEY (id),
+    FOREIGN KEY(author_id) REFERENCES users (id), FOREIGN KEY(article_id) REFERENCES articles (id),
+    FOREIGN KEY(parent_id) REFERENCES comments (id)
+);
+INSERT INTO users VALUES (1, 'veteran', 'veteran@example.com', 'x', NULL, NULL, NULL, 1,
+                          '2024-01-01', '2024-01-01');
+INSERT INTO categories VALUES (1, '旧分类', NULL, 'legacy', '2024-01-01');
+INSERT INTO articles VALUES (1, '旧文章', 'legacy body text', NULL, 1, 1, 'published', 0,
+                             '2024-01-01', '2024-01-01', '2024-01-01');
+INSERT INTO comments VALUES (1, '旧评论', 1, 1, NULL, 'approved', '2024-01-02', '2024-01-02');
+INSERT INTO comments VALUES (2, '旧回复', 1, 1, 1, 'approved', '2024-01-03', '2024-01-03')
+"""
+
+
+def _schema(bind):
+    """数据库中的表、字段和索引"""
+    inspector = inspect(bind)
+    return {
+        table: ({column['name'] for column in inspector.get_columns(table)},
+                {(index['name'], tuple(index['column_names'])) for index in inspector.get_indexes(table)})
+        for table in inspector.get_table_names()
+    }
+
+
+def test_migrations_are_ordered():
+    """测试迁移按版本号排序且版本号唯一"""
+    revisions = [migration.revision for migration in load_migrations()]
+    assert revisions == sorted(revisions)
+    assert head_revision() == revisions[-1]
+
+
+def test_upgrade_fresh_database(app):
+    """测试在空数据库上执行全部迁移"""
+    db.session.remove()
+    db.drop_all()
+    assert current_revision() is None
+
+    executed = upgrade()
+    assert executed == [migration.revision for migration in load_migrations()]
+    assert current_revision() == head_revision()
+    assert all(plan.ok for plan in explain_hot_queries().values())
+
+    # 再次执行时没有待执行的迁移
+    assert upgrade() == []
+
+    # 冻结的迁移建出的表结构与当前模型一致
+    migrated = _schema(db.engine)
+    db.drop_all()
+    db.create_all()
+    assert migrated == _schema(db.engine)
+
+
+def test_upgrade_legacy_database(app):
+    """测试旧数据库（由 create_all 创建、缺少新字段和索引）升级"""
+    user = User.query.filter_by(username='testuser').first()
+    article = Article(title='旧文章', content='legacy body text', author_id=user.id)
+    db.session.add(article)
+    db.session.commit()
+    article_id = article.id
+
+    db.session.remove()
+    with db.engine.begin() as connection:
+        connection.execute(text('DROP INDEX ix_articles_status_published_at'))
+        connection.execute(text('ALTER TABLE articles DROP COLUMN reading_time'))
+        connection.execute(text('ALTER TABLE articles DROP COLUMN word_count'))
+        connection.execute(text('ALTER TABLE articles DROP COLUMN excerpt'))
+        connection.execute(text('DROP TABLE schema_migrations'))
+
+    upgrade()
+    columns = {column['name'] for column in inspect(db.engine).get_columns('articles')}
+    assert {'excerpt', 'word_count', 'reading_time'} <= columns
+    assert db.session.get(Article, article_id).word_count == 3
+    assert explain_hot_queries()['published_articles'].ok
+    assert current_revision() == head_revision()
+
+
+def test_upgrade_baseline_schema_database(tmp_path):
+    """测试最初版本建出的数据库升级后补充计数字段、回填计数并可正常访问"""
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "legacy.db"}'})
+    try:
+        with app.app_context():
+            with db.engine.begin() as connection:
+                for statement in BASELINE_SCHEMA.split(';'):
+                    connection.execute(text(statement))
+
+            upgrade()
+            assert current_revision() == head_revision()
+            assert db.session.get(Article, 1).comment_count == 2
+            assert db.session.get(User, 1).comment_count == 2
+            assert db.session.get(User, 1).published_article_count == 1
+            assert db.session.get(Category, 1).published_article_count == 1
+            assert db.session.get(Article, 1).excerpt == 'legacy body text'
+
+            # 全文索引由迁移写入的后台任务重建
+            assert search_articles('legacy').total == 0
+            assert JobWorker(app).run_once() == 1
+            assert search_articles('legacy').total == 1
+            db.session.remove()
+
+        client = app.test_client()
+        assert client.get('/').status_code == 200
+        response = client.get('/articles')
+        assert response.status_code == 200
+        assert '旧文章'.encode('utf-8') in response.data
+    finally:
+        view_counter.shutdown(app)
+        with app.app_context():
+            db.engine.dispose()
+
+
+def test_schema_check_blocks_outdated_database(app, client):
+    """测试 error 模式下数据库未升级时返回503，升级后恢复"""
+    app.config['SCHEMA_REVISION_CHECK'] = 'error'
+    init_schema_check(app)
+    assert check_schema(app)[0] is False
+    assert client.get('/auth/login').status_code == 503
+
+    stamp()
+    assert client.get('/auth/login').status_code == 200
+    # 版本一致后不再查询
+    assert app.extensions['schema_verified'] is True
+
+
+def test_db_commands(app, runner):
+    """测试 flask db check / upgrade 命令"""
+    result = runner.invoke(args=['db', 'check'])
+    assert result.exit_code == 1
+
+    result = runner.invoke(args=['db', 'upgrade'])
+    assert result.exit_code == 0
+    assert f'执行迁移 {head_revision()}' in result.output
+
+    result = runner.invoke(args=['db', 'check'])
+    assert result.exit_code == 0
+    result = runner.invoke(args=['db', 'history'])
+    assert f'[x] {head_revision()}' in result.output
@@ -0,0 +1,111 @@
+"""
+测试匿名页面缓存
+Test Anonymous Page Cache
+"""
+import pytest
+from app import db
+from app.models.user import User
+from app.models.article import Article
+from app.models.comment import Comment
+from app.services.page_cache import MemoryBackend, FileBackend
+from app.services.view_counter import view_counter
+
+
+@pytest.fixture
+def cache(app):
+    """为测试应用启用进程内缓存"""
+    backend = MemoryBackend(max_entries=16)
+    view_counter._take_pending()
+    app.extensions['page_cache'] = backend
+    yield backend
+    view_counter._take_pending()
+
+
+@pytest.fixture
+def article(app):
+    user = User.query.filter_by(username='testuser').first()
+    article = Article(title='缓存文章', content='缓存内容', author_id=user.id)
+    article.publish()
+    db.session.add(article)
+    db.session.commit()
+    return article
+
+
+def test_anonymous_detail_is_cached(client, cache, article):
+    """测试匿名访问详情页第二次命中缓存，且仍记录浏览次数"""
+    first = client.get(f'/articles/{article.id}')
+    second = client.get(f'/articles/{article.id}')
+    assert first.headers['X-Page-Cache'] == 'MISS'
+    assert second.headers['X-Page-Cache'] == 'HIT'
+    assert second.data == first.data
+    assert view_counter.get_pending(article.id) == 2
+
+
+def test_article_edit_invalidates_detail_and_list(client, cache, article):
+    """测试文章修改提交后详情页和列表页缓存失效"""
+    client.get(f'/articles/{article.id}')
+    client.get('/articles')
+    article.title = '修改后的标题'
+    db.session.commit()
+
+    detail = client.get(f'/articles/{article.id}')
+    listing = client.get('/articles')
+    assert detail.headers['X-Page-Cache'] == 'MISS'
+    assert '修改后的标题'.encode('utf-8') in detail.data
+    assert listing.headers['X-Page-Cache'] == 'MISS'
+
+
+def test_comment_invalidates_article(client, cache, article):
+    """测试新增评论使对应文章的缓存失效"""
+    client.get(f'/articles/{article.id}')
+    db.session.add(Comment(content='新的评论', author_id=article.author_id, article_id=article.id))
+    db.session.commit()
+
+    response = client.get(f'/articles/{article.id}')
+    assert response.headers['X-Page-Cache'] == 'MISS'
+    assert '新的评论'.encode('utf-8') in response.data
+
+
+def test_rollback_keeps_cache(client, cache, article):
+    """测试回滚的修改不会使缓存失效"""
+    client.get(f'/articles/{article.id}')
+    article.title = '未提交'
+    db.session.flush()
+    db.session.rollback()
+    assert client.get(f'/articles/{article.id}').headers['X-Page-Cache'] == 'HIT'
+
+
+def test_authenticated_users_bypass_cache(client, auth, cache, article):
+    """测试登录用户不使用缓存"""
+    auth.login()
+    response = client.get(f'/articles/{article.id}')
+    assert 'X-Page-Cache' not in response.headers
+    assert len(cache) == 0
+
+
+def test_memory_backend_lru_and_ttl():
+    """测试进程内后端的LRU淘汰和过期"""
+    backend = MemoryBackend(max_entries=2)
+    backend.set('a', 1, 60)
+    backend.set('b', 2, 60)
+    backend.get('a')
+    backend.set('c', 3, 60)
+    assert backend.get('b') is None
+    assert backend.get('a') == 1
+    backend.set('d', 4, -1)
+    assert backend.get('d') is None
+
+
+def test_file_backend_shared_between_instances(tmp_path):
+    """测试文件后端的条目和版本号可被其他进程（实例）读取"""
+    writer = FileBackend(str(tmp_path))
+    reader = FileBackend(str(tmp_path))
+    writer.set('page:/', {'body': 'x'}, 60)
+    assert reader.get('page:/') == {'body': 'x'}
+
+    assert reader.get_version('lists') == '0'
+    writer.bump_version('lists')
+    assert reader.get_version('lists') != '0'
+
+    writer.set('expired', {'body': 'y'}, -1)
+    assert writer.prune() == 1
@@ -0,0 +1,81 @@
+"""
+测试键集分页
+Test Keyset Pagination
+"""
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models.user import User
+from app.models.article import Article
+from app.models.comment import Comment
+from app.utils.pagination import keyset_paginate, encode_cursor, decode_cursor
+
+
+@pytest.fixture
+def articles(app):
+    """创建25篇发布时间不同（部分相同）的文章"""
+    user = User.query.filter_by(username='testuser').first()
+    base = datetime(2024, 1, 1)
+    items = []
+    for i in range(25):
+        article = Article(title=f'文章{i}', content='内容', author_id=user.id, status='published')
+        article.published_at = base + timedelta(hours=i // 2)
+        items.append(article)
+    db.session.add_all(items)
+    db.session.commit()
+    return items
+
+
+def test_cursor_round_trip():
+    """测试游标编码和解码"""
+    now = datetime(2024, 5, 1, 12, 30)
+    values, direction = decode_cursor(encode_cursor([now, 7], 'prev'))
+    assert values == [now, 7]
+    assert direction == 'prev'
+
+
+def test_keyset_walks_forward_and_back(articles):
+    """测试键集分页向后和向前翻页覆盖全部数据且不重复"""
+    query = Article.query.filter_by(status='published')
+    columns = (Article.published_at, Article.id)
+    expected = [article.id for article in
+                query.order_by(Article.published_at.desc(), Article.id.desc()).all()]
+
+    pages = []
+    page = keyset_paginate(query, columns, per_page=10, count_cap=20)
+    assert page.total == 20 and page.total_capped
+    assert not page.has_prev
+    pages.append(page)
+    while page.has_next:
+        page = keyset_paginate(query, columns, cursor=page.next_cursor, per_page=10)
+        pages.append(page)
+
+    assert [article.id for page in pages for article in page.items] == expected
+    assert len(pages) == 3
+
+    back = keyset_paginate(query, columns, cursor=pages[2].prev_cursor, per_page=10)
+    assert [article.id for article in back.items] == [article.id for article in pages[1].items]
+    assert back.has_next and back.has_prev
+
+
+def test_list_and_api_cursor_mode(client, articles):
+    """测试列表页和评论接口的游标模式"""
+    response = client.get('/articles?cursor=')
+    assert response.status_code == 200
+    assert 'cursor='.encode('utf-8') in response.data
+
+    assert client.get('/articles?cursor=not-a-cursor').status_code == 400
+
+    article = articles[0]
+    for i in range(3):
+        db.session.add(Comment(content=f'评论{i}', author_id=article.author_id, article_id=article.id))
+    db.session.commit()
+
+    data = client.get(f'/api/articles/{article.id}/comments?cursor=&per_page=2').get_json()
+    assert [comment['content'] for comment in data['comments']] == ['评论0', '评论1']
+    assert data['pagination']['has_next']
+
+    cursor = data['pagination']['next_cursor']
+    data = client.get(f'/api/articles/{article.id}/comments?cursor={cursor}&per_page=2').get_json()
+    assert [comment['content'] for comment in data['comments']] == ['评论2']
+    assert not data['pagination']['has_next']
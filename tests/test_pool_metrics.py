@@ -0,0 +1,60 @@
+"""
+测试连接池配置和指标
+Test Connection Pool Configuration and Metrics
+"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app import db
+from app.models.user import User
+from app.models.admin import Admin
+from app.services.pool_metrics import InstrumentedQueuePool, attach_pool_metrics, get_pool_stats
+from config.config import pool_options
+
+
+def test_pool_options_from_env(monkeypatch):
+    """测试连接池参数可由环境变量覆盖"""
+    monkeypatch.setenv('DB_POOL_SIZE', '3')
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'false')
+    options = pool_options(pool_size=10, max_overflow=20)
+    assert options['pool_size'] == 3
+    assert options['max_overflow'] == 20
+    assert options['pool_pre_ping'] is False
+
+
+def test_instrumented_pool_records_usage(tmp_path):
+    """测试借出、溢出、等待和超时指标"""
+    engine = create_engine(f'sqlite:///{tmp_path / "pool.db"}', poolclass=InstrumentedQueuePool,
+                           pool_size=1, max_overflow=1, pool_timeout=0.05)
+    attach_pool_metrics(engine)
+    first = engine.connect()
+    second = engine.connect()
+    first.execute(text('SELECT 1'))
+
+    stats = get_pool_stats(engine)
+    assert stats['checked_out'] == 2
+    assert stats['overflow'] == 1
+    assert stats['wait']['count'] == 2
+
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    assert get_pool_stats(engine)['timeouts'] == 1
+
+    first.close()
+    second.close()
+    stats = get_pool_stats(engine)
+    assert stats['checked_out'] == 0
+    assert stats['checkins'] == 2
+    engine.dispose()
+
+
+def test_pool_stats_endpoint(app, client, auth):
+    """测试管理员可查看连接池指标"""
+    user = User.query.filter_by(username='testuser').first()
+    db.session.add(Admin(user_id=user.id))
+    db.session.commit()
+    auth.login()
+
+    response = client.get('/admin/system/pool')
+    assert response.status_code == 200
+    assert response.get_json()['checkouts'] >= 1
@@ -0,0 +1,134 @@
+"""
+测试请求级SQL统计
+Test Per-Request SQL Metrics
+"""
+import pytest
+from sqlalchemy import select
+from app import db
+from app.models.admin import Admin
+from app.models.user import User
+from app.services.query_metrics import get_query_metrics
+from app.utils.query_counter import fingerprint
+
+
+@pytest.fixture
+def n_plus_one(app):
+    """注册一个逐条查询用户的视图"""
+    @app.route('/_test/n-plus-one')
+    def n_plus_one_view():
+        for user_id in range(1, 9):
+            db.session.execute(select(User.username).where(User.id == user_id)).first()
+        return 'ok'
+    return '/_test/n-plus-one'
+
+
+def test_fingerprint_ignores_parameters():
+    """测试只有参数不同的语句指纹相同"""
+    first = "SELECT * FROM users WHERE id = 1 AND name = 'a' AND status IN (?, ?)"
+    second = "SELECT *  FROM users\nWHERE id = 42 AND name = 'it''s' AND status IN (?, ?, ?)"
+    assert fingerprint(first) == fingerprint(second)
+    assert fingerprint(first) != fingerprint('SELECT * FROM articles WHERE id = 1')
+
+
+def test_debug_header(app, client):
+    """测试开启调试响应头后返回本请求的SQL统计"""
+    assert 'X-Query-Count' not in client.get('/auth/login').headers
+
+    app.config['SQL_DEBUG_HEADER'] = True
+    response = client.get('/articles')
+    assert int(response.headers['X-Query-Count']) >= 1
+    assert float(response.headers['X-Query-Time-Ms']) >= 0
+    assert response.headers['X-Query-Max-Repeats'] == '1'
+
+
+def test_registry_records_endpoints(app, client, n_plus_one, caplog):
+    """测试按端点累计统计并标记重复语句"""
+    client.get('/articles')
+    client.get('/articles')
+    client.get(n_plus_one)
+
+    registry = get_query_metrics(app)
+    articles = registry.get('article.list_articles')
+    assert articles['requests'] == 2
+    assert articles['avg_queries'] >= 1
+    assert articles['repeated'] == []
+
+    stats = registry.get('n_plus_one_view')
+    assert stats['max_queries'] == 8
+    assert stats['repeated'][0]['max'] == 8
+    assert len(stats['slowest']) == app.config['SQL_SLOW_STATEMENTS']
+    assert 'Possible N+1 on n_plus_one_view' in caplog.text
+
+
+def test_perf_dashboard(app, client, auth, n_plus_one):
+    """测试管理员查看和清空SQL统计"""
+    user = User.query.filter_by(username='testuser').first()
+    db.session.add(Admin(user_id=user.id))
+    db.session.commit()
+    auth.login()
+    client.get(n_plus_one)
+
+    response = client.get('/admin/perf')
+    assert response.status_code == 200
+    assert 'n_plus_one_view' in response.data.decode('utf-8')
+
+    endpoints = {item['endpoint']: item for item in client.get('/admin/perf?format=json').get_json()}
+    assert endpoints['n_plus_one_view']['repeated']
+
+    client.post('/admin/perf/reset')
+    assert get_query_metrics(app).get('n_plus_one_view') is None
+
+
+def test_query_budget_fixture(client, query_budget, n_plus_one):
+    """测试SQL预算断言发现超出预算和 N+1 查询"""
+    # 首次请求还会加载分类注册表
+    with query_budget(4):
+        client.get('/articles')
+
+    with pytest.raises(AssertionError, match='超过上限 3'):
+        with query_budget(3, max_repeats=10):
+            client.get(n_plus_one)
+
+    with pytest.raises(AssertionError, match='N\\+1'):
+        with query_budget():
+            client.get(n_plus_one)
+
+
+def test_admin_users_query_budget(app, client, auth, query_budget):
+    """测试用户管理列表随用户一起加载管理员记录，查询数量与用户数量无关"""
+    admin_user = User.query.filter_by(username='testuser').first()
+    db.session.add(Admin(user_id=admin_user.id))
+    for i in range(19):
+        user = User(username=f'member{i}', email=f'member{i}@example.com', password='password')
+        db.session.add(user)
+        if i % 5 == 0:
+            db.session.flush()
+            db.session.add(Admin(user_id=user.id))
+    db.session.commit()
+    auth.login()
+    client.get('/admin/users')
+
+    # 用户页 + 总数
+    with query_budget(2):
+        response = client.get('/admin/users')
+    assert response.status_code == 200
+    assert 'member18'.encode('utf-8') in response.data
+
+
+def test_listeners_registered_per_engine(app, tmp_path):
+    """测试监听器只注册在应用的主库和从库引擎上，不影响其他引擎"""
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.engine import Engine
+    from app.services.query_metrics import _after_cursor_execute
+    from app.services.replicas import set_replicas
+
+    assert not event.contains(Engine, 'after_cursor_execute', _after_cursor_execute)
+    assert event.contains(db.engine, 'after_cursor_execute', _after_cursor_execute)
+    assert not event.contains(create_engine('sqlite://'), 'after_cursor_execute', _after_cursor_execute)
+
+    set_replicas(app, [f'sqlite:///{tmp_path / "replica.db"}'])
+    try:
+        replica = app.extensions['replicas'].engines[0]
+        assert event.contains(replica, 'after_cursor_execute', _after_cursor_execute)
+    finally:
+        set_replicas(app, [])
@@ -0,0 +1,117 @@
+"""
+测试只读从库路由
+Test Read Replica Routing
+"""
+import time
+from unittest import mock
+import pytest
+from sqlalchemy import create_engine, insert, update
+from app import db
+from app.models.user import User
+from app.models.article import Article
+from app.models.replica import ReplicaHeartbeat
+from app.services.replicas import ReplicaSet, read_lag, set_replicas, write_heartbeat
+
+
+@pytest.fixture
+def replica(app, tmp_path):
+    """用一个 SQLite 文件模拟从库，并写入与主库不同的文章标题"""
+    uri = f'sqlite:///{tmp_path / "replica.db"}'
+    engine = create_engine(uri)
+    db.metadata.create_all(engine)
+
+    user = User.query.filter_by(username='testuser').first()
+    article = Article(title='主库标题', content='内容', author_id=user.id)
+    article.publish()
+    db.session.add(article)
+    db.session.commit()
+
+    with engine.begin() as connection:
+        connection.execute(insert(User.__table__).values(
+            id=user.id, username=user.username, email=user.email, password_hash=user.password_hash,
+            is_active=True, published_article_count=0, comment_count=0,
+            created_at=user.created_at, updated_at=user.updated_at))
+        connection.execute(insert(Article.__table__).values(
+            id=article.id, title='从库标题', content='内容', author_id=user.id, status='published',
+            view_count=0, comment_count=0, published_at=article.published_at,
+            created_at=article.created_at, updated_at=article.updated_at))
+    write_heartbeat(engine)
+    engine.dispose()
+
+    set_replicas(app, [uri])
+    # 请求与测试共用应用上下文，换一个新会话以清除身份映射和写入标记
+    db.session.remove()
+    yield app.extensions['replicas'], article.id
+    set_replicas(app, [])
+
+
+def test_reads_routed_to_replica(client, replica):
+    """测试只读蓝图的GET请求从从库读取"""
+    replicas, article_id = replica
+    response = client.get(f'/articles/{article_id}')
+    assert '从库标题'.encode('utf-8') in response.data
+
+
+def test_lagging_replica_falls_back_to_primary(client, replica):
+    """测试从库延迟超过阈值时退回主库"""
+    replicas, article_id = replica
+    write_heartbeat(replicas.engines[0], time.time() - replicas.max_lag - 10)
+    replicas._lags.clear()
+    response = client.get(f'/articles/{article_id}')
+    assert '主库标题'.encode('utf-8') in response.data
+
+
+def test_use_primary_override(client, auth, replica):
+    """测试 use_primary 装饰的视图使用主库"""
+    replicas, article_id = replica
+    auth.login()
+    response = client.get(f'/articles/{article_id}/edit')
+    assert '主库标题'.encode('utf-8') in response.data
+
+
+def test_read_after_write_uses_primary(app, client, auth, replica):
+    """测试写入之后同一用户的后续请求读主库"""
+    replicas, article_id = replica
+    auth.login()
+    assert '从库标题'.encode('utf-8') in client.get(f'/articles/{article_id}').data
+
+    client.post(f'/articles/{article_id}/comments', data={'content': '一条评论', 'article_id': article_id})
+    # 模拟新请求的会话：去掉本会话的写入标记，只依赖 cookie 中的读主库期限
+    db.session.info.pop('wrote', None)
+    with client.session_transaction() as http_session:
+        assert http_session['_primary_until'] > time.time()
+    assert '主库标题'.encode('utf-8') in client.get(f'/articles/{article_id}').data
+
+
+def test_writes_in_replica_request_go_to_primary(app, replica):
+    """测试只读请求中的写入和写后读仍使用主库"""
+    replicas, article_id = replica
+    from flask import g
+    with app.test_request_context(f'/articles/{article_id}'):
+        g.db_route = 'replica'
+        assert db.session.get(Article, article_id).title == '从库标题'
+        db.session.execute(update(Article).where(Article.id == article_id).values(title='新标题'))
+        db.session.expire_all()
+        assert db.session.get(Article, article_id).title == '新标题'
+        db.session.commit()
+
+
+def test_heartbeat_written_in_background(tmp_path):
+    """测试心跳由后台线程写入主库，检测延迟时只读取从库"""
+    engine = create_engine(f'sqlite:///{tmp_path / "heartbeat.db"}')
+    ReplicaHeartbeat.__table__.create(engine)
+    replicas = ReplicaSet(engine, [engine], check_interval=0, heartbeat_interval=0.05)
+    try:
+        with mock.patch('app.services.replicas.write_heartbeat') as write:
+            assert replicas.lag(0) is None
+        write.assert_not_called()
+
+        replicas.start_heartbeat()
+        deadline = time.time() + 5
+        while read_lag(engine) is None and time.time() < deadline:
+            time.sleep(0.01)
+        assert replicas.lag(0) is not None
+    finally:
+        replicas.dispose()
+    replicas._heartbeat.join(1)
+    assert not replicas._heartbeat.is_alive()
@@ -0,0 +1,31 @@
+"""
+测试热点查询的组合索引
+Test Composite Indexes for Hot Queries
+"""
+import pytest
+from sqlalchemy import text
+from app import db
+from app.services.schema import HOT_QUERIES, explain
+
+
+@pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+def test_hot_query_uses_index(app, name):
+    """测试热点查询使用索引，无需全表扫描或额外排序"""
+    plan = explain(HOT_QUERIES[name]())
+    assert plan.ok, plan.details
+
+
+def test_missing_index_detected_and_restored(app, runner):
+    """测试缺少索引时查询计划检查失败，执行迁移补建后恢复"""
+    db.session.execute(text('DROP INDEX ix_articles_status_published_at'))
+    db.session.commit()
+    plan = explain(HOT_QUERIES['published_articles']())
+    assert not plan.ok
+
+    result = runner.invoke(args=['schema', 'explain'])
+    assert result.exit_code == 1
+    assert '[SLOW] published_articles' in result.output
+
+    result = runner.invoke(args=['db', 'upgrade'])
+    assert result.exit_code == 0
+    assert explain(HOT_QUERIES['published_articles']()).ok
@@ -0,0 +1,81 @@
+"""
+测试全文搜索
+Test Full-Text Search
+"""
+import pytest
+from app import db
+from app.models.user import User
+from app.models.article import Article
+from app.models.search import SearchPosting
+from app.services.search import tokenize, search_articles
+
+
+@pytest.fixture
+def articles(app):
+    """创建中英文测试文章"""
+    user = User.query.filter_by(username='testuser').first()
+    items = [
+        Article(title='数据库索引设计', content='介绍MySQL数据库的索引。', author_id=user.id),
+        Article(title='Flask 入门', content='使用 Flask 搭建博客，数据库使用 MySQL。', author_id=user.id),
+        Article(title='生活随笔', content='今天天气很好。', author_id=user.id),
+        Article(title='数据库草稿', content='尚未发布的数据库文章', author_id=user.id)
+    ]
+    for article in items[:3]:
+        article.publish()
+    db.session.add_all(items)
+    db.session.commit()
+    return items
+
+
+def test_tokenize_mixed_text():
+    """测试中英文混合切分"""
+    assert tokenize('Flask 数据库') == ['flask', '数', '据', '库', '数据', '据库']
+    assert tokenize('Flask 数据库', for_query=True) == ['flask', '数据', '据库']
+
+
+def test_search_ranks_by_relevance(articles):
+    """测试按相关度排序并只返回已发布文章"""
+    result = search_articles('数据库')
+    assert [article.title for article in result.items] == ['数据库索引设计', 'Flask 入门']
+    assert result.total == 2
+
+    assert [article.title for article in search_articles('mysql flask').items] == ['Flask 入门']
+    assert search_articles('不存在的词').total == 0
+
+
+def test_search_pagination(articles):
+    """测试搜索结果分页"""
+    result = search_articles('数据库', per_page=1, page=2)
+    assert result.pages == 2
+    assert [article.title for article in result.items] == ['Flask 入门']
+
+
+def test_index_updates_incrementally(articles):
+    """测试编辑和删除文章时增量更新索引"""
+    article = articles[2]
+    article.content = '今天学习了数据库。'
+    db.session.commit()
+    assert '生活随笔' in [item.title for item in search_articles('数据库').items]
+
+    db.session.delete(article)
+    db.session.commit()
+    assert SearchPosting.query.filter_by(article_id=article.id).count() == 0
+
+
+def test_rebuild_command(runner, articles):
+    """测试重建索引命令"""
+    db.session.execute(SearchPosting.__table__.delete())
+    db.session.commit()
+    assert search_articles('数据库').total == 0
+
+    result = runner.invoke(args=['search', 'rebuild'])
+    assert result.exit_code == 0
+    assert search_articles('数据库').total == 2
+
+
+def test_list_page_search(client, articles):
+    """测试文章列表页搜索"""
+    response = client.get('/articles?keyword=数据库')
+    assert response.status_code == 200
+    assert '数据库索引设计'.encode('utf-8') in response.data
+    assert '生活随笔'.encode('utf-8') not in response.data
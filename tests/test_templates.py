@@ -0,0 +1,58 @@
+"""
+测试模板预编译与字节码缓存
+Test Template Precompilation and Bytecode Cache
+"""
+from unittest import mock
+from jinja2 import ChoiceLoader, DictLoader
+from app import create_app
+from app.services.templates import list_template_names, precompile_templates
+from config.config import ProductionConfig
+
+
+def test_precompile_writes_cache(app, tmp_path):
+    """测试预编译全部模板，再次执行时跳过已是最新的模板"""
+    compiled, current, errors = precompile_templates(app, str(tmp_path))
+    assert 'article/detail.html' in compiled
+    assert errors == {}
+    assert len(list(tmp_path.glob('blog_*.cache'))) == len(compiled)
+
+    compiled, current, _ = precompile_templates(app, str(tmp_path))
+    assert compiled == []
+    assert 'article/detail.html' in current
+
+
+def test_precompile_reports_syntax_errors(app, tmp_path):
+    """测试模板语法错误被收集而不是中断编译"""
+    app.jinja_env.loader = ChoiceLoader([DictLoader({'broken.html': '{% if %}'}), app.jinja_env.loader])
+    compiled, _, errors = precompile_templates(app, str(tmp_path))
+    assert 'broken.html' in errors
+    assert 'base.html' in compiled
+
+
+def test_preload_from_bytecode_cache(app, tmp_path):
+    """测试启动时从字节码缓存预加载模板，首次渲染不再编译"""
+    precompile_templates(app, str(tmp_path))
+    preloaded = create_app('testing', {'TEMPLATE_BYTECODE_CACHE': True, 'TEMPLATE_PRELOAD': True,
+                                       'TEMPLATE_CACHE_DIR': str(tmp_path)})
+    env = preloaded.jinja_env
+    assert len(env.cache) == len(list_template_names(preloaded))
+
+    with mock.patch.object(env, 'compile', side_effect=AssertionError('模板被重新编译')):
+        with preloaded.test_request_context():
+            env.get_template('auth/login.html')
+
+
+def test_compile_command(runner, tmp_path, app):
+    """测试 flask templates compile 命令"""
+    app.config['TEMPLATE_CACHE_DIR'] = str(tmp_path)
+    result = runner.invoke(args=['templates', 'compile'])
+    assert result.exit_code == 0
+    assert '已编译' in result.output
+    assert list(tmp_path.glob('blog_*.cache'))
+
+
+def test_production_disables_auto_reload():
+    """测试生产环境关闭模板自动重载并启用缓存"""
+    assert ProductionConfig.TEMPLATES_AUTO_RELOAD is False
+    assert ProductionConfig.TEMPLATE_BYTECODE_CACHE is True
+    assert ProductionConfig.TEMPLATE_PRELOAD is True
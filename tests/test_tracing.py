@@ -0,0 +1,98 @@
+"""
+测试请求耗时追踪
+Test Request Span Tracing
+"""
+from unittest import mock
+import pytest
+from app import create_app, db
+from app.models.article import Article
+from app.models.comment import Comment
+from app.models.user import User
+from app.services.tracing import current_trace, load_trace_events, span
+
+
+@pytest.fixture
+def traced_app(tmp_path):
+    """全部请求都采样的应用"""
+    path = tmp_path / 'trace.json'
+    app = create_app('testing', {'TRACE_SAMPLE_RATE': 1.0, 'TRACE_FILE': str(path)})
+    with app.app_context():
+        db.create_all()
+        user = User(username='tracer', email='tracer@example.com', password='testpass')
+        db.session.add(user)
+        db.session.flush()
+        article = Article(title='追踪', content='正文', author_id=user.id, status='published')
+        db.session.add(article)
+        db.session.flush()
+        db.session.add(Comment(content='第一行\n第二行', author_id=user.id, article_id=article.id))
+        db.session.commit()
+        app.config['TRACE_TEST_ARTICLE'] = article.id
+        yield app
+        db.drop_all()
+
+
+def test_request_spans_written(traced_app):
+    """测试文章详情请求记录视图、模板、过滤器、表单和SQL片段"""
+    article_id = traced_app.config['TRACE_TEST_ARTICLE']
+    client = traced_app.test_client()
+    assert client.get(f'/articles/{article_id}').status_code == 200
+
+    events = load_trace_events(traced_app.config['TRACE_FILE'])
+    names = [event['name'] for event in events]
+    assert 'request article.article_detail' in names
+    assert 'view article.article_detail' in names
+    assert 'render article/detail.html' in names
+    assert 'filter.nl2br' in names
+    assert 'form.init CommentForm' in names
+    assert 'sql' in names
+    assert all(event['ph'] == 'X' and event['dur'] >= 0 for event in events)
+
+    # 子片段位于请求片段的时间范围内
+    root = events[names.index('request article.article_detail')]
+    view = events[names.index('view article.article_detail')]
+    assert root['ts'] <= view['ts'] and view['ts'] + view['dur'] <= root['ts'] + root['dur'] + 1
+
+
+def test_flush_and_form_validate_spans(traced_app):
+    """测试提交表单时记录表单验证和 flush 片段"""
+    article_id = traced_app.config['TRACE_TEST_ARTICLE']
+    client = traced_app.test_client()
+    client.post('/auth/login', data={'username': 'tracer', 'password': 'testpass'})
+    client.post(f'/articles/{article_id}/comments', data={'content': '新评论', 'article_id': article_id})
+
+    names = {event['name'] for event in load_trace_events(traced_app.config['TRACE_FILE'])}
+    assert 'form.validate LoginForm' in names
+    assert 'db.flush' in names
+
+
+def test_wtforms_not_patched(traced_app):
+    """测试启用追踪后不修改 WTForms 本身，表单片段只由本应用的表单基类记录"""
+    from wtforms.form import Form, FormMeta
+
+    assert not hasattr(FormMeta.__call__, '__wrapped__')
+    assert not hasattr(Form.validate, '__wrapped__')
+
+
+def test_sampling_rate(tmp_path):
+    """测试只有被采样的请求写入追踪"""
+    path = tmp_path / 'sampled.json'
+    app = create_app('testing', {'TRACE_SAMPLE_RATE': 0.5, 'TRACE_FILE': str(path)})
+    client = app.test_client()
+
+    with mock.patch('app.services.tracing.random.random', return_value=0.9):
+        assert client.get('/auth/login').status_code == 200
+    assert not path.exists()
+
+    with mock.patch('app.services.tracing.random.random', return_value=0.1):
+        client.get('/auth/login')
+    names = [event['name'] for event in load_trace_events(path)]
+    assert names.count('request auth.login') == 1
+
+
+def test_disabled_tracing_is_noop(app, client):
+    """测试采样率为0时不注册追踪"""
+    assert app.extensions['tracing'] is None
+    assert current_trace() is None
+    with span('outside') as item:
+        assert item is not None
+    assert client.get('/auth/login').status_code == 200
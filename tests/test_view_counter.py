@@ -0,0 +1,94 @@
+"""
+测试文章浏览计数缓冲
+Test Buffered Article View Counter
+"""
+from unittest import mock
+import pytest
+from app import db
+from app.models.user import User
+from app.models.article import Article
+from app.services.view_counter import view_counter
+
+
+@pytest.fixture
+def article(app):
+    """创建一篇已发布的文章"""
+    view_counter._take_pending()
+    user = User.query.filter_by(username='testuser').first()
+    article = Article(title='测试文章', content='测试内容', author_id=user.id)
+    article.publish()
+    db.session.add(article)
+    db.session.commit()
+    yield article
+    view_counter.flush()
+
+
+def test_views_are_buffered_until_flush(client, app, article):
+    """测试浏览次数先缓冲，刷新后批量写回"""
+    for _ in range(3):
+        response = client.get(f'/articles/{article.id}')
+        assert response.status_code == 200
+
+    assert view_counter.backlog_size() == 3
+    db.session.expire_all()
+    assert db.session.get(Article, article.id).view_count == 0
+
+    assert view_counter.flush() == 3
+    assert view_counter.backlog_size() == 0
+    db.session.expire_all()
+    assert db.session.get(Article, article.id).view_count == 3
+
+
+def test_threshold_triggers_flush(app, article):
+    """测试达到阈值时自动刷新"""
+    view_counter._threshold = 2
+    try:
+        view_counter.record(article.id)
+        assert view_counter.backlog_size() == 1
+        view_counter.record(article.id)
+        assert view_counter.backlog_size() == 0
+    finally:
+        view_counter._threshold = app.config['VIEW_COUNT_FLUSH_THRESHOLD']
+
+    db.session.expire_all()
+    assert db.session.get(Article, article.id).view_count == 2
+
+
+def test_shared_store_backlog(app, article, tmp_path):
+    """测试共享存储模式下的积压统计和写回"""
+    view_counter._store_path = str(tmp_path / 'views.db')
+    view_counter._init_store()
+    try:
+        view_counter.record(article.id, count=4)
+        view_counter._store_merge(view_counter._take_pending())
+        assert view_counter.stats()['store_pending_views'] == 4
+        assert view_counter.flush() == 4
+        assert view_counter.backlog_size() == 0
+    finally:
+        view_counter._store_path = None
+
+    db.session.expire_all()
+    assert db.session.get(Article, article.id).view_count == 4
+
+
+def test_flush_keeps_updated_at(app, article):
+    """测试写回浏览次数不修改文章的更新时间"""
+    updated_at = article.updated_at
+    view_counter.record(article.id, count=2)
+    view_counter.flush()
+
+    db.session.expire_all()
+    refreshed = db.session.get(Article, article.id)
+    assert refreshed.view_count == 2
+    assert refreshed.updated_at == updated_at
+
+
+def test_shutdown_unbinds_app(app, article):
+    """测试应用关闭后退出时的刷新不再访问其数据库"""
+    view_counter.record(article.id)
+    assert view_counter.shutdown(app) == 1
+    view_counter.record(article.id)
+    with mock.patch.object(view_counter, '_apply') as apply:
+        view_counter._flush_at_exit()
+    apply.assert_not_called()
+    view_counter.init_app(app)